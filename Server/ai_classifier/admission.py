@@ -0,0 +1,139 @@
+# admission.py
+"""
+승인 제어(admission control) / 부하 차단(load shedding) / deadline 전파
+
+- AdmissionController: HF 호출 경로(캐시 miss)에 들어와 있는 요청 수를 lane별로 max_pending 으로 제한
+  - 실시간 요청: 자리가 없으면 즉시 Overloaded (-> 429 + Retry-After)
+  - 배치 item: 자리가 날 때까지 기다림 (deadline까지)
+  - lane(interactive / backfill)마다 자리를 따로 세므로 backfill이 가득 차도 실시간 요청은 거절되지 않음
+- RequestBudget: 호출자가 준 남은 시간(X-Request-Timeout-Ms)을 monotonic deadline으로 변환해
+  contextvar로 전달. deadline이 지난 작업은 HF에 보내지 않고 DeadlineExceeded (-> 504)
+"""
+
+import asyncio
+import math
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from lanes import INTERACTIVE, LANES
+
+
+class Overloaded(Exception):
+    """승인 큐가 가득 참 (429)"""
+
+    def __init__(self, retry_after_s: int) -> None:
+        super().__init__("overloaded")
+        self.retry_after_s = retry_after_s
+
+
+class DeadlineExceeded(Exception):
+    """호출자의 deadline이 이미 지남 (504)"""
+
+    def __init__(self) -> None:
+        super().__init__("deadline_exceeded")
+
+
+@dataclass
+class RequestBudget:
+    """요청 단위 deadline / 대기 정책"""
+
+    deadline: Optional[float] = None  # time.monotonic() 기준, None = 무제한
+    wait: bool = False  # True면 승인 큐가 찰 때 거절 대신 대기 (배치 item)
+    lane: str = INTERACTIVE  # 우선순위 lane (lanes.py)
+
+    @classmethod
+    def from_timeout_ms(
+        cls, timeout_ms: Optional[str], wait: bool = False, lane: str = INTERACTIVE
+    ) -> "RequestBudget":
+        deadline = None
+        if timeout_ms:
+            try:
+                deadline = time.monotonic() + max(0.0, float(timeout_ms)) / 1000.0
+            except ValueError:
+                deadline = None
+        return cls(deadline=deadline, wait=wait, lane=lane)
+
+    def remaining(self) -> Optional[float]:
+        if self.deadline is None:
+            return None
+        return self.deadline - time.monotonic()
+
+    def expired(self) -> bool:
+        r = self.remaining()
+        return r is not None and r <= 0
+
+
+current_budget: ContextVar[RequestBudget] = ContextVar("current_budget", default=RequestBudget())
+
+
+class AdmissionController:
+    """HF 경로에 동시에 들어와 있을 수 있는 요청 수(대기 + 처리 중)를 lane별로 제한"""
+
+    def __init__(self, max_pending: int, concurrency: int) -> None:
+        self.max_pending = max(1, int(max_pending))
+        self.concurrency = max(1, int(concurrency))
+        self.pending = 0  # 전체 (Retry-After 추정 / 지표용)
+        self.lane_pending: Dict[str, int] = {lane: 0 for lane in LANES}
+        # lane별 대기열 (같은 lock 공유, 자리가 난 lane의 대기자만 깨움)
+        lock = asyncio.Lock()
+        self._conds = {lane: asyncio.Condition(lock) for lane in LANES}
+
+        # Retry-After 추정용 HF 호출 지연 EWMA (초)
+        self.latency_ewma = 1.0
+
+        self.admitted = 0
+        self.rejected = 0
+        self.expired = 0
+
+    async def acquire(self, budget: RequestBudget) -> None:
+        if budget.expired():
+            self.expired += 1
+            raise DeadlineExceeded()
+
+        lane = budget.lane
+        cond = self._conds[lane]
+        async with cond:
+            if self.lane_pending[lane] >= self.max_pending:
+                if not budget.wait:
+                    self.rejected += 1
+                    raise Overloaded(self.retry_after())
+
+                try:
+                    await asyncio.wait_for(
+                        cond.wait_for(lambda: self.lane_pending[lane] < self.max_pending),
+                        timeout=budget.remaining(),
+                    )
+                except asyncio.TimeoutError:
+                    self.expired += 1
+                    raise DeadlineExceeded()
+
+            self.lane_pending[lane] += 1
+            self.pending += 1
+            self.admitted += 1
+
+    async def release(self, lane: str = INTERACTIVE) -> None:
+        cond = self._conds[lane]
+        async with cond:
+            self.lane_pending[lane] -= 1
+            self.pending -= 1
+            cond.notify()
+
+    def observe_latency(self, seconds: float, alpha: float = 0.2) -> None:
+        self.latency_ewma = (1 - alpha) * self.latency_ewma + alpha * seconds
+
+    def retry_after(self) -> int:
+        """현재 큐가 빠지는 데 걸릴 예상 시간(초, 최소 1)"""
+        return max(1, math.ceil(self.latency_ewma * self.pending / self.concurrency))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": self.pending,
+            "lane_pending": dict(self.lane_pending),
+            "max_pending": self.max_pending,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "expired": self.expired,
+            "latency_ewma_s": round(self.latency_ewma, 3),
+        }
@@ -0,0 +1,95 @@
+# batcher.py
+import asyncio
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+
+class MicroBatcher:
+    """
+    동시에 들어온 predict 요청을 모아서 한 번의 Endpoint 호출로 보내는 배치 레이어.
+
+    - max_size 개가 모이거나 max_wait_ms 가 지나면 묶어서 dispatch
+    - dispatch: 프롬프트 리스트 -> 같은 길이의 결과 리스트를 돌려주는 코루틴 함수
+      (결과 원소가 예외 객체면 해당 호출자에게만 예외로 전달)
+    - 결과는 각 호출자의 Future로 다시 나눠서 전달
+    """
+
+    def __init__(
+        self,
+        dispatch: Callable[[List[Any]], Awaitable[List[Any]]],
+        max_size: int = 8,
+        max_wait_ms: float = 10.0,
+    ) -> None:
+        self.dispatch = dispatch
+        self.max_size = max(1, int(max_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+
+        # 통계 (배치 크기 분포 확인용)
+        self.batches = 0
+        self.items = 0
+
+    async def submit(self, item: Any) -> Any:
+        """item 하나를 배치 큐에 넣고 결과를 기다림"""
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._pending.append((item, fut))
+
+        if len(self._pending) >= self.max_size or self.max_wait == 0:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await fut
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending[: self.max_size], self._pending[self.max_size :]
+        task = asyncio.ensure_future(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+        # max_size 보다 많이 쌓였으면 남은 것도 이어서 처리
+        if self._pending:
+            if len(self._pending) >= self.max_size:
+                self._flush()
+            else:
+                loop = asyncio.get_running_loop()
+                self._timer = loop.call_later(self.max_wait, self._flush)
+
+    async def _run(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        self.batches += 1
+        self.items += len(batch)
+        try:
+            results = await self.dispatch([item for item, _ in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(f"batch size mismatch: {len(results)} != {len(batch)}")
+        except Exception as e:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+
+        # dispatch는 item별 실패를 예외 객체로 돌려줄 수 있음 (예: deadline 초과)
+        for (_, fut), res in zip(batch, results):
+            if fut.done():
+                continue
+            if isinstance(res, BaseException):
+                fut.set_exception(res)
+            else:
+                fut.set_result(res)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "pending": len(self._pending),
+        }
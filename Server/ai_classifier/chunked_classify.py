@@ -0,0 +1,128 @@
+# chunked_classify.py
+"""
+토큰 예산보다 큰 요청 본문의 조각(chunk) 병렬 분류
+
+- PayloadCompactor.split()으로 나눈 chunk들을 동시에 분류 (각 chunk = HF 호출 1회)
+- 확신도 높은 공격 판정이 하나라도 나오면 나머지 chunk는 취소 (early stop)
+- chunk 수가 max_chunks를 넘으면 공격 의심 chunk -> 첫 chunk -> 나머지 고르게 순으로 max_chunks개만 분류
+- 판정 병합: 가장 심각한 판정 (공격 > Normal, 같은 등급이면 확신도 높은 쪽)
+  공격이 없고 실패(fail_open)한 chunk가 있으면 fail_open (다음에 다시 분류되도록)
+  공격이 없고 max_chunks 초과로 건너뛴 chunk가 있으면 Normal이되 confidence low
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List
+
+from payload_compaction import SUSPICIOUS_RE
+from session_state import verdict_rank
+
+
+def select_chunks(chunks: List[str], max_chunks: int) -> List[int]:
+    """분류할 chunk 인덱스 (원래 순서로 정렬)"""
+    n = len(chunks)
+    if n <= max_chunks:
+        return list(range(n))
+
+    picked: List[int] = []
+    for i, c in enumerate(chunks):
+        if len(picked) < max_chunks and SUSPICIOUS_RE.search(c):
+            picked.append(i)
+    if len(picked) < max_chunks and 0 not in picked:
+        picked.append(0)
+
+    # 남은 자리는 전체 구간에 고르게 (구간마다 가운데 chunk -> 이미 고른 첫 chunk 바로 옆이나 끝을 놓치지 않도록)
+    rest = [i for i in range(n) if i not in picked]
+    need = max_chunks - len(picked)
+    if need > 0 and rest:
+        stride = len(rest) / need
+        picked.extend(rest[int((k + 0.5) * stride)] for k in range(need))
+    return sorted(set(picked))
+
+
+class ChunkedClassifier:
+    """chunk들을 predict(chunk) -> 결과 dict(source 포함) 코루틴으로 병렬 분류하고 병합"""
+
+    def __init__(self, max_chunks: int = 8) -> None:
+        self.max_chunks = max(1, int(max_chunks))
+
+        self.requests = 0
+        self.chunks_total = 0
+        self.chunks_classified = 0
+        self.chunks_skipped = 0  # max_chunks 초과로 분류하지 않은 chunk
+        self.early_stops = 0
+        self.unconfirmed = 0  # 공격 없음 + 분류하지 않은 chunk가 있어 low로 낮춘 Normal
+
+    @staticmethod
+    def _is_decisive(result: Dict[str, Any]) -> bool:
+        return (
+            result.get("source") != "fail_open"
+            and not str(result.get("classification", "Normal")).startswith("Normal")
+            and result.get("confidence") == "high"
+        )
+
+    async def classify(
+        self, chunks: List[str], predict: Callable[[str], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        selected = select_chunks(chunks, self.max_chunks)
+        self.requests += 1
+        self.chunks_total += len(chunks)
+        self.chunks_skipped += len(chunks) - len(selected)
+
+        tasks = {asyncio.ensure_future(predict(chunks[i])): i for i in selected}
+        done: List[Dict[str, Any]] = []
+        error = None
+        try:
+            for fut in asyncio.as_completed(list(tasks)):
+                try:
+                    result = await fut
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    # deadline / overload 등: 다른 chunk 결과가 없으면 그대로 전달
+                    error = error or e
+                    continue
+                done.append(result)
+                if self._is_decisive(result):
+                    self.early_stops += 1
+                    break
+        finally:
+            for t in tasks:
+                if not t.done():
+                    t.cancel()
+        self.chunks_classified += len(done)
+
+        if not done:
+            raise error if error is not None else RuntimeError("no chunk classified")
+
+        ok = [r for r in done if r.get("source") != "fail_open"]
+        attacks = [r for r in ok if verdict_rank(r)[0]]
+        if attacks:
+            merged = max(attacks, key=verdict_rank)
+        elif len(ok) < len(selected):
+            # 공격은 못 찾았지만 분류 못 한 chunk가 있음 -> 정상으로 확정하지 않음
+            merged = next((r for r in done if r.get("source") == "fail_open"), None) or dict(
+                done[0], source="fail_open", hf_error="chunk not classified", hf_error_kind="partial"
+            )
+        elif len(selected) < len(chunks):
+            # 공격은 없지만 max_chunks 초과로 아예 보지 않은 chunk가 있음 -> Normal이되 확신도 low
+            # (fail_open으로 두면 재시도해도 같은 chunk만 골라 영원히 확정되지 않으므로)
+            self.unconfirmed += 1
+            merged = dict(max(ok, key=verdict_rank), confidence="low")
+        else:
+            merged = max(ok, key=verdict_rank)
+
+        out = dict(merged)
+        out["chunks"] = len(chunks)
+        out["chunks_classified"] = len(done)
+        return out
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_chunks": self.max_chunks,
+            "requests": self.requests,
+            "chunks_total": self.chunks_total,
+            "chunks_classified": self.chunks_classified,
+            "chunks_skipped": self.chunks_skipped,
+            "early_stops": self.early_stops,
+            "unconfirmed": self.unconfirmed,
+        }
@@ -0,0 +1,394 @@
+# classify_worker.py
+"""
+Postgres RawLog pull 방식 분류 워커 (sessionizing.js 대체, replica 여러 개를 함께 띄울 수 있음)
+
+- claim 루프 CLAIM_LOOPS 개가 각자 DB 연결 하나로 반복:
+  1) 짧은 트랜잭션: ModSecurity 통과 + 미분류(sessionId IS NULL) + lease 없는(또는 만료된) RawLog를
+     FOR UPDATE SKIP LOCKED로 BATCH_SIZE개 골라 classify_claimed_at(lease)을 찍고 바로 commit
+     -> 다른 replica/루프는 lease가 있는 행을 건너뜀. 워커가 죽으면 CLAIM_LEASE_S 뒤 다시 잡힘
+  2) 트랜잭션 밖에서 fast-path 후 MistralClassifier로 동시에 분류 (CLASSIFY_CONCURRENCY, HF_BATCH_MAX_SIZE)
+     -> HF 호출/재시도/속도 제한 대기 동안 행 lock이나 열린 트랜잭션을 쥐고 있지 않음
+  3) 짧은 트랜잭션: Session upsert + RawLog.sessionId 기록 (문장 2개, 행마다 왕복하지 않음)
+     + fail-open 행의 lease 반납과 실패 횟수 증가
+- HF 장애로 만든 대체 결과(fail-open)는 기록하지 않음 -> 다음 claim에서 재시도
+  - 배치 전체가 fail-open이면 RETRY_BACKOFF_S 동안 쉼 (장애 중 같은 행을 계속 다시 잡지 않도록)
+  - 행별 연속 fail-open 횟수는 RawLog.classify_fail_open에 저장 (replica가 여러 개여도 같은 값)
+    MAX_FAIL_OPEN 번이 되면 sessionizing.js의 영구 실패처럼 휴리스틱으로 확정
+- 라벨/신뢰도 변환은 sessionizing.js(toSessionLabelEnum / toConfidenceEnum)와 같음
+- HF_RATE_LIMIT_RPS를 설정하면 서버와 같은 SHARED_STATE_DIR/ratelimit.db 속도 제한을 함께 씀
+
+실행: python classify_worker.py [--once]   (--once: 밀린 로그를 다 처리하면 종료)
+"""
+
+import argparse
+import asyncio
+import os
+import re
+import signal
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import psycopg
+from psycopg.rows import dict_row
+
+from fast_path import FastPathRouter
+from model_inference import MistralClassifier
+from shared_limiter import SharedTokenBucket
+
+BATCH_SIZE_DEFAULT = "64"  # claim 1회에 잡는 RawLog 수
+CLAIM_LOOPS_DEFAULT = "4"  # replica 하나에서 동시에 돌리는 claim 루프(= DB 연결) 수
+CLASSIFY_CONCURRENCY_DEFAULT = "8"  # replica 하나에서 동시에 진행할 HF 호출 수
+HF_BATCH_MAX_SIZE_DEFAULT = "1"  # HF Endpoint 1회 호출에 묶을 최대 프롬프트 수
+POLL_INTERVAL_S_DEFAULT = "2"  # 미분류 로그가 없을 때 다시 확인하는 간격(초)
+RETRY_BACKOFF_S_DEFAULT = "10"  # 배치 전체가 fail-open이거나 DB 오류일 때 쉬는 시간(초)
+MAX_FAIL_OPEN_DEFAULT = "5"  # 같은 행이 이 횟수만큼 fail-open이면 휴리스틱으로 확정
+CLAIM_LEASE_S_DEFAULT = "600"  # claim한 행을 다른 워커가 가져가지 못하는 시간(초, 배치 분류 시간보다 길게)
+MAX_BODY_CHARS_DEFAULT = "300"  # sessionizing.js와 같은 본문 길이 제한
+# server.py와 같은 공유 상태 위치 (비우면 사용자 state 디렉터리, 실행한 디렉터리가 아님)
+SHARED_STATE_DIR_DEFAULT = os.path.join(os.getenv("XDG_STATE_HOME") or os.path.expanduser("~/.local/state"), "elk-llm")
+
+# sessionizing.js와 같은 "ModSecurity 통과" 조건 + lease가 없거나 만료된 행만
+CLAIM_SQL = """
+UPDATE "RawLog" r SET classify_claimed_at = now()
+FROM (
+  SELECT c.id
+  FROM "RawLog" c
+  WHERE c."sessionId" IS NULL
+    AND (c.classify_claimed_at IS NULL OR c.classify_claimed_at < now() - make_interval(secs => %s))
+    AND COALESCE((c.full_log->'audit_data'->'action'->>'intercepted')::boolean, false) = false
+    AND COALESCE((c.full_log->'response'->>'status')::int, 200) NOT IN (403, 406)
+    AND NOT (c.full_log::text ILIKE '%%access denied with code%%')
+  ORDER BY c.id ASC
+  LIMIT %s
+  FOR UPDATE SKIP LOCKED
+) picked
+WHERE r.id = picked.id
+RETURNING
+  r.id,
+  r.timestamp,
+  r.remote_host,
+  r.user_agent,
+  r.method,
+  r.uri,
+  r.request_body,
+  r.full_log->'response'->>'status' AS status,
+  r.classify_fail_open
+"""
+
+UPSERT_SESSIONS_SQL = """
+INSERT INTO "Session" (
+  session_id, ip_address, user_agent, start_time, end_time,
+  label, confidence, classifier_raw, classification
+)
+SELECT
+  s.session_id, s.ip, s.ua, s.t, s.t,
+  s.label::"SessionLabel", s.confidence::"ConfidenceLevel", s.raw, s.classification
+FROM unnest(
+  %s::text[], %s::text[], %s::text[], %s::timestamp[], %s::text[], %s::text[], %s::text[], %s::text[]
+) AS s(session_id, ip, ua, t, label, confidence, raw, classification)
+ON CONFLICT (session_id) DO UPDATE SET
+  ip_address = EXCLUDED.ip_address,
+  user_agent = EXCLUDED.user_agent,
+  start_time = EXCLUDED.start_time,
+  end_time = EXCLUDED.end_time,
+  label = EXCLUDED.label,
+  confidence = EXCLUDED.confidence,
+  classifier_raw = EXCLUDED.classifier_raw,
+  classification = EXCLUDED.classification
+RETURNING id, session_id
+"""
+
+LINK_RAWLOGS_SQL = """
+UPDATE "RawLog" r SET "sessionId" = v.sid, classify_claimed_at = NULL
+FROM unnest(%s::int[], %s::int[]) AS v(rid, sid)
+WHERE r.id = v.rid
+"""
+
+# fail-open 행: lease를 풀어 다음 claim에서 다시 잡히게 하고 연속 실패 횟수 +1
+RELEASE_FAILED_SQL = """
+UPDATE "RawLog" SET classify_claimed_at = NULL, classify_fail_open = classify_fail_open + 1
+WHERE id = ANY(%s::int[])
+"""
+
+# 분류 중 예외: 실패 횟수는 그대로 두고 lease만 반납
+RELEASE_SQL = """
+UPDATE "RawLog" SET classify_claimed_at = NULL WHERE id = ANY(%s::int[])
+"""
+
+# Prisma 전용 URL 파라미터 (libpq가 모르는 값)
+PRISMA_URL_PARAMS = {"schema", "pgbouncer", "connection_limit", "pool_timeout", "statement_cache_size"}
+
+
+# ===== label/conf normalize (sessionizing.js와 같음) =====
+def to_session_label(raw: Any) -> str:
+    s = str(raw or "").strip().lower()
+    if s.startswith("normal") or "benign" in s:
+        return "NORMAL"
+    if "sql" in s:
+        return "SQL_INJECTION"
+    if "code" in s:
+        return "CODE_INJECTION"
+    if "path" in s or "traversal" in s:
+        return "PATH_TRAVERSAL"
+    return "MALICIOUS"
+
+
+def to_confidence(raw: Any) -> str:
+    s = str(raw or "").strip().lower()
+    return "HIGH" if s == "high" else "LOW"  # medium / low / 없음 -> LOW
+
+
+_SQLI_RE = re.compile(r"('|%27|--|\bunion\b|\bselect\b|\bdrop\b|\binsert\b|\border by\b)", re.I)
+_XSS_RE = re.compile(r"(<script|onerror=|onload=|<img|<iframe|javascript:)", re.I)
+
+
+def heuristic_label(texts: List[str]) -> str:
+    """(백업) 같은 행이 계속 fail-open일 때만 사용 (sessionizing.js heuristicLabel)"""
+    text = " ".join(texts).lower()
+    if _SQLI_RE.search(text):
+        return "SQL_INJECTION"
+    if _XSS_RE.search(text):
+        return "CODE_INJECTION"
+    return "NORMAL"
+
+
+def pg_dsn(url: str) -> str:
+    """Prisma용 DATABASE_URL에서 libpq가 모르는 파라미터(schema 등)를 제거"""
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query) if k not in PRISMA_URL_PARAMS]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+class ClassifyWorker:
+    def __init__(self, clf: MistralClassifier, dsn: str) -> None:
+        self.clf = clf
+        self.dsn = dsn
+        self.router = FastPathRouter()
+
+        self.batch_size = max(1, int(os.getenv("BATCH_SIZE", BATCH_SIZE_DEFAULT)))
+        self.claim_loops = max(1, int(os.getenv("CLAIM_LOOPS", CLAIM_LOOPS_DEFAULT)))
+        self.hf_batch = max(1, int(os.getenv("HF_BATCH_MAX_SIZE", HF_BATCH_MAX_SIZE_DEFAULT)))
+        self.poll_s = float(os.getenv("POLL_INTERVAL_S", POLL_INTERVAL_S_DEFAULT))
+        self.backoff_s = float(os.getenv("RETRY_BACKOFF_S", RETRY_BACKOFF_S_DEFAULT))
+        self.max_fail_open = int(os.getenv("MAX_FAIL_OPEN", MAX_FAIL_OPEN_DEFAULT))
+        self.lease_s = float(os.getenv("CLAIM_LEASE_S", CLAIM_LEASE_S_DEFAULT))
+        self.max_body = int(os.getenv("MAX_BODY_CHARS", MAX_BODY_CHARS_DEFAULT))
+        self._hf_slots = asyncio.Semaphore(
+            max(1, int(os.getenv("CLASSIFY_CONCURRENCY", CLASSIFY_CONCURRENCY_DEFAULT)))
+        )
+
+        rps = float(os.getenv("HF_RATE_LIMIT_RPS", "0"))
+        self.ratelimit: Optional[SharedTokenBucket] = None
+        if rps > 0:
+            self.ratelimit = SharedTokenBucket(
+                os.path.join(os.getenv("SHARED_STATE_DIR") or SHARED_STATE_DIR_DEFAULT, "ratelimit.db"),
+                rate=rps,
+                burst=float(os.getenv("HF_RATE_LIMIT_BURST", "0")),
+            )
+
+        self._stop = asyncio.Event()
+
+        self.claimed = 0
+        self.written = 0
+        self.retried = 0
+        self.fast_path = 0
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    # ===== 분류 =====
+    def _fields(self, row: Dict[str, Any]) -> Tuple[str, str, str, Optional[int]]:
+        method = (row["method"] or "")[:16].strip() or "GET"
+        path = (row["uri"] or "/")[:2048].strip() or "/"
+        body = (row["request_body"] or "")[: self.max_body]
+        try:
+            status = int(row["status"]) if row["status"] is not None else None
+        except ValueError:
+            status = None
+        return method, path, body, status
+
+    async def _predict(self, prompts: List[str]) -> List[Dict[str, Any]]:
+        async with self._hf_slots:
+            if self.ratelimit is not None:
+                wait = await asyncio.to_thread(self.ratelimit.reserve)
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            return await self.clf.apredict_prompts(prompts)
+
+    async def classify_rows(self, rows: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        """행별 판정 (None = fail-open, 이번에는 기록하지 않음)"""
+        results: List[Optional[Dict[str, Any]]] = [None] * len(rows)
+        todo: List[Tuple[int, str]] = []
+        for i, row in enumerate(rows):
+            method, path, body, status = self._fields(row)
+            local = self.router.route(method, path, body, status)
+            if local is not None:
+                self.fast_path += 1
+                results[i] = local
+            else:
+                todo.append((i, self.clf.build_prompt(method, path, body)))
+
+        chunks = [todo[k : k + self.hf_batch] for k in range(0, len(todo), self.hf_batch)]
+        outs = await asyncio.gather(*(self._predict([p for _, p in chunk]) for chunk in chunks))
+        for chunk, out in zip(chunks, outs):
+            for (i, _), res in zip(chunk, out):
+                results[i] = self._settle(rows[i], res)
+        return results
+
+    def _settle(self, row: Dict[str, Any], res: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """row["classify_fail_open"]: 이전 claim들까지의 연속 fail-open 횟수 (DB에 저장된 값)"""
+        if "hf_error" not in res:
+            return res
+        if (row.get("classify_fail_open") or 0) + 1 < self.max_fail_open:
+            return None
+        # 계속 실패하는 행이 큐 앞을 막지 않도록 휴리스틱으로 확정
+        return {
+            "label": heuristic_label([f"{row['method'] or ''} {row['uri'] or ''}", (row["request_body"] or "")[:500]]),
+            "confidence": "low",
+            "raw_response": None,
+            "classification": None,
+        }
+
+    # ===== DB =====
+    async def _write(self, cur: psycopg.AsyncCursor, rows: List[Dict[str, Any]], results: List[Dict[str, Any]]) -> None:
+        cols: Tuple[List[Any], ...] = tuple([] for _ in range(8))
+        for row, res in zip(rows, results):
+            values = (
+                f"log|{row['id']}",
+                row["remote_host"],
+                (row["user_agent"] or None),
+                row["timestamp"],
+                res.get("label") or to_session_label(res.get("classification")),
+                to_confidence(res.get("confidence")),
+                res.get("raw_response"),
+                res.get("classification"),
+            )
+            for col, v in zip(cols, values):
+                col.append(v)
+
+        await cur.execute(UPSERT_SESSIONS_SQL, cols)
+        session_ids = {r["session_id"]: r["id"] for r in await cur.fetchall()}
+        await cur.execute(
+            LINK_RAWLOGS_SQL,
+            ([row["id"] for row in rows], [session_ids[f"log|{row['id']}"] for row in rows]),
+        )
+
+    async def claim(self, conn: psycopg.AsyncConnection) -> List[Dict[str, Any]]:
+        """lease를 찍고 바로 commit (분류하는 동안 트랜잭션/행 lock을 쥐지 않음)"""
+        async with conn.transaction():
+            cur = conn.cursor(row_factory=dict_row)
+            await cur.execute(CLAIM_SQL, (self.lease_s, self.batch_size))
+            rows = await cur.fetchall()
+        return sorted(rows, key=lambda r: r["id"])
+
+    async def run_batch(self, conn: psycopg.AsyncConnection) -> Tuple[int, int]:
+        """claim -> 분류 -> 기록 한 번 (잡은 행 수, 기록한 행 수)"""
+        rows = await self.claim(conn)
+        if not rows:
+            return 0, 0
+
+        try:
+            results = await self.classify_rows(rows)
+        except BaseException:
+            # 다른 워커가 lease 만료까지 기다리지 않고 바로 가져가도록 (반납 실패는 lease 만료로 해결)
+            try:
+                async with conn.transaction():
+                    await conn.execute(RELEASE_SQL, ([row["id"] for row in rows],))
+            except Exception:
+                pass
+            raise
+
+        done = [(row, res) for row, res in zip(rows, results) if res is not None]
+        failed = [row["id"] for row, res in zip(rows, results) if res is None]
+        async with conn.transaction():
+            cur = conn.cursor(row_factory=dict_row)
+            if done:
+                await self._write(cur, [r for r, _ in done], [res for _, res in done])
+            if failed:
+                await cur.execute(RELEASE_FAILED_SQL, (failed,))
+
+        self.claimed += len(rows)
+        self.written += len(done)
+        self.retried += len(rows) - len(done)
+        return len(rows), len(done)
+
+    async def claim_loop(self, n: int, once: bool) -> None:
+        conn: Optional[psycopg.AsyncConnection] = None
+        while not self._stop.is_set():
+            try:
+                if conn is None or conn.closed:
+                    # autocommit: 모든 문장은 명시적인 짧은 transaction() 안에서만 (암묵적 idle in transaction 방지)
+                    conn = await psycopg.AsyncConnection.connect(self.dsn, autocommit=True)
+                t0 = time.perf_counter()
+                claimed, written = await self.run_batch(conn)
+            except Exception as e:
+                print(f"[worker:{n}] batch failed:", e)
+                if conn is not None:
+                    await conn.close()
+                    conn = None
+                await self._sleep(self.backoff_s)
+                continue
+
+            if claimed == 0:
+                if once:
+                    break
+                await self._sleep(self.poll_s)
+            elif written == 0:
+                print(f"[worker:{n}] all {claimed} rows fail-open, backing off {self.backoff_s}s")
+                await self._sleep(self.backoff_s)
+            else:
+                print(
+                    f"[worker:{n}] claimed={claimed} written={written} "
+                    f"took={(time.perf_counter() - t0) * 1000.0:.0f}ms"
+                )
+
+        if conn is not None:
+            await conn.close()
+
+    async def _sleep(self, seconds: float) -> None:
+        try:
+            await asyncio.wait_for(self._stop.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def run(self, once: bool = False) -> None:
+        await asyncio.gather(*(self.claim_loop(n, once) for n in range(self.claim_loops)))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "claimed": self.claimed,
+            "written": self.written,
+            "retried": self.retried,
+            "fast_path": self.fast_path,
+            "ratelimit": self.ratelimit.stats() if self.ratelimit else None,
+        }
+
+
+async def main(once: bool) -> None:
+    db_url = os.getenv("DATABASE_URL")
+    if not db_url:
+        raise RuntimeError("DATABASE_URL is not set")
+
+    clf = MistralClassifier()
+    if not clf.load_model():
+        raise RuntimeError("classifier is not configured (HF_ENDPOINT_URL / HF_API_KEY)")
+
+    worker = ClassifyWorker(clf, pg_dsn(db_url))
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        # 진행 중인 배치는 마저 기록하고 종료 (강제 종료되면 CLAIM_LEASE_S 뒤 다른 replica가 가져감)
+        loop.add_signal_handler(sig, worker.stop)
+
+    print(f"[worker] start: claim_loops={worker.claim_loops} batch_size={worker.batch_size} once={once}")
+    try:
+        await worker.run(once=once)
+    finally:
+        await clf.aclose()
+        print("[worker] done:", worker.stats())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="RawLog pull-mode classification worker")
+    parser.add_argument("--once", action="store_true", help="exit when there are no unclassified rows left")
+    asyncio.run(main(parser.parse_args().once))
@@ -0,0 +1,173 @@
+# endpoints.py
+"""
+여러 HF Inference Endpoint(리전별 replica 등)에 대한 부하 분산 (스레드 안전)
+
+- HF_ENDPOINT_URLS: "url|weight,url|weight" (weight 생략 시 1). 없으면 HF_ENDPOINT_URL 하나
+- HF_LB_STRATEGY:
+  - least_outstanding: (처리 중 요청 수 + 1) / weight 가 가장 작은 Endpoint
+  - ewma:              지연 EWMA x (처리 중 요청 수 + 1) / weight 가 가장 작은 Endpoint
+- Endpoint마다 circuit breaker를 따로 두어 연속 실패한 Endpoint는 cooldown 동안 제외(ejection)
+"""
+
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from resilience import CircuitBreaker
+
+LB_STRATEGIES = ("least_outstanding", "ewma")
+
+
+def parse_endpoint_urls(spec: str) -> List[Tuple[str, float]]:
+    """'url|weight,url' -> [(url, weight), ...]"""
+    out = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        url, _, weight = part.partition("|")
+        try:
+            w = float(weight) if weight.strip() else 1.0
+        except ValueError:
+            raise RuntimeError(f"invalid endpoint weight: {part!r}")
+        if w <= 0:
+            raise RuntimeError(f"endpoint weight must be > 0: {part!r}")
+        out.append((url.strip(), w))
+    return out
+
+
+class Endpoint:
+    """Endpoint 하나의 상태 (처리 중 요청 수, 지연 EWMA, breaker, 통계)"""
+
+    def __init__(
+        self,
+        url: str,
+        name: str,
+        weight: float = 1.0,
+        failure_threshold: int = 5,
+        cooldown_s: float = 15.0,
+        ewma_alpha: float = 0.3,
+    ) -> None:
+        self.url = url
+        self.name = name
+        self.weight = float(weight)
+        self.breaker = CircuitBreaker(failure_threshold=failure_threshold, cooldown_s=cooldown_s)
+        self.ewma_alpha = float(ewma_alpha)
+        self.ewma_s: Optional[float] = None
+        self.outstanding = 0
+        self._lock = threading.Lock()
+
+        self.requests = 0
+        self.failures = 0
+
+    def begin(self) -> float:
+        with self._lock:
+            self.outstanding += 1
+            self.requests += 1
+        return time.perf_counter()
+
+    def end(self, t0: float, ok: Optional[bool], retryable: bool = True) -> None:
+        """
+        ok=True: 성공 / ok=False: 실패 / ok=None: 결과 없음 (hedge 취소)
+        재시도 불가 오류(4xx 등)는 Endpoint 자체는 살아있는 것이므로 breaker에 실패로 반영하지 않음
+        """
+        elapsed = time.perf_counter() - t0
+        with self._lock:
+            self.outstanding -= 1
+            # 실패는 지연 EWMA에 넣지 않음 (connection refused처럼 빨리 실패하는 Endpoint가 빠르게 보이지 않도록)
+            if ok:
+                a = self.ewma_alpha
+                self.ewma_s = elapsed if self.ewma_s is None else (1 - a) * self.ewma_s + a * elapsed
+            if ok is False:
+                self.failures += 1
+
+        if ok is None:
+            self.breaker.release_probe()
+        elif ok or not retryable:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+
+    def stats(self) -> Dict[str, Any]:
+        b = self.breaker.stats()
+        return {
+            "name": self.name,
+            "url": self.url,
+            "weight": self.weight,
+            "state": b["state"],
+            "outstanding": self.outstanding,
+            "ewma_ms": round(self.ewma_s * 1000.0, 1) if self.ewma_s is not None else None,
+            "requests": self.requests,
+            "failures": self.failures,
+            "opens": b["opens"],
+            "short_circuited": b["short_circuited"],
+        }
+
+
+class EndpointPool:
+    """Endpoint 선택기. pick()이 None이면 모든 Endpoint가 차단(open) 상태"""
+
+    def __init__(self, endpoints: List[Endpoint], strategy: str = "least_outstanding") -> None:
+        if not endpoints:
+            raise RuntimeError("no HF endpoints configured")
+        if strategy not in LB_STRATEGIES:
+            raise RuntimeError(f"HF_LB_STRATEGY must be one of {LB_STRATEGIES}: {strategy!r}")
+        self.endpoints = endpoints
+        self.strategy = strategy
+
+    @classmethod
+    def from_env(cls, failure_threshold: int, cooldown_s: float) -> "EndpointPool":
+        spec = os.getenv("HF_ENDPOINT_URLS") or os.getenv("HF_ENDPOINT_URL") or ""
+        urls = parse_endpoint_urls(spec)
+        if not urls:
+            raise RuntimeError("HF_ENDPOINT_URL is not set")
+
+        # 지표 라벨용 이름: 호스트명 (같은 호스트가 여러 개면 순번을 붙임)
+        hosts = [urlparse(u).netloc or u for u, _ in urls]
+        endpoints = [
+            Endpoint(
+                url=u,
+                name=h if hosts.count(h) == 1 else f"{h}#{i}",
+                weight=w,
+                failure_threshold=failure_threshold,
+                cooldown_s=cooldown_s,
+            )
+            for i, ((u, w), h) in enumerate(zip(urls, hosts))
+        ]
+        return cls(endpoints, strategy=os.getenv("HF_LB_STRATEGY", "least_outstanding"))
+
+    @property
+    def primary(self) -> Endpoint:
+        return self.endpoints[0]
+
+    def _score(self, ep: Endpoint, default_ewma: float) -> float:
+        load = (ep.outstanding + 1) / ep.weight
+        if self.strategy == "ewma":
+            # 아직 지연 기록이 없는 Endpoint는 가장 빠른 쪽과 같다고 보고 한 번은 받게 함
+            return load * (ep.ewma_s if ep.ewma_s is not None else default_ewma)
+        return load
+
+    def pick(self, exclude: Iterable[Endpoint] = ()) -> Optional[Endpoint]:
+        """
+        점수가 낮은 순서로 breaker가 허용하는 Endpoint 하나를 선택.
+        exclude(이번 요청에서 이미 실패/사용한 Endpoint)는 다른 후보가 없을 때만 사용.
+        """
+        excluded = set(exclude)
+        known = [e.ewma_s for e in self.endpoints if e.ewma_s is not None]
+        default_ewma = min(known) if known else 1.0
+
+        # 동점이면 무작위 (같은 Endpoint로 몰리지 않도록)
+        ranked = sorted(
+            self.endpoints,
+            key=lambda e: (e in excluded, self._score(e, default_ewma), random.random()),
+        )
+        for ep in ranked:
+            if ep.breaker.state != CircuitBreaker.OPEN and ep.breaker.allow():
+                return ep
+        return None
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [e.stats() for e in self.endpoints]
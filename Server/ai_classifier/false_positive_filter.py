@@ -12,75 +12,420 @@ Conservative False Positive Filter
 논리:
 - 공격 페이로드가 있어도 404 응답을 받았다면 실제 위협이 성공하지 않음
   → Normal로 처리 (결과적으로 무해)
+
+매칭 방식:
+- 화이트리스트 정규식마다 반드시 들어 있어야 하는 리터럴 조각을 뽑아 두고,
+  요청 경로를 한 번 훑어 조각이 나온 정규식만 확인 (패턴이 수백 개여도 대부분의 요청은 한 번 훑기로 끝남)
+- 공격 지표(리터럴)도 하나의 automaton으로 한 번에 검사
+- 리터럴 검사는 pyahocorasick이 있으면 Aho-Corasick, 없으면 리터럴 trie를 컴파일한 정규식
+- 어떤 패턴이 걸렸는지 explain() / stats()로 확인 가능
+- 패턴 목록은 설정 파일(JSON, FP_FILTER_PATTERNS)로 추가/교체 가능
 """
 
+import json
+import os
 import re
+import unicodedata
 import urllib.parse
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    import ahocorasick  # pyahocorasick (C 구현 Aho-Corasick)
+except ImportError:  # 없으면 trie 정규식으로 대체
+    ahocorasick = None
+
+FP_FILTER_PATTERNS_DEFAULT = ""
+
+# 화이트리스트: 정상으로 처리할 패턴 (이름, 정규식) — re.IGNORECASE, path 어디든 search
+DEFAULT_SAFE_PATTERNS: List[Tuple[str, str]] = [
+    # SSRF 시도 (테스트 도메인, 공격은 아님)
+    ("ssrf_owasp_test_domain", r'8501779237819759495\.owasp\.org'),
+
+    # 경로 구분자 혼용 (이상하지만 공격은 아님)
+    ("encoded_drive_slash", r'c%3[Aa]%2[Ff]'),          # c://
+    ("encoded_triple_slash", r'%2[Ff]%2[Ff]%2[Ff]'),    # ///
+    ("encoded_double_backslash", r'%5[Cc]%5[Cc]'),      # \\
+
+    # 이상한 경로
+    ("probe_nonexistent_path", r'^/thishouldnotexist'),
+    ("encoded_pipe_segment", r'^/%7[Cc]/'),              # /|/
+    ("pipe_segment", r'/\|/'),                           # /|/
+
+    # 템플릿 변수
+    ("template_data_model", r'\{\{\s*data\.model'),
+    ("template_data_url", r'\{\{\s*data\.url'),
+
+    # 정상 파일 확장자
+    ("tar_file", r'\.tar$'),
+    ("tmp_file", r'\.tmp$'),
+
+    # 외부 도메인 + feed
+    ("google_feed", r'google\.com.*\/feed'),
+    ("external_feed", r'www\.[a-z]+\.com.*\/feed'),
+]
+
+# 명백한 공격 페이로드 (URL 디코딩한 path에서 대소문자 구분해 검사)
+DEFAULT_ATTACK_INDICATORS: List[str] = [
+    'etc/passwd',
+    'sleep(',
+    'sleep+',
+    'cat+',
+    '<script>',
+    'alert(',
+    '<!--#EXEC',
+    'UNION+SELECT',
+]
+
+_QUANTIFIER_RE = re.compile(r"\{(?:\d+(?:,\d*)?|,\d+)\}")
+# 정규식 escape 하나 (re 모듈과 같은 규칙: \0.. / 세 자리 8진수는 문자, 그 외 숫자 1~2개는 backreference)
+_ESCAPE_RE = re.compile(r"\\(x[0-9A-Fa-f]{2}|u[0-9A-Fa-f]{4}|U[0-9A-Fa-f]{8}|N\{[^}]*\}|0[0-7]{0,2}|[0-7]{3}|\d{1,2}|.)", re.S)
+
+
+def _escape_char(body: str) -> Optional[str]:
+    r"""escape 본문(\ 뒤) -> 그 escape가 뜻하는 리터럴 문자 (\d, \b, backreference처럼 리터럴이 아니면 None)"""
+    head = body[0]
+    if not head.isalnum():
+        return head
+    if head in "xuU":
+        return chr(int(body[1:], 16))
+    if head == "N":
+        try:
+            return unicodedata.lookup(body[2:-1])
+        except KeyError:
+            return None
+    if body.isdigit() and (head == "0" or len(body) == 3):
+        return chr(int(body, 8))
+    return None
+
+
+@lru_cache(maxsize=4096)
+def _unquote(path: str) -> str:
+    # fast-path와 apply()가 같은 path를 연달아 디코딩하므로 최근 결과를 재사용
+    return urllib.parse.unquote(path)
+
+
+def required_literal(pattern: str) -> str:
+    r"""
+    정규식이 매칭되려면 반드시 들어 있어야 하는 가장 긴 리터럴 조각 (2글자 미만이거나 못 찾으면 "")
+
+    최상위 문자열만 보고, 그룹/문자 클래스/선택적 수량자가 붙은 글자는 조각에서 뺌 (애매하면 버리는 쪽)
+    예) r'\{\{\s*data\.model' -> "data.model", r'c%3[Aa]%2[Ff]' -> "c%3"
+    """
+    if re.compile(pattern).flags & re.VERBOSE:
+        return ""
+
+    runs: List[str] = []
+    cur: List[str] = []
+    last_literal = False  # 직전 원자가 cur에 들어간 리터럴 글자인지 (수량자 처리용)
+    depth = 0
+    i, n = 0, len(pattern)
+
+    def cut() -> None:
+        nonlocal last_literal
+        if cur:
+            runs.append("".join(cur))
+            cur.clear()
+        last_literal = False
+
+    while i < n:
+        ch = pattern[i]
+
+        if ch == "\\" and i + 1 < n:
+            m = _ESCAPE_RE.match(pattern, i)
+            i = m.end()
+            if depth == 0:
+                lit = _escape_char(m.group(1))
+                if lit is None:
+                    cut()  # \d, \s, \b, \1 ... 리터럴 아님
+                else:
+                    cur.append(lit)  # \. \x2f \101 \N{SOLIDUS} ... 그 문자
+                    last_literal = True
+            continue
+
+        if ch == "[":
+            # 문자 클래스는 통째로 건너뜀 ([]...], [^]...] 포함)
+            i += 1
+            if i < n and pattern[i] == "^":
+                i += 1
+            if i < n and pattern[i] == "]":
+                i += 1
+            while i < n and pattern[i] != "]":
+                i += 2 if pattern[i] == "\\" else 1
+            i += 1
+            if depth == 0:
+                cut()
+            continue
+
+        if ch == "(":
+            if depth == 0:
+                cut()
+            depth += 1
+        elif ch == ")":
+            depth = max(0, depth - 1)
+        elif depth > 0:
+            pass
+        elif ch == "|":
+            return ""  # 최상위 선택: 어느 쪽도 반드시 나온다고 할 수 없음
+        elif ch in "?*" or (ch == "{" and _QUANTIFIER_RE.match(pattern, i)):
+            # 앞 글자가 없어도 되는 수량자 -> 그 글자는 조각에서 제외
+            if last_literal:
+                cur.pop()
+            cut()
+            if ch == "{":
+                i = _QUANTIFIER_RE.match(pattern, i).end()
+                continue
+        elif ch in "+.^$":
+            cut()
+        else:
+            cur.append(ch)
+            last_literal = True
+        i += 1
+
+    cut()
+    best = max(runs, key=len, default="")
+    return best if len(best) >= 2 else ""
+
+
+def _trie_regex(literals: Iterable[str]) -> str:
+    """리터럴 목록 -> 접두사를 공유하는 정규식 (같은 위치에서는 가장 긴 리터럴을 먼저 시도)"""
+    trie: Dict[str, Any] = {}
+    for lit in literals:
+        node = trie
+        for ch in lit:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node: Dict[str, Any]) -> str:
+        alts = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        return "(?:" + body + ")?" if "" in node else body
+
+    return build(trie)
+
+
+class LiteralMatcher:
+    """
+    리터럴 여러 개를 텍스트 한 번 훑기로 찾음 (대소문자 구분, 필요하면 호출자가 casefold)
+
+    - pyahocorasick이 있으면 Aho-Corasick automaton
+    - 없으면 리터럴 trie를 정규식으로 컴파일 (위치당 비용이 리터럴 수가 아니라 trie 깊이에 비례)
+    """
+
+    def __init__(self, literals: Iterable[str]) -> None:
+        self.literals = sorted({lit for lit in literals if lit})
+        self._automaton = None
+        self._regex: Optional[re.Pattern] = None
+        self._prefixes: Dict[str, List[str]] = {}
+
+        if not self.literals:
+            self.backend = "none"
+        elif ahocorasick is not None:
+            automaton = ahocorasick.Automaton()
+            for lit in self.literals:
+                automaton.add_word(lit, lit)
+            automaton.make_automaton()
+            self._automaton = automaton
+            self.backend = "aho-corasick"
+        else:
+            # lookahead로 모든 시작 위치를 검사 (겹치는 리터럴도 찾음)
+            self._regex = re.compile("(?=(" + _trie_regex(self.literals) + "))")
+            # 한 위치에서는 가장 긴 리터럴만 잡히므로, 같은 위치에서 시작하는 더 짧은 리터럴(접두사)도 함께 보고
+            known = set(self.literals)
+            self._prefixes = {
+                lit: [lit[:k] for k in range(1, len(lit) + 1) if lit[:k] in known] for lit in self.literals
+            }
+            self.backend = "trie-regex"
+
+    def first(self, text: str) -> Optional[str]:
+        """text에 들어 있는 리터럴 하나 (없으면 None)"""
+        if self._automaton is not None:
+            for _, lit in self._automaton.iter(text):
+                return lit
+            return None
+        if self._regex is not None:
+            m = self._regex.search(text)
+            return m.group(1) if m else None
+        return None
+
+    def find_all(self, text: str) -> Set[str]:
+        """text에 들어 있는 모든 리터럴"""
+        if self._automaton is not None:
+            return {lit for _, lit in self._automaton.iter(text)}
+        if self._regex is not None:
+            found: Set[str] = set()
+            for m in self._regex.finditer(text):
+                found.update(self._prefixes[m.group(1)])
+            return found
+        return set()
+
+
+class PatternSet:
+    """
+    (이름, 정규식) 목록 매칭 (re.IGNORECASE, search)
+
+    - 정규식마다 required_literal() 조각을 뽑아 LiteralMatcher 하나에 넣고,
+      텍스트에서 조각이 나온 정규식만 확인 -> 확인할 정규식 수는 패턴 수가 아니라 텍스트 내용에 비례
+    - 조각을 뽑을 수 없는 정규식은 매번 확인
+    """
+
+    def __init__(self, patterns: List[Tuple[str, str]]) -> None:
+        self.names = [name for name, _ in patterns]
+        self.compiled = [re.compile(pattern, re.IGNORECASE) for _, pattern in patterns]
+
+        self._by_key: Dict[str, List[int]] = {}
+        self._always: List[int] = []
+        for idx, (_, pattern) in enumerate(patterns):
+            key = required_literal(pattern).casefold()
+            if key:
+                self._by_key.setdefault(key, []).append(idx)
+            else:
+                self._always.append(idx)
+        self.keys = LiteralMatcher(self._by_key)
+
+    def match(self, text: str) -> Optional[str]:
+        """매칭된 패턴 중 먼저 선언된 것의 이름 (없으면 None)"""
+        candidates = set(self._always)
+        if self._by_key:
+            for key in self.keys.find_all(text.casefold()):
+                candidates.update(self._by_key[key])
+        for idx in sorted(candidates):
+            if self.compiled[idx].search(text):
+                return self.names[idx]
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "patterns": len(self.names),
+            "prefiltered": len(self.names) - len(self._always),
+            "always_checked": len(self._always),
+        }
+
+
+def load_patterns(path: str) -> Tuple[List[Tuple[str, str]], List[str]]:
+    """
+    설정 파일(JSON) -> (화이트리스트 [(이름, 정규식)], 공격 지표 [리터럴])
+
+    {
+      "extend": true,                      // true(기본): 기본 패턴에 추가, false: 파일에 있는 목록으로 교체
+      "safe_patterns": ["\\.bak$", {"name": "healthcheck", "pattern": "^/healthz"}],
+      "attack_indicators": ["/bin/sh"]
+    }
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        cfg = json.load(f)
+    if not isinstance(cfg, dict):
+        raise ValueError(f"{path}: top-level must be an object")
+
+    extend = bool(cfg.get("extend", True))
+    safe = list(DEFAULT_SAFE_PATTERNS)
+    indicators = list(DEFAULT_ATTACK_INDICATORS)
+
+    if "safe_patterns" in cfg:
+        loaded = []
+        for entry in cfg["safe_patterns"]:
+            if isinstance(entry, str):
+                loaded.append((entry, entry))
+            elif isinstance(entry, dict) and isinstance(entry.get("pattern"), str):
+                loaded.append((str(entry.get("name") or entry["pattern"]), entry["pattern"]))
+            else:
+                raise ValueError(f"{path}: invalid safe_patterns entry: {entry!r}")
+        for name, pattern in loaded:
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                raise ValueError(f"{path}: bad regex for {name!r}: {e}") from None
+        safe = safe + loaded if extend else loaded
+
+    if "attack_indicators" in cfg:
+        loaded_ind = [str(v) for v in cfg["attack_indicators"] if str(v)]
+        indicators = indicators + loaded_ind if extend else loaded_ind
+
+    return safe, indicators
 
 
 class ConservativeFilter:
     """
     보수적 False Positive 필터
-    명백히 정상인 8가지 패턴만 화이트리스트 처리
+    명백히 정상인 패턴만 화이트리스트 처리
+
+    - config_path (없으면 FP_FILTER_PATTERNS 환경변수): 패턴 설정 파일, 비우면 기본 패턴
+    - explain(): apply() 결과 + 어떤 규칙/패턴 때문에 바뀌었는지
     """
 
-    def __init__(self):
+    def __init__(self, config_path: Optional[str] = None):
+        if config_path is None:
+            config_path = os.getenv("FP_FILTER_PATTERNS", FP_FILTER_PATTERNS_DEFAULT)
+
+        if config_path:
+            safe, indicators = load_patterns(config_path)
+        else:
+            safe, indicators = list(DEFAULT_SAFE_PATTERNS), list(DEFAULT_ATTACK_INDICATORS)
+
         # 화이트리스트: 정상으로 처리할 패턴
-        self.safe_patterns = [
-            # SSRF 시도 (테스트 도메인, 공격은 아님)
-            r'8501779237819759495\.owasp\.org',
-
-            # 경로 구분자 혼용 (이상하지만 공격은 아님)
-            r'c%3[Aa]%2[Ff]',           # c://
-            r'%2[Ff]%2[Ff]%2[Ff]',      # ///
-            r'%5[Cc]%5[Cc]',            # \\
-
-            # 이상한 경로
-            r'^/thishouldnotexist',
-            r'^/%7[Cc]/',               # /|/
-            r'/\|/',                     # /|/
-
-            # 템플릿 변수
-            r'\{\{\s*data\.model',
-            r'\{\{\s*data\.url',
-
-            # 정상 파일 확장자
-            r'\.tar$',
-            r'\.tmp$',
-
-            # 외부 도메인 + feed
-            r'google\.com.*\/feed',
-            r'www\.[a-z]+\.com.*\/feed',
-        ]
-
-        self.compiled_patterns = [
-            re.compile(pattern, re.IGNORECASE)
-            for pattern in self.safe_patterns
-        ]
+        self.safe_pattern_names = [name for name, _ in safe]
+        self.safe_patterns = [pattern for _, pattern in safe]
+        self.attack_indicators = indicators
+
+        self._safe = PatternSet(safe)
+        self.compiled_patterns = self._safe.compiled
+        self._attack = LiteralMatcher(indicators)
+
+        # 보정 사유별 적용 수
+        self.hits: Dict[str, int] = {}
+
+    def match_safe_pattern(self, path: str) -> Optional[str]:
+        """매칭된 화이트리스트 패턴 이름 (없으면 None)"""
+        return self._safe.match(path)
+
+    def match_attack_payload(self, path: str) -> Optional[str]:
+        """URL 디코딩한 path에서 찾은 공격 지표 (없으면 None)"""
+        return self._attack.first(_unquote(path))
 
     def is_safe_pattern(self, path: str) -> bool:
         """화이트리스트 패턴 매칭"""
-        for pattern in self.compiled_patterns:
-            if pattern.search(path):
-                return True
-        return False
+        return self.match_safe_pattern(path) is not None
 
     def has_attack_payload(self, path: str) -> bool:
         """명백한 공격 페이로드 체크 (필터링 제외용)"""
-        decoded = urllib.parse.unquote(path)
+        return self.match_attack_payload(path) is not None
+
+    def explain(
+        self,
+        ai_prediction: str,
+        path: str,
+        status_code: int = 200
+    ) -> Tuple[str, Optional[str]]:
+        """
+        apply()와 같은 판정 + 보정 사유
+
+        Returns:
+            (보정된 예측 결과, 사유) — 사유는 "attack_404:<공격 지표>" / "safe_404:<패턴 이름>", 보정 안 했으면 None
+        """
+        # 이미 Normal이면 그대로
+        if ai_prediction.lower() in ['normal', 'normal (benign)']:
+            return ai_prediction, None
 
-        attack_indicators = [
-            'etc/passwd',
-            'sleep(',
-            'sleep+',
-            'cat+',
-            '<script>',
-            'alert(',
-            '<!--#EXEC',
-            'UNION+SELECT',
-        ]
+        # 두 규칙 모두 404에만 적용
+        if status_code != 404:
+            return ai_prediction, None
+
+        # 404 + 명백한 공격 페이로드 → Normal 처리 (서버가 거부함)
+        indicator = self.match_attack_payload(path)
+        if indicator is not None:
+            reason = f"attack_404:{indicator}"
+        else:
+            # 화이트리스트 패턴이고 404면 Normal로 변환
+            name = self.match_safe_pattern(path)
+            if name is None:
+                # 그 외는 AI 판단 유지
+                return ai_prediction, None
+            reason = f"safe_404:{name}"
 
-        return any(indicator in decoded for indicator in attack_indicators)
+        self.hits[reason] = self.hits.get(reason, 0) + 1
+        return "Normal (benign)", reason
 
     def apply(
         self,
@@ -99,17 +444,12 @@ class ConservativeFilter:
         Returns:
             보정된 예측 결과
         """
-        # 이미 Normal이면 그대로
-        if ai_prediction.lower() in ['normal', 'normal (benign)']:
-            return ai_prediction
-
-        # 404 + 명백한 공격 페이로드 → Normal 처리 (서버가 거부함)
-        if status_code == 404 and self.has_attack_payload(path):
-            return "Normal (benign)"
-
-        # 화이트리스트 패턴이고 404면 Normal로 변환
-        if self.is_safe_pattern(path) and status_code == 404:
-            return "Normal (benign)"
+        return self.explain(ai_prediction, path, status_code)[0]
 
-        # 그 외는 AI 판단 유지
-        return ai_prediction
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "safe_patterns": self._safe.stats(),
+            "attack_indicators": len(self.attack_indicators),
+            "backend": "aho-corasick" if ahocorasick is not None else "trie-regex",
+            "hits": dict(self.hits),
+        }
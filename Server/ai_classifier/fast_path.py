@@ -0,0 +1,144 @@
+# fast_path.py
+"""
+LLM 호출 전 결정적(deterministic) 라우팅 단계
+
+HF Endpoint까지 갈 필요가 없는 요청을 로컬에서 바로 판정한다.
+- static:  정적 파일 확장자 요청 (GET/HEAD, 본문 없음, 의심 문자 없음)
+- routes:  알려진 정상 라우트 템플릿 (쿼리스트링/본문 없는 경우만)
+- filter:  ConservativeFilter가 어차피 Normal로 덮어쓸 요청 (404 + 화이트리스트/무효 페이로드)
+
+어느 규칙에도 해당하지 않으면 None을 반환하고, 호출자는 평소대로 모델을 호출한다.
+"""
+
+import os
+import re
+import urllib.parse
+from typing import Any, Dict, List, Optional, Tuple
+
+from false_positive_filter import ConservativeFilter
+
+FAST_PATH_CLASSES_DEFAULT = "static,routes,filter"
+
+STATIC_EXTENSIONS_DEFAULT = (
+    ".css,.js,.map,.png,.jpg,.jpeg,.gif,.ico,.svg,.webp,.bmp,"
+    ".woff,.woff2,.ttf,.eot,.otf,.mp4,.webm,.mp3"
+)
+
+# 정적 파일 요청에서 허용하는 쿼리스트링 (캐시 무효화용 버전 값만, 그 외 쿼리가 있으면 모델에 맡김)
+STATIC_QUERY_DEFAULT = r"^(?:v|ver|version|_|t|ts)=[0-9A-Za-z.]{1,40}$"
+
+# helloSecurity(flask_app) 라우트 + 흔한 정상 경로
+BENIGN_ROUTES_DEFAULT = [
+    r"^/$",
+    r"^/favicon\.ico$",
+    r"^/robots\.txt$",
+    r"^/\d+$",
+    r"^/new$",
+    r"^/\d+/edit$",
+]
+
+# 정적 파일 확장자로 끝나더라도 이런 문자가 있으면 모델에 맡김
+SUSPICIOUS_RE = re.compile(r"(\.\.|%00|\x00|[<>'\"`;|${}\\]|%2e%2e|%3c|%3e|%27|%22)", re.IGNORECASE)
+
+SAFE_METHODS = {"GET", "HEAD"}
+EMPTY_BODY_VALUES = ["nan", "", "None", "null"]
+
+
+def _split_list(value: str, sep: str = ",") -> List[str]:
+    return [v.strip() for v in value.split(sep) if v.strip()]
+
+
+class FastPathRouter:
+    """
+    설정 가능한 고신뢰 규칙으로 LLM 호출 없이 판정.
+
+    환경변수:
+    - FAST_PATH_CLASSES:       사용할 규칙 (static,routes,filter / 빈 값이면 끔)
+    - FAST_PATH_STATIC_EXT:    정적 파일 확장자 목록 (콤마 구분)
+    - FAST_PATH_STATIC_QUERY:  정적 파일 요청에 허용하는 쿼리스트링 정규식 (쿼리 전체에 매칭, 빈 값이면 쿼리 없는 요청만)
+    - FAST_PATH_BENIGN_ROUTES: 정상 라우트 정규식 목록 (세미콜론 구분, path 부분 전체에 매칭)
+    """
+
+    def __init__(self, fp_filter: Optional[ConservativeFilter] = None) -> None:
+        self.classes = set(
+            _split_list(os.getenv("FAST_PATH_CLASSES", FAST_PATH_CLASSES_DEFAULT).lower())
+        )
+        self.static_exts = tuple(
+            e.lower() if e.startswith(".") else "." + e.lower()
+            for e in _split_list(os.getenv("FAST_PATH_STATIC_EXT", STATIC_EXTENSIONS_DEFAULT))
+        )
+
+        static_query = os.getenv("FAST_PATH_STATIC_QUERY", STATIC_QUERY_DEFAULT)
+        self.static_query = re.compile(static_query) if static_query else None
+
+        routes_env = os.getenv("FAST_PATH_BENIGN_ROUTES")
+        routes = _split_list(routes_env, ";") if routes_env is not None else BENIGN_ROUTES_DEFAULT
+        self.benign_routes = [re.compile(r) for r in routes]
+
+        self.filter = fp_filter or ConservativeFilter()
+
+        # 규칙별 적중 수
+        self.counts: Dict[str, int] = {c: 0 for c in ("static", "routes", "filter")}
+
+    def route(
+        self,
+        method: str,
+        path: str,
+        body: str = "",
+        status_code: Optional[int] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """로컬 판정이 가능하면 결과 dict, 아니면 None"""
+        matched = self._match(method, path, body, status_code)
+        if matched is None:
+            return None
+
+        rule, detail = matched
+        self.counts[rule] += 1
+        return {
+            "classification": "Normal (benign)",
+            "confidence": "high",
+            "raw_response": f"fast_path:{detail}",
+        }
+
+    def _match(
+        self,
+        method: str,
+        path: str,
+        body: str,
+        status_code: Optional[int],
+    ) -> Optional[Tuple[str, str]]:
+        """(규칙, raw_response용 상세) — filter는 어떤 패턴이 걸렸는지 포함 (예: filter:safe_404:tar_file)"""
+        method = (method or "").strip().upper()
+        has_body = str(body or "").strip() not in EMPTY_BODY_VALUES
+
+        # ConservativeFilter는 공격 판정도 404면 Normal로 바꾸므로 모델 결과와 무관
+        if "filter" in self.classes and status_code is not None:
+            _, reason = self.filter.explain("Attack", path, status_code)
+            if reason is not None:
+                return "filter", f"filter:{reason}"
+
+        if method not in SAFE_METHODS or has_body:
+            return None
+
+        parsed = urllib.parse.urlsplit(path)
+        if SUSPICIOUS_RE.search(path) or self.filter.has_attack_payload(path):
+            return None
+
+        if "static" in self.classes and self.static_exts and self._static_query_ok(parsed.query):
+            if parsed.path.lower().endswith(self.static_exts):
+                return "static", "static"
+
+        if "routes" in self.classes and not parsed.query:
+            if any(r.match(parsed.path) for r in self.benign_routes):
+                return "routes", "routes"
+
+        return None
+
+    def _static_query_ok(self, query: str) -> bool:
+        """쿼리가 없거나 캐시 무효화용 버전 값뿐이면 True (/app.js?id=1 OR 1=1 같은 요청은 모델로)"""
+        if not query:
+            return True
+        return self.static_query is not None and self.static_query.fullmatch(query) is not None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"classes": sorted(self.classes), "hits": dict(self.counts), "filter": self.filter.stats()}
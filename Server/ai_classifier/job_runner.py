@@ -0,0 +1,215 @@
+# job_runner.py
+"""
+비동기 분류 작업(job) 실행기
+
+- submit: job을 JobStore에 기록하고 item들을 작업 큐에 넣은 뒤 바로 job_id 반환
+- worker 코루틴 concurrency 개가 큐에서 item을 꺼내 classify(item)로 분류
+  (HF 경로 동시성은 server.py의 limiter / 승인 제어가 그대로 제한)
+- HF 장애 대체 결과(source=fail_open)는 결과로 기록하지 않고 retry_backoff_s부터 두 배씩 늘려 다시 큐에 넣음
+  max_retries번 넘게 실패하면 모델이 내지 않은 Normal 대신 {"error": "fail_open"}으로 기록
+- 결과는 flush_ms 마다 job별로 모아서 한 트랜잭션으로 기록 -> 기다리는 poll/stream에 알림
+- 재시작 시 끝나지 않은 job의 남은 item을 다시 큐에 넣음 (resume, 여러 워커면 lock을 잡은 하나만)
+- job이 끝나면 (선택) callback_url로 요약을 POST
+"""
+
+import asyncio
+from concurrent.futures import Executor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import requests
+
+from job_store import JobStore
+
+JobItem = Tuple[str, int, Dict[str, Any], int]  # (job_id, idx, 입력, 재시도 횟수)
+
+
+class JobRunner:
+    def __init__(
+        self,
+        store: JobStore,
+        classify: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+        executor: Executor,
+        concurrency: int = 32,
+        flush_ms: float = 100.0,
+        max_retries: int = 3,
+        retry_backoff_s: float = 5.0,
+    ) -> None:
+        self.store = store
+        self.classify = classify
+        self.executor = executor
+        self.concurrency = max(1, int(concurrency))
+        self.flush_s = max(0.01, float(flush_ms) / 1000.0)
+        self.max_retries = max(0, int(max_retries))
+        self.retry_backoff_s = max(0.0, float(retry_backoff_s))
+
+        self._queue: "asyncio.Queue[JobItem]" = asyncio.Queue()
+        self._buffer: Dict[str, List[Tuple[int, Dict[str, Any]]]] = {}
+        self._updated: Dict[str, asyncio.Event] = {}
+        self._outstanding: Dict[str, int] = {}  # job_id -> 이 프로세스에서 아직 끝나지 않은 item 수 (큐/분류 중/재시도 대기)
+        self._cancelled: set = set()  # 취소됐지만 남은 item이 있는 job (남은 item이 없어지면 제거)
+        self._tasks: List[asyncio.Task] = []
+
+        self.submitted = 0
+        self.items_done = 0
+        self.resumed = 0
+        self.retried = 0
+        self.gave_up = 0
+        self._retry_waiting = 0
+
+    async def _run_blocking(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    # ===== lifecycle =====
+    async def start(self, resume: bool = True) -> None:
+        """resume=False: 끝나지 않은 job을 이어받지 않음 (여러 워커 중 다른 워커가 담당)"""
+        self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.concurrency)]
+        self._tasks.append(asyncio.ensure_future(self._flusher()))
+        if not resume:
+            return
+        for job_id in await self._run_blocking(self.store.active_jobs):
+            n = await self._enqueue(job_id)
+            if n:
+                self.resumed += 1
+                print(f"[jobs] resumed {job_id} ({n} items left)")
+
+    async def stop(self) -> None:
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self._flush()
+
+    # ===== API =====
+    async def submit(self, items: List[Dict[str, Any]], callback_url: Optional[str] = None) -> str:
+        job_id = await self._run_blocking(self.store.create, items, callback_url)
+        self.submitted += 1
+        await self._enqueue(job_id)
+        return job_id
+
+    async def cancel(self, job_id: str) -> None:
+        if job_id in self._outstanding:
+            self._cancelled.add(job_id)
+        await self._run_blocking(self.store.set_status, job_id, "cancelled")
+        self._notify(job_id, finished=True)
+
+    async def wait_update(self, job_id: str, timeout: float) -> None:
+        """job에 새 결과가 기록되거나 timeout이 지날 때까지 대기 (stream용)"""
+        ev = self._updated.setdefault(job_id, asyncio.Event())
+        try:
+            await asyncio.wait_for(ev.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        ev.clear()
+
+    def forget(self, job_id: str) -> None:
+        """끝난 job의 알림 event 정리 (다른 워커가 끝낸 job을 stream하던 경우 등)"""
+        self._updated.pop(job_id, None)
+
+    # ===== 내부 =====
+    async def _enqueue(self, job_id: str) -> int:
+        pending = await self._run_blocking(self.store.pending, job_id)
+        for idx, item in pending:
+            self._queue.put_nowait((job_id, idx, item, 0))
+        if pending:
+            self._outstanding[job_id] = self._outstanding.get(job_id, 0) + len(pending)
+        return len(pending)
+
+    def _item_finished(self, job_id: str) -> None:
+        n = self._outstanding.get(job_id, 0) - 1
+        if n > 0:
+            self._outstanding[job_id] = n
+        else:
+            self._outstanding.pop(job_id, None)
+            self._cancelled.discard(job_id)
+
+    def _retry_later(self, entry: JobItem) -> None:
+        delay = self.retry_backoff_s * (2 ** (entry[3] - 1))
+        self.retried += 1
+        self._retry_waiting += 1
+
+        def requeue() -> None:
+            self._retry_waiting -= 1
+            self._queue.put_nowait(entry)
+
+        asyncio.get_running_loop().call_later(delay, requeue)
+
+    async def _worker(self) -> None:
+        while True:
+            job_id, idx, item, attempt = await self._queue.get()
+            try:
+                if job_id in self._cancelled:
+                    self._item_finished(job_id)
+                    continue
+                try:
+                    result = await self.classify(item)
+                except Exception as e:
+                    result = {"error": str(e) or type(e).__name__}
+                if result.get("source") == "fail_open":
+                    if attempt < self.max_retries:
+                        # 결과는 비워 둔 채 나중에 다시 (재시작되면 pending으로 이어받음)
+                        self._retry_later((job_id, idx, item, attempt + 1))
+                        continue
+                    self.gave_up += 1
+                    result = {"error": "fail_open", "degraded_reason": result.get("degraded_reason", "other")}
+                self._buffer.setdefault(job_id, []).append((idx, result))
+                self._item_finished(job_id)
+            finally:
+                self._queue.task_done()
+
+    async def _flusher(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_s)
+            try:
+                await self._flush()
+            except Exception as e:
+                print("[jobs] flush failed:", e)
+
+    async def _flush(self) -> None:
+        buffer, self._buffer = self._buffer, {}
+        failed: Optional[Exception] = None
+        for job_id, results in buffer.items():
+            try:
+                job = await self._run_blocking(self.store.put_results, job_id, results)
+            except Exception as e:
+                # 기록 실패한 결과는 버퍼에 되돌려 다음 flush에서 다시 기록 (버리면 job이 done이 되지 않음)
+                self._buffer.setdefault(job_id, [])[:0] = results
+                failed = e
+                continue
+            self.items_done += len(results)
+            if job and job["status"] == "cancelled" and job_id in self._outstanding:
+                self._cancelled.add(job_id)  # 다른 워커에서 취소된 job
+            self._notify(job_id, finished=bool(job) and job["status"] in ("done", "cancelled"))
+            if job and job["status"] == "done" and job.get("callback_url"):
+                asyncio.ensure_future(self._callback(job))
+        if failed is not None:
+            raise failed
+
+    def _notify(self, job_id: str, finished: bool = False) -> None:
+        # 끝난 job은 더 알릴 일이 없으므로 event를 깨운 뒤 정리 (기다리던 stream은 깨어나 done을 확인하고 끝남)
+        ev = self._updated.pop(job_id, None) if finished else self._updated.get(job_id)
+        if ev is not None:
+            ev.set()
+
+    async def _callback(self, job: Dict[str, Any]) -> None:
+        payload = {k: job[k] for k in ("job_id", "status", "total", "completed", "failed")}
+        try:
+            await self._run_blocking(
+                lambda: requests.post(job["callback_url"], json=payload, timeout=10).raise_for_status()
+            )
+        except Exception as e:
+            print(f"[jobs] callback failed for {job['job_id']}:", e)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued_items": self._queue.qsize(),
+            "concurrency": self.concurrency,
+            "jobs_submitted": self.submitted,
+            "jobs_resumed": self.resumed,
+            "items_done": self.items_done,
+            "items_retried": self.retried,
+            "items_gave_up": self.gave_up,
+            "retry_waiting": self._retry_waiting,
+            "active_jobs": len(self._outstanding),
+            "cancelled_jobs": len(self._cancelled),
+            "buffered_items": sum(len(v) for v in self._buffer.values()),
+            "watched_jobs": len(self._updated),
+        }
@@ -0,0 +1,197 @@
+# job_store.py
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class JobStore:
+    """
+    비동기 분류 작업(job) 저장소 (로컬 SQLite, 재시작 후 이어서 처리 가능).
+
+    - jobs:      job 단위 상태 (queued / running / done / cancelled), 개수, callback_url
+    - job_items: item별 입력(JSON)과 결과(JSON). seq는 완료 순서 (결과를 이어서 받을 때 커서)
+    - 최초 사용 시점에 파일을 연다 (startup을 막지 않음)
+    - ttl_s 가 지난 끝난 job은 새 job을 만들 때 정리
+    """
+
+    def __init__(self, path: str, ttl_s: float = 86400.0) -> None:
+        self.path = path
+        self.ttl_s = float(ttl_s)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            d = os.path.dirname(self.path)
+            if d:
+                os.makedirs(d, exist_ok=True)
+
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                  id TEXT PRIMARY KEY,
+                  status TEXT NOT NULL,
+                  total INTEGER NOT NULL,
+                  completed INTEGER NOT NULL DEFAULT 0,
+                  failed INTEGER NOT NULL DEFAULT 0,
+                  callback_url TEXT,
+                  created_at REAL NOT NULL,
+                  updated_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS job_items (
+                  job_id TEXT NOT NULL,
+                  idx INTEGER NOT NULL,
+                  request TEXT NOT NULL,
+                  result TEXT,
+                  seq INTEGER,
+                  PRIMARY KEY (job_id, idx)
+                );
+                CREATE INDEX IF NOT EXISTS idx_job_items_seq ON job_items(job_id, seq);
+                """
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def create(self, requests: List[Dict[str, Any]], callback_url: Optional[str] = None) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            try:
+                self._purge(conn, now)
+                conn.execute(
+                    "INSERT INTO jobs (id, status, total, callback_url, created_at, updated_at) VALUES (?, 'queued', ?, ?, ?, ?)",
+                    (job_id, len(requests), callback_url, now, now),
+                )
+                conn.executemany(
+                    "INSERT INTO job_items (job_id, idx, request) VALUES (?, ?, ?)",
+                    ((job_id, i, json.dumps(r, ensure_ascii=False)) for i, r in enumerate(requests)),
+                )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        return job_id
+
+    def _purge(self, conn: sqlite3.Connection, now: float) -> None:
+        if self.ttl_s <= 0:
+            return
+        old = [
+            r[0]
+            for r in conn.execute(
+                "SELECT id FROM jobs WHERE status IN ('done', 'cancelled') AND updated_at < ?",
+                (now - self.ttl_s,),
+            )
+        ]
+        for job_id in old:
+            conn.execute("DELETE FROM job_items WHERE job_id=?", (job_id,))
+            conn.execute("DELETE FROM jobs WHERE id=?", (job_id,))
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT id, status, total, completed, failed, callback_url, created_at, updated_at FROM jobs WHERE id=?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        keys = ("job_id", "status", "total", "completed", "failed", "callback_url", "created_at", "updated_at")
+        return dict(zip(keys, row))
+
+    def set_status(self, job_id: str, status: str) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "UPDATE jobs SET status=?, updated_at=? WHERE id=?", (status, time.time(), job_id)
+            )
+            conn.commit()
+
+    def pending(self, job_id: str) -> List[Tuple[int, Dict[str, Any]]]:
+        """아직 결과가 없는 item (idx, 입력)"""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT idx, request FROM job_items WHERE job_id=? AND result IS NULL ORDER BY idx",
+                (job_id,),
+            ).fetchall()
+        return [(idx, json.loads(req)) for idx, req in rows]
+
+    def active_jobs(self) -> List[str]:
+        """재시작 시 이어서 처리할 job (생성 순서)"""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT id FROM jobs WHERE status IN ('queued', 'running') ORDER BY created_at"
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def put_results(self, job_id: str, results: List[Tuple[int, Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        item 결과 여러 개를 한 트랜잭션으로 기록하고 갱신된 job 상태를 반환.
+        모든 item이 끝나면 status=done
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            # 여러 워커 프로세스가 같은 job에 기록해도 seq가 겹치지 않도록 쓰기 lock부터 잡음
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                (seq,) = conn.execute(
+                    "SELECT COALESCE(MAX(seq), 0) FROM job_items WHERE job_id=?", (job_id,)
+                ).fetchone()
+                completed, failed = 0, 0
+                for idx, result in results:
+                    # 이미 결과가 있는 item(재시작 직전에 기록된 것 등)은 건너뜀
+                    cur = conn.execute(
+                        "UPDATE job_items SET result=?, seq=? WHERE job_id=? AND idx=? AND result IS NULL",
+                        (json.dumps(result, ensure_ascii=False), seq + 1, job_id, idx),
+                    )
+                    if cur.rowcount:
+                        seq += 1
+                        completed += 1
+                        failed += int("error" in result)
+                conn.execute(
+                    """
+                    UPDATE jobs SET
+                      completed=completed + ?,
+                      failed=failed + ?,
+                      status=CASE WHEN status='cancelled' THEN status ELSE 'running' END,
+                      updated_at=?
+                    WHERE id=?
+                    """,
+                    (completed, failed, now, job_id),
+                )
+                conn.execute(
+                    "UPDATE jobs SET status='done' WHERE id=? AND completed >= total AND status != 'cancelled'",
+                    (job_id,),
+                )
+                conn.commit()
+            except Exception:
+                # 열린 쓰기 트랜잭션이 남으면 이후 BEGIN IMMEDIATE가 모두 실패하므로 되돌리고 다시 올림
+                conn.rollback()
+                raise
+        return self.get(job_id)
+
+    def results(self, job_id: str, after: int = 0, limit: int = 1000) -> List[Dict[str, Any]]:
+        """완료 순서(seq)가 after 보다 큰 결과 (최대 limit개)"""
+        with self._lock:
+            rows = self._connect().execute(
+                """
+                SELECT idx, seq, result FROM job_items
+                WHERE job_id=? AND seq > ? ORDER BY seq LIMIT ?
+                """,
+                (job_id, after, limit),
+            ).fetchall()
+        return [{"index": idx, "seq": seq, "result": json.loads(res)} for idx, seq, res in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,160 @@
+# lanes.py
+"""
+우선순위 lane별 HF 호출 슬롯 스케줄링 (weighted fair queuing)
+
+- lane: interactive (실시간 분류) / backfill (밀린 로그, 배치, job)
+- 전체 동시 HF 호출 수는 concurrency, lane별 최대 동시 호출 수는 max_concurrency
+  (backfill 상한을 concurrency보다 작게 두면 실시간 요청용 슬롯이 항상 남음)
+- 여러 lane이 기다리고 있으면 weight 비율로 슬롯을 나눔 (stride scheduling:
+  lane마다 가상 시간 pass를 두고 pass가 가장 작은 lane에 슬롯을 준 뒤 pass += 1 / weight)
+- 같은 lane 안에서는 FIFO
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+INTERACTIVE = "interactive"
+BACKFILL = "backfill"
+LANES = (INTERACTIVE, BACKFILL)
+
+
+def parse_lane_map(spec: str, default: float) -> Dict[str, float]:
+    """"interactive=8,backfill=1" -> {lane: 값} (빠진 lane은 default)"""
+    out = {lane: default for lane in LANES}
+    for part in (spec or "").split(","):
+        if "=" not in part:
+            continue
+        k, v = part.split("=", 1)
+        k = k.strip().lower()
+        if k in out:
+            out[k] = float(v)
+        else:
+            print("[lanes] unknown lane ignored:", k)
+    return out
+
+
+def resolve_lane(*candidates: Optional[str], default: str = INTERACTIVE) -> str:
+    """헤더 / 입력 필드 순서로 처음 지정된 lane (잘못된 값이면 ValueError)"""
+    for c in candidates:
+        if c:
+            lane = c.strip().lower()
+            if lane not in LANES:
+                raise ValueError(f"unknown priority '{c}' (expected one of {', '.join(LANES)})")
+            return lane
+    return default
+
+
+class _Lane:
+    def __init__(self, name: str, weight: float, max_concurrency: int) -> None:
+        self.name = name
+        self.weight = max(weight, 1e-3)
+        self.max_concurrency = max_concurrency
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.inflight = 0
+        self.pass_ = 0.0
+
+        self.granted = 0
+        self.wait_s_total = 0.0
+
+
+class LaneScheduler:
+    def __init__(
+        self,
+        concurrency: int,
+        weights: Dict[str, float],
+        max_concurrency: Dict[str, float],
+    ) -> None:
+        self.concurrency = max(1, int(concurrency))
+        self.inflight = 0
+        self._lanes: Dict[str, _Lane] = {}
+        for name in LANES:
+            cap = int(max_concurrency.get(name, 0))
+            # 0 / 음수 / 전체보다 큰 값 = lane 상한 없음 (전체 concurrency까지)
+            cap = self.concurrency if cap <= 0 else min(cap, self.concurrency)
+            self._lanes[name] = _Lane(name, float(weights.get(name, 1.0)), cap)
+        # 가장 최근에 슬롯을 받은 lane의 pass (쉬다가 다시 들어온 lane이 밀린 몫을 한꺼번에 쓰지 않도록)
+        self._vtime = 0.0
+
+    def _eligible(self, lane: _Lane) -> bool:
+        return lane.inflight < lane.max_concurrency
+
+    def _grant(self, lane: _Lane) -> None:
+        lane.inflight += 1
+        self.inflight += 1
+        self._vtime = lane.pass_
+        lane.pass_ += 1.0 / lane.weight
+        lane.granted += 1
+
+    async def acquire(self, lane_name: str) -> None:
+        lane = self._lanes[lane_name]
+        if not lane.waiters:
+            lane.pass_ = max(lane.pass_, self._vtime)
+            # 기다리는 lane이 없고 자리가 있으면 바로 통과
+            if self.inflight < self.concurrency and self._eligible(lane) and not self._any_waiting():
+                self._grant(lane)
+                return
+
+        fut = asyncio.get_running_loop().create_future()
+        lane.waiters.append(fut)
+        t0 = time.perf_counter()
+        self._dispatch()
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # 슬롯을 받은 직후 취소됨 -> 반납
+                self.release(lane_name)
+            else:
+                try:
+                    lane.waiters.remove(fut)
+                except ValueError:
+                    pass
+            raise
+        lane.wait_s_total += time.perf_counter() - t0
+
+    def release(self, lane_name: str) -> None:
+        lane = self._lanes[lane_name]
+        lane.inflight -= 1
+        self.inflight -= 1
+        self._dispatch()
+
+    def _any_waiting(self) -> bool:
+        return any(lane.waiters for lane in self._lanes.values())
+
+    def _dispatch(self) -> None:
+        """빈 슬롯을 pass가 가장 작은 (상한에 안 걸린) lane의 첫 대기자에게"""
+        while self.inflight < self.concurrency:
+            candidates = [l for l in self._lanes.values() if l.waiters and self._eligible(l)]
+            if not candidates:
+                return
+            lane = min(candidates, key=lambda l: l.pass_)
+            fut = lane.waiters.popleft()
+            if fut.done():  # 기다리다 취소된 대기자
+                continue
+            self._grant(lane)
+            fut.set_result(None)
+
+    def waiting(self, lane_name: str) -> int:
+        return len(self._lanes[lane_name].waiters)
+
+    def inflight_of(self, lane_name: str) -> int:
+        return self._lanes[lane_name].inflight
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "concurrency": self.concurrency,
+            "inflight": self.inflight,
+            "lanes": {
+                name: {
+                    "weight": lane.weight,
+                    "max_concurrency": lane.max_concurrency,
+                    "inflight": lane.inflight,
+                    "waiting": len(lane.waiters),
+                    "granted": lane.granted,
+                    "avg_wait_ms": round(lane.wait_s_total / lane.granted * 1000.0, 2) if lane.granted else 0.0,
+                }
+                for name, lane in self._lanes.items()
+            },
+        }
@@ -0,0 +1,211 @@
+# local_model.py
+"""
+CPU 전용 1단계 분류기 (char n-gram hashing + 선형 분류기)
+
+- 요청 텍스트를 char n-gram으로 쪼개 crc32 해시 버킷에 매핑 (scikit-learn 없이 추론 가능)
+- 학습은 train_local_model.py (scikit-learn LogisticRegression)에서 하고,
+  가중치만 gzip+JSON 파일로 저장해 서버 시작 시 로드
+- 확신이 높은 경우만 로컬에서 판정하고, 애매한 구간은 MistralClassifier로 넘김
+"""
+
+import array
+import base64
+import gzip
+import json
+import math
+import urllib.parse
+import zlib
+from collections import Counter
+from operator import itemgetter, mul
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import numpy as np  # 있으면 점수 계산을 gather + 행렬곱 한 번으로
+except ImportError:  # pragma: no cover
+    np = None
+
+NORMAL_LABEL = "Normal"
+MAX_TEXT_CHARS = 2048
+EMPTY_BODY_VALUES = ["nan", "", "None", "null"]
+
+
+def request_text(method: str, path: str, body: str = "") -> str:
+    """학습/추론 공통 입력 텍스트 (URL 디코딩 1회 + 소문자)"""
+    text = f"{(method or '').upper()} {urllib.parse.unquote_plus(path or '')}"
+    b = str(body or "").strip()
+    if b not in EMPTY_BODY_VALUES:
+        text += " " + urllib.parse.unquote_plus(b)
+    return text[:MAX_TEXT_CHARS].lower()
+
+
+def _bucket_counts(text: str, n_features: int, ngram_min: int, ngram_max: int) -> Counter:
+    """char n-gram -> {bucket: count}"""
+    data = text.encode("utf-8", "surrogatepass")
+    n = len(data)
+    crc = zlib.crc32
+    return Counter(
+        [crc(data[i : i + k]) % n_features for k in range(ngram_min, ngram_max + 1) for i in range(n - k + 1)]
+    )
+
+
+def hash_features(
+    text: str, n_features: int, ngram_min: int = 2, ngram_max: int = 4
+) -> Dict[int, float]:
+    """char n-gram -> {bucket: L2 정규화된 count}"""
+    counts = _bucket_counts(text, n_features, ngram_min, ngram_max)
+    norm = math.sqrt(sum(v * v for v in counts.values()))
+    return {idx: v / norm for idx, v in counts.items()} if norm > 0 else {}
+
+
+class LocalModel:
+    """hash_features 위의 다중 클래스 선형 모델 (softmax)"""
+
+    FORMAT = "elk-llm/local-model/v1"
+
+    def __init__(
+        self,
+        classes: List[str],
+        weights: "array.array",
+        bias: List[float],
+        n_features: int,
+        ngram_min: int = 2,
+        ngram_max: int = 4,
+        meta: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        if len(weights) != len(classes) * n_features:
+            raise ValueError("weights size does not match classes x n_features")
+
+        self.classes = list(classes)
+        self.weights = weights  # 행 우선: [class0 features..., class1 features..., ...]
+        self.bias = list(bias)
+        self.n_features = int(n_features)
+        self.ngram_min = int(ngram_min)
+        self.ngram_max = int(ngram_max)
+        self.meta = meta or {}
+        # 클래스별 가중치 행 (복사 없이 weights를 그대로 가리킴)
+        if np is not None:
+            self._matrix = np.asarray(weights).reshape(len(self.classes), self.n_features)
+        else:
+            view = memoryview(weights)
+            self._rows = [view[c * self.n_features : (c + 1) * self.n_features] for c in range(len(self.classes))]
+
+    def predict_proba(self, method: str, path: str, body: str = "") -> Dict[str, float]:
+        counts = _bucket_counts(
+            request_text(method, path, body), self.n_features, self.ngram_min, self.ngram_max
+        )
+
+        if not counts:
+            scores = list(self.bias)
+        elif np is not None:
+            idx = np.fromiter(counts.keys(), dtype=np.intp, count=len(counts))
+            vals = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+            vals /= math.sqrt(vals @ vals)
+            scores = (self._matrix[:, idx] @ vals + self.bias).tolist()
+        else:
+            # 클래스마다 bucket gather + 곱셈 합 한 번 (정규화는 점수에: w·(c/|c|) = (w·c)/|c|)
+            idx, vals = list(counts), list(counts.values())
+            norm = math.sqrt(sum(map(mul, vals, vals)))
+            gather = itemgetter(*idx) if len(idx) > 1 else (lambda row: (row[idx[0]],))
+            scores = [b + sum(map(mul, gather(row), vals)) / norm for row, b in zip(self._rows, self.bias)]
+
+        top = max(scores)
+        exps = [math.exp(s - top) for s in scores]
+        total = sum(exps)
+        return {label: e / total for label, e in zip(self.classes, exps)}
+
+    # ===== 직렬화 =====
+    def save(self, path: str) -> None:
+        w = array.array("f", self.weights)
+        doc = {
+            "format": self.FORMAT,
+            "classes": self.classes,
+            "n_features": self.n_features,
+            "ngram_min": self.ngram_min,
+            "ngram_max": self.ngram_max,
+            "bias": self.bias,
+            "weights_f32": base64.b64encode(w.tobytes()).decode("ascii"),
+            "meta": self.meta,
+        }
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            json.dump(doc, f)
+
+    @classmethod
+    def load(cls, path: str) -> "LocalModel":
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            doc = json.load(f)
+
+        if doc.get("format") != cls.FORMAT:
+            raise ValueError(f"unsupported local model format: {doc.get('format')}")
+
+        w = array.array("f")
+        w.frombytes(base64.b64decode(doc["weights_f32"]))
+        return cls(
+            classes=doc["classes"],
+            weights=w,
+            bias=doc["bias"],
+            n_features=doc["n_features"],
+            ngram_min=doc.get("ngram_min", 2),
+            ngram_max=doc.get("ngram_max", 4),
+            meta=doc.get("meta"),
+        )
+
+
+class LocalCascade:
+    """
+    LocalModel 점수로 로컬 판정 또는 LLM 에스컬레이션 결정.
+
+    - P(Normal) >= normal_min         -> "Normal (benign)" 로컬 판정
+    - max P(attack class) >= attack_min -> 해당 공격 라벨 로컬 판정
+    - 그 사이(불확실 구간)             -> None (MistralClassifier로 넘김)
+    """
+
+    def __init__(self, model: LocalModel, normal_min: float = 0.98, attack_min: float = 0.99) -> None:
+        self.model = model
+        self.normal_min = float(normal_min)
+        self.attack_min = float(attack_min)
+
+        self.local_normal = 0
+        self.local_attack = 0
+        self.escalated = 0
+
+    def decide(self, method: str, path: str, body: str = "") -> Tuple[Optional[Dict[str, Any]], Dict[str, float]]:
+        """반환: (로컬 판정 결과 또는 None, 클래스별 확률)"""
+        probs = self.model.predict_proba(method, path, body)
+
+        p_normal = probs.get(NORMAL_LABEL, 0.0)
+        attack_label, p_attack = max(
+            ((k, v) for k, v in probs.items() if k != NORMAL_LABEL),
+            key=lambda kv: kv[1],
+            default=(None, 0.0),
+        )
+
+        if p_normal >= self.normal_min:
+            self.local_normal += 1
+            return self._result("Normal (benign)", p_normal), probs
+
+        if attack_label is not None and p_attack >= self.attack_min:
+            self.local_attack += 1
+            return self._result(attack_label, p_attack), probs
+
+        self.escalated += 1
+        return None, probs
+
+    @staticmethod
+    def _result(label: str, p: float) -> Dict[str, Any]:
+        return {
+            "classification": label,
+            "confidence": "high",
+            "raw_response": f"local_model:{label}:{p:.4f}",
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.local_normal + self.local_attack + self.escalated
+        return {
+            "normal_min": self.normal_min,
+            "attack_min": self.attack_min,
+            "local_normal": self.local_normal,
+            "local_attack": self.local_attack,
+            "escalated": self.escalated,
+            "escalation_rate": round(self.escalated / total, 4) if total else 0.0,
+            "model": self.model.meta,
+        }
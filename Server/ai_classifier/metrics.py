@@ -0,0 +1,250 @@
+# metrics.py
+"""
+Prometheus 지표 정의 (/metrics 에서 노출)
+
+- 요청 수: classify_requests_total, classify_items_total
+- HF 호출 지연: classifier_hf_call_seconds (배치 1회 = 관측 1회)
+- 큐/동시성: classifier_batch_queue_depth, classifier_hf_inflight, classifier_hf_waiting
+- 판정 분포: classifier_verdicts_total{label, confidence, source}
+- HF 오류: classifier_hf_errors_total{kind} (timeout / http / network / other)
+- fail-open: classifier_fail_open_total{reason} (_derive_classification의 Normal/low 대체 결과)
+- 부하 차단: classifier_admission_pending, classifier_shed_total{reason} (overloaded / deadline)
+- 준비 상태: classifier_ready (warm-up probe가 SLO 안에 응답했는지 = /ready)
+- 복원력: classifier_hf_breaker_state{endpoint}, classifier_hf_call_outcomes_total{outcome}, classifier_hf_retries_total
+- 프롬프트 압축: classifier_prompt_body_tokens_total{stage} (input / output, 추정 토큰), classifier_prompt_body_truncated_total
+- Endpoint별: classifier_hf_endpoint_outstanding / _latency_ewma_seconds / _requests_total / _failures_total{endpoint}
+- 우선순위 lane별: classifier_lane_inflight / _waiting / _admission_pending{lane},
+  classifier_lane_queue_wait_seconds{lane} (HF 슬롯 대기), classifier_lane_verdict_seconds{lane} (요청 1건 전체)
+- shadow 비교: classifier_shadow_samples_total{outcome}, classifier_shadow_confusion_total{primary, shadow},
+  classifier_shadow_latency_p50_seconds / _p95_seconds{target} (primary / shadow)
+"""
+
+from typing import Any, Callable, Dict, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+from lanes import LANES
+
+REQUESTS = Counter(
+    "classify_requests_total", "HTTP classification requests", ["endpoint"]
+)
+ITEMS = Counter(
+    "classify_items_total", "Classified items (batch items counted individually)", ["endpoint"]
+)
+
+HF_LATENCY = Histogram(
+    "classifier_hf_call_seconds",
+    "HF endpoint call latency (one observation per endpoint call)",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60),
+)
+HF_BATCH_SIZE = Histogram(
+    "classifier_hf_batch_size",
+    "Prompts per HF endpoint call",
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+HF_ERRORS = Counter("classifier_hf_errors_total", "HF endpoint call failures", ["kind"])
+
+QUEUE_DEPTH = Gauge("classifier_batch_queue_depth", "Prompts waiting in the micro-batcher")
+HF_INFLIGHT = Gauge("classifier_hf_inflight", "HF endpoint calls in progress")
+HF_WAITING = Gauge("classifier_hf_waiting", "HF endpoint calls waiting for a concurrency slot")
+ADMISSION_PENDING = Gauge(
+    "classifier_admission_pending", "Requests admitted to the HF path (queued + in flight)"
+)
+SHED = Counter("classifier_shed_total", "Requests dropped before reaching HF", ["reason"])
+READY = Gauge("classifier_ready", "1 if the HF endpoint answered a warm-up probe within the SLO (/ready)")
+
+LANE_INFLIGHT = Gauge("classifier_lane_inflight", "HF endpoint calls in progress per priority lane", ["lane"])
+LANE_WAITING = Gauge(
+    "classifier_lane_waiting", "HF endpoint calls waiting for a slot per priority lane", ["lane"]
+)
+LANE_ADMISSION_PENDING = Gauge(
+    "classifier_lane_admission_pending", "Requests admitted to the HF path per priority lane", ["lane"]
+)
+LANE_QUEUE_WAIT = Histogram(
+    "classifier_lane_queue_wait_seconds",
+    "Time from entering the batch queue to getting an HF slot, per priority lane",
+    ["lane"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30),
+)
+LANE_LATENCY = Histogram(
+    "classifier_lane_verdict_seconds",
+    "Time to produce one verdict (all sources), per priority lane",
+    ["lane"],
+    buckets=(0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60),
+)
+
+VERDICTS = Counter(
+    "classifier_verdicts_total", "Verdicts returned", ["label", "confidence", "source"]
+)
+FAIL_OPEN = Counter(
+    "classifier_fail_open_total",
+    "Fail-open Normal/low verdicts (not a real model decision)",
+    ["reason"],
+)
+
+
+def observe_verdict(result: Dict[str, Any]) -> None:
+    """응답 하나에 대한 판정 분포 / fail-open 집계"""
+    label = result.get("classification", "Normal")
+    confidence = result.get("confidence", "low")
+    VERDICTS.labels(label, confidence, result.get("source", "model")).inc()
+
+    if result.get("source") == "fail_open":
+        FAIL_OPEN.labels(result.get("hf_error_kind", "other")).inc()
+    elif result.get("source") == "model" and label == "Normal" and confidence == "low":
+        FAIL_OPEN.labels("unparsed_output").inc()
+
+
+BREAKER_STATE_VALUES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+class ResilienceCollector:
+    """MistralClassifier.resilience_stats()를 scrape 시점에 읽어 노출"""
+
+    def __init__(self, stats_fn: Callable[[], Optional[Dict[str, Any]]]) -> None:
+        self.stats_fn = stats_fn
+
+    def collect(self):
+        stats = self.stats_fn()
+        if not stats:
+            return
+
+        state = GaugeMetricFamily(
+            "classifier_hf_breaker_state",
+            "HF circuit breaker state per endpoint (0=closed, 1=half_open, 2=open)",
+            labels=["endpoint"],
+        )
+        opens = CounterMetricFamily(
+            "classifier_hf_breaker_opens", "HF circuit breaker trips", labels=["endpoint"]
+        )
+        outstanding = GaugeMetricFamily(
+            "classifier_hf_endpoint_outstanding", "HF calls in flight per endpoint", labels=["endpoint"]
+        )
+        ewma = GaugeMetricFamily(
+            "classifier_hf_endpoint_latency_ewma_seconds",
+            "HF call latency EWMA per endpoint (used by HF_LB_STRATEGY=ewma)",
+            labels=["endpoint"],
+        )
+        requests = CounterMetricFamily(
+            "classifier_hf_endpoint_requests", "HF calls sent per endpoint", labels=["endpoint"]
+        )
+        failures = CounterMetricFamily(
+            "classifier_hf_endpoint_failures", "HF calls failed per endpoint", labels=["endpoint"]
+        )
+        for ep in stats["endpoints"]:
+            name = [ep["name"]]
+            state.add_metric(name, BREAKER_STATE_VALUES.get(ep["state"], 0))
+            opens.add_metric(name, ep["opens"])
+            outstanding.add_metric(name, ep["outstanding"])
+            if ep["ewma_ms"] is not None:
+                ewma.add_metric(name, ep["ewma_ms"] / 1000.0)
+            requests.add_metric(name, ep["requests"])
+            failures.add_metric(name, ep["failures"])
+        yield from (state, opens, outstanding, ewma, requests, failures)
+
+        outcomes = CounterMetricFamily(
+            "classifier_hf_call_outcomes", "HF endpoint call outcomes", labels=["outcome"]
+        )
+        for outcome, n in stats["outcomes"].items():
+            outcomes.add_metric([outcome], n)
+        yield outcomes
+
+        retries = CounterMetricFamily("classifier_hf_retries", "HF retries spent from the budget")
+        retries.add_metric([], stats["retry_budget"]["retries"])
+        yield retries
+
+
+class CompactionCollector:
+    """PayloadCompactor.stats()를 scrape 시점에 읽어 노출 (압축 전/후 추정 토큰 수)"""
+
+    def __init__(self, stats_fn: Callable[[], Optional[Dict[str, Any]]]) -> None:
+        self.stats_fn = stats_fn
+
+    def collect(self):
+        stats = self.stats_fn()
+        if not stats:
+            return
+
+        tokens = CounterMetricFamily(
+            "classifier_prompt_body_tokens",
+            "Estimated request-body tokens before (input) and after (output) compaction",
+            labels=["stage"],
+        )
+        tokens.add_metric(["input"], stats["input_tokens"])
+        tokens.add_metric(["output"], stats["output_tokens"])
+        yield tokens
+
+        truncated = CounterMetricFamily(
+            "classifier_prompt_body_truncated", "Bodies that still exceeded the token budget after compaction"
+        )
+        truncated.add_metric([], stats["truncated"])
+        yield truncated
+
+
+class ShadowCollector:
+    """ShadowMirror.stats()를 scrape 시점에 읽어 노출 (후보 모델과의 판정 일치 / 지연 비교)"""
+
+    def __init__(self, stats_fn: Callable[[], Optional[Dict[str, Any]]]) -> None:
+        self.stats_fn = stats_fn
+
+    def collect(self):
+        stats = self.stats_fn()
+        if not stats:
+            return
+
+        samples = CounterMetricFamily(
+            "classifier_shadow_samples", "Shadow-mirrored samples by outcome", labels=["outcome"]
+        )
+        samples.add_metric(["agree"], stats["agreed"])
+        samples.add_metric(["disagree"], stats["compared"] - stats["agreed"])
+        samples.add_metric(["error"], sum(stats["errors"].values()))
+        samples.add_metric(["dropped"], stats["dropped"])
+        yield samples
+
+        confusion = CounterMetricFamily(
+            "classifier_shadow_confusion",
+            "Primary vs shadow verdict labels",
+            labels=["primary", "shadow"],
+        )
+        for p, row in stats["confusion"].items():
+            for s, n in row.items():
+                confusion.add_metric([p, s], n)
+        yield confusion
+
+        for q in ("p50", "p95"):
+            g = GaugeMetricFamily(
+                f"classifier_shadow_latency_{q}_seconds",
+                f"Recent {q} latency of the primary HF call vs the shadow call",
+                labels=["target"],
+            )
+            for target in ("primary", "shadow"):
+                v = stats["latency"][target][f"{q}_s"]
+                if v is not None:
+                    g.add_metric([target], v)
+            yield g
+
+
+def register_shadow(stats_fn: Callable[[], Optional[Dict[str, Any]]]) -> None:
+    REGISTRY.register(ShadowCollector(stats_fn))
+
+
+def register_lanes(scheduler: Any, admission_pending: Callable[[str], int]) -> None:
+    """LaneScheduler / AdmissionController의 lane별 값을 scrape 시점에 읽도록 연결"""
+    for lane in LANES:
+        LANE_INFLIGHT.labels(lane).set_function(lambda lane=lane: scheduler.inflight_of(lane))
+        LANE_WAITING.labels(lane).set_function(lambda lane=lane: scheduler.waiting(lane))
+        LANE_ADMISSION_PENDING.labels(lane).set_function(lambda lane=lane: admission_pending(lane))
+
+
+def register_compaction(stats_fn: Callable[[], Optional[Dict[str, Any]]]) -> None:
+    REGISTRY.register(CompactionCollector(stats_fn))
+
+
+def register_resilience(stats_fn: Callable[[], Optional[Dict[str, Any]]]) -> None:
+    REGISTRY.register(ResilienceCollector(stats_fn))
+
+
+def render():
+    """(body, content_type)"""
+    return generate_latest(), CONTENT_TYPE_LATEST
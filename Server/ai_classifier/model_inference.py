@@ -1,28 +1,153 @@
 # model_inference.py
 import os
 import json
+import time
+import asyncio
+import importlib.util
+import hashlib
+import threading
 import requests
 import re
-from typing import Any, Dict
+import math
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Union
+
+from endpoints import Endpoint, EndpointPool
+from payload_compaction import PayloadCompactor
+from resilience import LatencyTracker, RetryBudget, backoff_s
+
+try:
+    import httpx  # async 연결 풀 (없으면 sync requests.Session을 스레드에서 사용)
+except ImportError:  # pragma: no cover
+    httpx = None
+
+# 프롬프트/파싱 방식이 바뀌면 올려서 이전 판정 캐시를 무효화
+# v2: 본문 앞 1500자 자르기 -> 토큰 예산 압축 (payload_compaction.py)
+PROMPT_VERSION = "v2"
+
+# hedged request는 지연 통계가 이 정도 쌓인 뒤부터 사용
+HEDGE_MIN_SAMPLES = 20
+
+# LABEL_PROTOCOL=code: 라벨 이름 대신 한 글자 코드로 답하게 해서 생성 토큰 수를 줄임
+LABEL_CODES = {
+    "N": "Normal (benign)",
+    "S": "SQL Injection",
+    "C": "Code Injection",
+    "P": "Path Traversal",
+}
+LABEL_PROTOCOLS = ("text", "code")
+
+
+class HFCallError(Exception):
+    """Endpoint 호출 실패 (kind: timeout / network / http / invalid_response)"""
+
+    def __init__(self, kind: str, message: str, retryable: bool) -> None:
+        super().__init__(message)
+        self.kind = kind
+        self.retryable = retryable
 
 
 class MistralClassifier:
     """
     로컬 모델 대신 Hugging Face Inference Endpoint를 호출하는 경량 분류기.
 
-    - HF_ENDPOINT_URL: Hugging Face Inference Endpoint URL
-    - HF_API_KEY:     Hugging Face API 토큰 (Bearer)
+    - HF_ENDPOINT_URL:  Hugging Face Inference Endpoint URL
+    - HF_ENDPOINT_URLS: (선택) 같은 모델의 replica 여러 개 "url|weight,url|weight" (endpoints.py)
+    - HF_API_KEY:       Hugging Face API 토큰 (Bearer)
+    - HF_MODEL_ID:      (선택) 판정 캐시용 모델 식별자. 없으면 첫 번째 Endpoint URL로 생성
+
+    Endpoint 호출은 재시도 예산 + 지터 백오프, Endpoint별 circuit breaker, (선택) hedged request로 감싼다.
+    재시도/hedge는 가능하면 다른 Endpoint로 보낸다.
+    실패는 {"error", "error_kind"}로 반환되어 fail-open 결과에 hf_error로 표시된다.
     """
 
     def __init__(self) -> None:
-        self.endpoint = os.getenv("HF_ENDPOINT_URL")
         self.api_key = os.getenv("HF_API_KEY")
 
-        if not self.endpoint:
-            raise RuntimeError("HF_ENDPOINT_URL is not set")
+        # ===== Endpoint 목록 (replica별 breaker로 비정상 Endpoint 제외) =====
+        self.endpoints = EndpointPool.from_env(
+            failure_threshold=int(os.getenv("HF_BREAKER_FAILURES", "5")),
+            cooldown_s=float(os.getenv("HF_BREAKER_COOLDOWN_S", "15")),
+        )
+        self.endpoint = self.endpoints.primary.url
+
         if not self.api_key:
             raise RuntimeError("HF_API_KEY is not set")
 
+        # 판정 캐시 키에 들어가는 모델 식별자 (엔드포인트 + 프롬프트 버전)
+        # replica를 추가/제거해도 캐시가 유지되도록 첫 번째 Endpoint 기준 (모델이 다르면 HF_MODEL_ID 지정)
+        self.model_id = os.getenv("HF_MODEL_ID") or (
+            PROMPT_VERSION + ":" + hashlib.sha256(self.endpoint.encode()).hexdigest()[:16]
+        )
+
+        # ===== 라벨 응답 방식 =====
+        # text: 라벨 이름을 최대 16토큰까지 생성 후 정규식으로 판별 (기본, 기존 방식)
+        # code: 한 글자 코드 + 짧은 max_new_tokens + stop sequence, 가능하면 토큰 확률로 신뢰도 계산
+        self.label_protocol = os.getenv("LABEL_PROTOCOL", "text").strip().lower()
+        if self.label_protocol not in LABEL_PROTOCOLS:
+            raise RuntimeError(f"LABEL_PROTOCOL must be one of {', '.join(LABEL_PROTOCOLS)}")
+        if self.label_protocol != "text":
+            # 프롬프트/파싱이 다르므로 판정 저장소 키도 분리
+            self.model_id += ":" + self.label_protocol
+        # 코드 앞에 공백 토큰이 하나 붙는 tokenizer가 있으므로 가장 긴 코드 + 1
+        self.code_max_new_tokens = max(len(c) for c in LABEL_CODES) + 1
+        # Endpoint(TGI)가 details / top_n_tokens를 지원하면 첫 토큰 확률로 신뢰도 계산
+        self.token_scores = os.getenv("LABEL_TOKEN_SCORES", "1") == "1"
+        self.top_n_tokens = int(os.getenv("LABEL_TOP_N_TOKENS", "5"))
+        self.conf_high = float(os.getenv("LABEL_CONF_HIGH", "0.9"))
+        self.conf_medium = float(os.getenv("LABEL_CONF_MEDIUM", "0.6"))
+        # 코드로 답한 수 / 코드 대신 라벨 이름 등으로 답한 수 / 토큰 확률로 신뢰도를 계산한 수
+        self.label_stats: Dict[str, int] = {"code": 0, "off_protocol": 0, "scored": 0}
+
+        # 프롬프트에 넣을 본문 토큰 예산 (반복/불투명 값 축약, 의심 조각 우선)
+        self.compactor = PayloadCompactor(
+            budget_tokens=int(os.getenv("PROMPT_BODY_TOKEN_BUDGET", "384"))
+        )
+
+        # ===== 복원력 설정 =====
+        self.timeout_s = float(os.getenv("HF_TIMEOUT_S", "30"))
+        self.max_attempts = max(1, int(os.getenv("HF_MAX_ATTEMPTS", "3")))
+        self.backoff_base_s = float(os.getenv("HF_BACKOFF_BASE_S", "0.2"))
+        self.retry_budget = RetryBudget(ratio=float(os.getenv("HF_RETRY_BUDGET_RATIO", "0.2")))
+        self.latency = LatencyTracker()
+
+        # hedged request: p95 지연이 지나도 응답이 없으면 같은 요청을 한 번 더 보냄
+        self.hedge_enabled = os.getenv("HF_HEDGE", "0") == "1"
+        self.hedge_quantile = float(os.getenv("HF_HEDGE_QUANTILE", "0.95"))
+        self.hedge_min_s = float(os.getenv("HF_HEDGE_MIN_MS", "200")) / 1000.0
+        self._hedge_pool = (
+            ThreadPoolExecutor(
+                max_workers=int(os.getenv("HF_HEDGE_POOL", "16")), thread_name_prefix="hf-hedge"
+            )
+            if self.hedge_enabled
+            else None
+        )
+
+        # ===== 연결 풀 (keep-alive) =====
+        self.pool_size = max(1, int(os.getenv("HF_POOL_SIZE", "32")))
+        self.pool_keepalive_s = float(os.getenv("HF_POOL_KEEPALIVE_S", "60"))
+        # HTTP/2는 h2 패키지가 있고 Endpoint가 ALPN으로 지원할 때만 실제로 사용됨
+        self.http2 = os.getenv("HF_HTTP2", "1") == "1" and importlib.util.find_spec("h2") is not None
+
+        self._session = requests.Session()
+        # pool_connections: 호스트(Endpoint)별 연결 풀 수
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=len(self.endpoints.endpoints), pool_maxsize=self.pool_size
+        )
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        self._async_client = None
+        self.pool_stats: Dict[str, int] = {
+            "requests": 0,
+            "inflight": 0,
+            "max_inflight": 0,
+            "http2_responses": 0,
+        }
+
+        # 호출 결과 집계 (ok / retried_ok / circuit_open / error:<kind> / hedged / hedge_won)
+        self.outcomes: Dict[str, int] = {}
+        self._outcomes_lock = threading.Lock()
+
     def load_model(self) -> bool:
         """
         로컬에서 모델을 로드할 필요가 없으므로 항상 True.
@@ -31,41 +156,344 @@ class MistralClassifier:
         return True
 
     # ===== 내부 유틸 =====
-    def _call_hf_endpoint(self, prompt: str) -> Dict[str, Any]:
+    def _build_payload(self, prompt: Union[str, List[str]]) -> str:
+        parameters = {
+            "max_new_tokens": 16,
+            "temperature": 0.01,
+            "return_full_text": False,
+            "do_sample": False,
+        }
+        if self.label_protocol == "code":
+            parameters["max_new_tokens"] = self.code_max_new_tokens
+            parameters["stop"] = ["\n"]
+            if self.token_scores:
+                parameters["details"] = True
+                parameters["top_n_tokens"] = self.top_n_tokens
+        payload = {"inputs": prompt, "parameters": parameters}
+        return json.dumps(payload)
+
+    def _should_retry(self, e: HFCallError, attempt: int) -> bool:
+        return e.retryable and attempt < self.max_attempts and self.retry_budget.try_spend()
+
+    def _on_success(self, attempt: int) -> None:
+        # breaker는 Endpoint별로 호출 1회마다 반영 (Endpoint.end)
+        self.retry_budget.record_success()
+        self._count("ok" if attempt == 1 else "retried_ok")
+
+    def _on_failure(self, last: HFCallError) -> Dict[str, Any]:
+        # circuit_open: 모든 Endpoint가 비정상으로 판단된 상태 -> 호출하지 않고 즉시 실패 (fail fast)
+        self._count("circuit_open" if last.kind == "circuit_open" else f"error:{last.kind}")
+        return {"error": str(last), "error_kind": last.kind}
+
+    def _pick_endpoint(self, tried: List[Endpoint]) -> Endpoint:
+        ep = self.endpoints.pick(exclude=tried)
+        if ep is None:
+            raise HFCallError("circuit_open", "circuit breaker open", retryable=False)
+        tried.append(ep)
+        return ep
+
+    def _call_hf_endpoint(self, prompt: Union[str, List[str]]) -> Any:
         """
         HF Inference Endpoint 호출.
         Endpoint 타입(text-generation / chat-completions 등)에 따라
         응답 구조가 달라질 수 있으므로 최대한 범용적으로 파싱.
-        prompt: 이미 프롬프트 형식으로 구성된 문자열
-        """
-        payload = {
-            "inputs": prompt,
-            "parameters": {
-                "max_new_tokens": 16,
-                "temperature": 0.01,
-                "return_full_text": False,
-                "do_sample": False,
-            },
-        }
-
+        prompt: 이미 프롬프트 형식으로 구성된 문자열 (배치 호출 시 문자열 리스트)
+        """
+        body = self._build_payload(prompt)
+        tried: List[Endpoint] = []
+        attempt = 0
+        last = None
+        while True:
+            attempt += 1
+            try:
+                data = self._post_hedged(body, tried)
+            except HFCallError as e:
+                if not self._should_retry(e, attempt):
+                    # 재시도 중 모든 Endpoint가 open 되었으면 원래 실패 원인을 보고
+                    return self._on_failure(last if e.kind == "circuit_open" and last else e)
+                last = e
+                time.sleep(backoff_s(attempt, self.backoff_base_s))
+                continue
+
+            self._on_success(attempt)
+            return data
+
+    async def _acall_hf_endpoint(self, prompt: Union[str, List[str]]) -> Any:
+        """_call_hf_endpoint의 async 버전 (keep-alive 연결 풀 사용)"""
+        body = self._build_payload(prompt)
+        tried: List[Endpoint] = []
+        attempt = 0
+        last = None
+        while True:
+            attempt += 1
+            try:
+                data = await self._apost_hedged(body, tried)
+            except HFCallError as e:
+                if not self._should_retry(e, attempt):
+                    # 재시도 중 모든 Endpoint가 open 되었으면 원래 실패 원인을 보고
+                    return self._on_failure(last if e.kind == "circuit_open" and last else e)
+                last = e
+                await asyncio.sleep(backoff_s(attempt, self.backoff_base_s))
+                continue
+
+            self._on_success(attempt)
+            return data
+
+    def _post_once(self, ep: Endpoint, body: str) -> Any:
+        """Endpoint POST 1회. 실패는 HFCallError로 변환"""
         headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
         }
 
+        t0 = ep.begin()
+        try:
+            try:
+                resp = self._session.post(ep.url, headers=headers, data=body, timeout=self.timeout_s)
+            except requests.Timeout as e:
+                raise HFCallError("timeout", str(e), retryable=True)
+            except requests.RequestException as e:
+                raise HFCallError("network", str(e), retryable=True)
+            data = self._decode_response(resp.status_code, resp.text, resp.json)
+        except HFCallError as e:
+            ep.end(t0, ok=False, retryable=e.retryable)
+            raise
+
+        ep.end(t0, ok=True)
+        self.latency.observe(time.perf_counter() - t0)
+        return data
+
+    async def _apost_once(self, ep: Endpoint, body: str) -> Any:
+        """Endpoint POST 1회 (async, 연결 풀 재사용). 실패는 HFCallError로 변환"""
+        client = self._get_async_client()
+        self.pool_stats["requests"] += 1
+        self.pool_stats["inflight"] += 1
+        self.pool_stats["max_inflight"] = max(self.pool_stats["max_inflight"], self.pool_stats["inflight"])
+
+        t0 = ep.begin()
         try:
-            resp = requests.post(
-                self.endpoint, headers=headers, data=json.dumps(payload), timeout=30
+            try:
+                resp = await client.post(ep.url, content=body)
+            except httpx.TimeoutException as e:
+                raise HFCallError("timeout", str(e) or "timeout", retryable=True)
+            except httpx.HTTPError as e:
+                raise HFCallError("network", str(e) or type(e).__name__, retryable=True)
+            finally:
+                self.pool_stats["inflight"] -= 1
+
+            if resp.http_version == "HTTP/2":
+                self.pool_stats["http2_responses"] += 1
+            data = self._decode_response(resp.status_code, resp.text, resp.json)
+        except HFCallError as e:
+            ep.end(t0, ok=False, retryable=e.retryable)
+            raise
+        except asyncio.CancelledError:
+            # hedge에서 진 쪽: 결과 없음 (breaker에 반영하지 않음)
+            ep.end(t0, ok=None)
+            raise
+
+        ep.end(t0, ok=True)
+        self.latency.observe(time.perf_counter() - t0)
+        return data
+
+    @staticmethod
+    def _decode_response(status_code: int, text: str, json_fn) -> Any:
+        if status_code != 200:
+            # 429 / 5xx (scale-to-zero 기동 중 503 포함)는 재시도 대상
+            retryable = status_code == 429 or status_code >= 500
+            raise HFCallError("http", f"HF error {status_code}: {text[:500]}", retryable=retryable)
+
+        try:
+            return json_fn()
+        except ValueError as e:
+            raise HFCallError("invalid_response", str(e), retryable=False)
+
+    def _post_hedged(self, body: str, tried: List[Endpoint]) -> Any:
+        """
+        hedged request: p95 지연이 지나도 응답이 없으면 같은 요청을 (가능하면 다른 Endpoint로)
+        한 번 더 보내고 먼저 성공한 응답을 사용. 추가 요청은 재시도 예산을 소모.
+        (늦게 끝난 쪽은 백그라운드에서 마저 끝나고 버려짐)
+        """
+        ep = self._pick_endpoint(tried)
+        if self._hedge_pool is None or self.latency.count() < HEDGE_MIN_SAMPLES:
+            return self._post_once(ep, body)
+
+        delay = max(self.hedge_min_s, self.latency.quantile(self.hedge_quantile) or 0.0)
+        primary = self._hedge_pool.submit(self._post_once, ep, body)
+        done, _ = wait([primary], timeout=delay)
+        if done or not self.retry_budget.try_spend():
+            return primary.result()
+        hedge_ep = self.endpoints.pick(exclude=tried)
+        if hedge_ep is None:
+            return primary.result()
+        tried.append(hedge_ep)
+
+        self._count("hedged")
+        hedge = self._hedge_pool.submit(self._post_once, hedge_ep, body)
+        pending = {primary, hedge}
+        first_error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for f in done:
+                try:
+                    data = f.result()
+                except HFCallError as e:
+                    first_error = first_error or e
+                    continue
+                if f is hedge:
+                    self._count("hedge_won")
+                return data
+        raise first_error
+
+    async def _apost_hedged(self, body: str, tried: List[Endpoint]) -> Any:
+        """_post_hedged의 async 버전. 늦은 쪽 요청은 취소."""
+        ep = self._pick_endpoint(tried)
+        if self.latency.count() < HEDGE_MIN_SAMPLES or not self.hedge_enabled:
+            return await self._apost_once(ep, body)
+
+        delay = max(self.hedge_min_s, self.latency.quantile(self.hedge_quantile) or 0.0)
+        primary = asyncio.ensure_future(self._apost_once(ep, body))
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done or not self.retry_budget.try_spend():
+            return await primary
+        hedge_ep = self.endpoints.pick(exclude=tried)
+        if hedge_ep is None:
+            return await primary
+        tried.append(hedge_ep)
+
+        self._count("hedged")
+        hedge = asyncio.ensure_future(self._apost_once(hedge_ep, body))
+        pending = {primary, hedge}
+        first_error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for f in done:
+                    try:
+                        data = f.result()
+                    except HFCallError as e:
+                        first_error = first_error or e
+                        continue
+                    if f is hedge:
+                        self._count("hedge_won")
+                    return data
+            raise first_error
+        finally:
+            for f in pending:
+                f.cancel()
+
+    # ===== warm-up / keep-warm probe =====
+    async def aprobe(self, ep: Endpoint, timeout_s: float) -> float:
+        """
+        Endpoint 하나에 짧은 분류 요청 1회 (재시도 / breaker / 지연 통계에 반영하지 않음).
+        응답까지 걸린 시간(초)을 반환, 실패는 HFCallError
+        """
+        body = self._build_payload(self.build_prompt("GET", "/"))
+        t0 = time.perf_counter()
+        if httpx is None:
+            headers = {"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
+            try:
+                resp = await asyncio.to_thread(
+                    self._session.post, ep.url, headers=headers, data=body, timeout=timeout_s
+                )
+            except requests.Timeout as e:
+                raise HFCallError("timeout", str(e), retryable=True)
+            except requests.RequestException as e:
+                raise HFCallError("network", str(e), retryable=True)
+        else:
+            try:
+                resp = await self._get_async_client().post(ep.url, content=body, timeout=timeout_s)
+            except httpx.TimeoutException as e:
+                raise HFCallError("timeout", str(e) or "timeout", retryable=True)
+            except httpx.HTTPError as e:
+                raise HFCallError("network", str(e) or type(e).__name__, retryable=True)
+        self._decode_response(resp.status_code, resp.text, resp.json)
+        return time.perf_counter() - t0
+
+    # ===== 연결 풀 =====
+    def _get_async_client(self) -> "httpx.AsyncClient":
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Content-Type": "application/json",
+                },
+                timeout=self.timeout_s,
+                limits=httpx.Limits(
+                    max_connections=self.pool_size,
+                    max_keepalive_connections=self.pool_size,
+                    keepalive_expiry=self.pool_keepalive_s,
+                ),
+                http2=self.http2,
             )
+        return self._async_client
+
+    async def aclose(self) -> None:
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+        self._session.close()
+
+    def pool_info(self) -> Dict[str, Any]:
+        info = dict(self.pool_stats)
+        info.update(
+            {
+                "async": httpx is not None,
+                "http2": self.http2,
+                "pool_size": self.pool_size,
+            }
+        )
+        # httpx는 연결 수를 공개 API로 주지 않으므로 가능한 경우에만 표시
+        try:
+            conns = self._async_client._transport._pool.connections
+            info["connections"] = len(conns)
+            info["idle_connections"] = sum(1 for c in conns if c.is_idle())
+        except Exception:
+            pass
+        return info
+
+    def _count(self, outcome: str) -> None:
+        with self._outcomes_lock:
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+
+    def resilience_stats(self) -> Dict[str, Any]:
+        return {
+            "lb_strategy": self.endpoints.strategy,
+            "endpoints": self.endpoints.stats(),
+            "retry_budget": self.retry_budget.stats(),
+            "latency": self.latency.stats(),
+            "outcomes": dict(self.outcomes),
+        }
 
-            if resp.status_code != 200:
-                raise RuntimeError(f"HF error {resp.status_code}: {resp.text}")
+    def _call_hf_endpoint_batch(self, prompts: List[str]) -> List[Any]:
+        """
+        여러 프롬프트를 한 번의 Endpoint 호출로 전송 (inputs에 리스트 전달).
+        반환값은 prompts와 같은 길이의 리스트이며, 각 원소는 _extract_output_text가
+        처리할 수 있는 형태. 호출 자체가 실패하면 모든 원소가 {"error": ...}.
+        """
+        if len(prompts) == 1:
+            return [self._call_hf_endpoint(prompts[0])]
+        return self._split_batch_response(self._call_hf_endpoint(prompts), len(prompts))
 
-            return resp.json()
+    async def _acall_hf_endpoint_batch(self, prompts: List[str]) -> List[Any]:
+        if len(prompts) == 1:
+            return [await self._acall_hf_endpoint(prompts[0])]
+        return self._split_batch_response(await self._acall_hf_endpoint(prompts), len(prompts))
 
-        except Exception as e:
-            # 네트워크 타임아웃 등
-            return {"error": str(e)}
+    @staticmethod
+    def _split_batch_response(data: Any, n: int) -> List[Any]:
+        if isinstance(data, dict) and "error" in data:
+            return [data] * n
+
+        # 배치 응답: [[{"generated_text": ...}], ...] 또는 [{"generated_text": ...}, ...]
+        if isinstance(data, list) and len(data) == n:
+            return data
+
+        err = {
+            "error": f"unexpected batch response (expected {n} items)",
+            "error_kind": "invalid_response",
+        }
+        return [err] * n
 
     def _extract_output_text(self, data: Any) -> str:
         """
@@ -85,6 +513,60 @@ class MistralClassifier:
 
         return str(data)
 
+    @staticmethod
+    def _extract_details(data: Any) -> Dict[str, Any]:
+        """TGI details (tokens / top_tokens, 생성 토큰별 logprob). 없으면 {}"""
+        if isinstance(data, list) and data:
+            data = data[0]
+        if isinstance(data, dict) and isinstance(data.get("details"), dict):
+            return data["details"]
+        return {}
+
+    def _code_score(self, code: str, details: Dict[str, Any]) -> Union[float, None]:
+        """
+        첫 (공백이 아닌) 생성 토큰에서 code의 확률.
+        top_tokens가 있으면 라벨 코드 후보들끼리 정규화, 없으면 선택된 토큰의 exp(logprob)
+        """
+        tokens = details.get("tokens") or []
+        top = details.get("top_tokens") or []
+        for i, tok in enumerate(tokens):
+            if not str(tok.get("text", "")).strip():
+                continue
+            probs: Dict[str, float] = {}
+            for cand in top[i] if i < len(top) else []:
+                c = str(cand.get("text", "")).strip().upper()
+                if c in LABEL_CODES and cand.get("logprob") is not None:
+                    probs[c] = probs.get(c, 0.0) + math.exp(cand["logprob"])
+            if probs.get(code):
+                return probs[code] / sum(probs.values())
+            if tok.get("logprob") is not None:
+                return math.exp(tok["logprob"])
+            return None
+        return None
+
+    def _derive_code(self, output: str, details: Dict[str, Any]):
+        """LABEL_PROTOCOL=code 응답 -> (Classification, Confidence, 확률 또는 None)"""
+        text = output.strip()
+        code = text[:1].upper()
+        if code not in LABEL_CODES or (len(text) > 1 and text[1].isalpha()):
+            # 코드 대신 라벨 이름 등으로 답함 -> 기존 방식으로 판별
+            self.label_stats["off_protocol"] += 1
+            return (*self._derive_classification(output), None)
+
+        self.label_stats["code"] += 1
+        score = self._code_score(code, details)
+        if score is None:
+            return LABEL_CODES[code], "high", None
+
+        self.label_stats["scored"] += 1
+        if score >= self.conf_high:
+            confidence = "high"
+        elif score >= self.conf_medium:
+            confidence = "medium"
+        else:
+            confidence = "low"
+        return LABEL_CODES[code], confidence, score
+
     def _derive_classification(self, output: str) -> str:
         """
         모델의 응답(output)을 분석하여 (Classification, Confidence) 반환.
@@ -119,12 +601,20 @@ class MistralClassifier:
         # 5. 알 수 없음 -> Normal로 처리 (서비스 장애 방지)
         return "Normal", "low"
 
-    # ===== 외부에서 사용하는 메인 메서드 =====
-    def predict(self, method: str, path: str, body: str = "") -> Dict[str, Any]:
+    def build_prompt(self, method: str, path: str, body: str = "", compacted: bool = False) -> str:
+        """
+        (method, path, body)로 모델 프롬프트 구성.
+        compacted=True: body가 이미 압축된 텍스트 (본문 chunk 등) -> 다시 압축/디코딩하지 않음
+        """
         session_text = f"요청1: {method} {path}"
 
-        if body and str(body).strip() not in ["nan", "", "None", "null"]:
-            session_text += f"\n본문: {str(body)[:1500]}"
+        # 세션 텍스트(method=SESSION)는 server.build_session_text에서 요청별로 이미 압축됨
+        if compacted or method == "SESSION":
+            body_text = str(body).strip()
+        else:
+            body_text = self.compactor.compact(body)
+        if body_text and body_text not in ["nan", "", "None", "null"]:
+            session_text += f"\n본문: {body_text}"
 
         system_msg = """당신은 보수적인 웹 방화벽 보안 분석가입니다.
 명확한 공격 패턴이 있을 때만 공격으로 분류하세요.
@@ -136,24 +626,44 @@ class MistralClassifier:
 - Code Injection: 명백한 코드 실행 시도 (eval, exec, system, <?php 등)
 - Path Traversal: 명백한 디렉토리 탐색 (../, ../../etc/passwd 등)"""
 
-        user_msg = f"""세션 정보:
+        if self.label_protocol == "code":
+            codes = ", ".join(f"{c}={name.split(' (')[0]}" for c, name in LABEL_CODES.items())
+            user_msg = f"""세션 정보:
+{session_text}
+
+위 세션의 분류를 다음 코드 중 하나로만 답변하세요 (코드 한 글자만, 설명 없이):
+{codes}"""
+        else:
+            user_msg = f"""세션 정보:
 {session_text}
 
 위 세션의 분류를 다음 중 하나로만 답변하세요:
 Normal, SQL Injection, Code Injection, Path Traversal"""
 
-        prompt = f"<s>[INST] {system_msg}\n\n{user_msg} [/INST]"
+        return f"<s>[INST] {system_msg}\n\n{user_msg} [/INST]"
 
+    def parse_response(self, hf_resp: Any) -> Dict[str, Any]:
+        """Endpoint 응답 하나를 classification/confidence/raw_response로 변환"""
         try:
-            hf_resp = self._call_hf_endpoint(prompt)
             output = self._extract_output_text(hf_resp)
-            classification, confidence = self._derive_classification(output)
+            score = None
+            if self.label_protocol == "code" and not (isinstance(hf_resp, dict) and "error" in hf_resp):
+                classification, confidence, score = self._derive_code(output, self._extract_details(hf_resp))
+            else:
+                classification, confidence = self._derive_classification(output)
 
-            return {
+            result = {
                 "classification": classification,
                 "confidence": confidence,
                 "raw_response": output.strip(),
             }
+            if score is not None:
+                result["confidence_score"] = round(score, 4)
+            # Endpoint 호출 실패(fail-open)는 실제 모델 판정과 구분할 수 있도록 표시
+            if isinstance(hf_resp, dict) and "error" in hf_resp:
+                result["hf_error"] = str(hf_resp["error"])
+                result["hf_error_kind"] = hf_resp.get("error_kind", "other")
+            return result
 
         except Exception as e:
             return {
@@ -161,3 +671,30 @@ Normal, SQL Injection, Code Injection, Path Traversal"""
                 "confidence": "low",
                 "raw_response": f"System Error: {e}",
             }
+
+    # ===== 외부에서 사용하는 메인 메서드 =====
+    def predict(self, method: str, path: str, body: str = "") -> Dict[str, Any]:
+        prompt = self.build_prompt(method, path, body)
+        return self.parse_response(self._call_hf_endpoint(prompt))
+
+    def call_batch(self, prompts: List[str]) -> List[Any]:
+        """프롬프트 여러 개를 한 번의 Endpoint 호출로 보내 원시 응답 리스트 반환 (parse_response로 변환)"""
+        return self._call_hf_endpoint_batch(prompts)
+
+    def predict_prompts(self, prompts: List[str]) -> List[Dict[str, Any]]:
+        """build_prompt로 만든 프롬프트 여러 개를 한 번의 Endpoint 호출로 분류"""
+        return [self.parse_response(r) for r in self.call_batch(prompts)]
+
+    # ===== async API (서버용, keep-alive 연결 풀) =====
+    async def acall_batch(self, prompts: List[str]) -> List[Any]:
+        """call_batch의 async 버전. httpx가 없으면 워커 스레드에서 sync 호출"""
+        if httpx is None:
+            return await asyncio.to_thread(self.call_batch, prompts)
+        return await self._acall_hf_endpoint_batch(prompts)
+
+    async def apredict(self, method: str, path: str, body: str = "") -> Dict[str, Any]:
+        prompt = self.build_prompt(method, path, body)
+        return self.parse_response((await self.acall_batch([prompt]))[0])
+
+    async def apredict_prompts(self, prompts: List[str]) -> List[Dict[str, Any]]:
+        return [self.parse_response(r) for r in await self.acall_batch(prompts)]
@@ -0,0 +1,295 @@
+# payload_compaction.py
+"""
+프롬프트에 넣을 요청 본문을 토큰 예산에 맞게 압축 (앞부분만 자르는 대신)
+
+1. URL 디코딩은 한 번만 (이중 인코딩은 그대로 남겨 모델이 보게 함)
+2. 본문을 조각(segment)으로 나눔: form(k=v), JSON(leaf 경로=값), 그 외(줄 단위)
+3. 반복 파라미터(같은 키 여러 번), 긴 JSON 배열, 긴 불투명 문자열(base64/hex), 같은 문자 반복을 축약
+   - base64가 공격 문자열로 디코딩되면 축약하지 않고 디코딩 결과를 보여줌
+4. 공격 의심 조각을 먼저, 나머지는 원래 순서대로 예산이 찰 때까지 채움
+
+토큰 수는 tokenizer 없이 UTF-8 바이트 / 4 로 추정 (영문 BPE 평균에 가까운 값).
+"""
+
+import base64
+import binascii
+import json
+import math
+import re
+import threading
+from typing import Any, Dict, List, Tuple
+from urllib.parse import parse_qsl, unquote
+
+EMPTY_BODY_VALUES = ["nan", "", "None", "null"]
+
+# 조각을 앞으로 올릴 공격 의심 패턴 (분류용이 아니라 순서/보존용이므로 넓게 잡음)
+SUSPICIOUS_RE = re.compile(
+    r"union\s+(all\s+)?select|select\s+.+\s+from|\bor\s+'?\d+'?\s*=\s*'?\d+|'\s*or\s+'|"
+    r"sleep\s*\(|benchmark\s*\(|waitfor\s+delay|drop\s+table|information_schema|--\s|#\s*$|"
+    r"\.\./|\.\.\\\\|/etc/(passwd|shadow)|c:\\\\windows|"
+    r"<\?php|<script|javascript:|onerror\s*=|\beval\s*\(|\bexec\s*\(|\bsystem\s*\(|"
+    r"passthru|shell_exec|\$\{jndi:|\$\(|`|;\s*(cat|ls|id|wget|curl)\b|\|\s*(cat|ls|id)\b",
+    re.I,
+)
+# 긴 base64(표준 / URL-safe) 또는 hex 연속 문자열 (두 알파벳을 섞은 문자열은 base64가 아님)
+OPAQUE_RE = re.compile(r"[A-Za-z0-9+/]{64,}={0,2}|[A-Za-z0-9_-]{64,}={0,2}")
+OPAQUE_SEP_RE = re.compile(r"[+/_-]")
+WORDLIKE_RE = re.compile(r"\d+|[a-z]+|[A-Z]+|[A-Z][a-z]+")
+REPEAT_CHAR_RE = re.compile(r"(.)\1{15,}", re.S)
+
+MAX_JSON_ARRAY_ITEMS = 3
+MAX_REPEATED_VALUES = 2
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text.encode("utf-8", "surrogatepass")) / 4) if text else 0
+
+
+def _suspicious(text: str) -> bool:
+    """SUSPICIOUS_RE 검사 ('+'로 인코딩된 공백(1+UNION+SELECT)도 공백으로 보고 검사)"""
+    return bool(SUSPICIOUS_RE.search(text)) or ("+" in text and bool(SUSPICIOUS_RE.search(text.replace("+", " "))))
+
+
+def _looks_like_text(run: str) -> bool:
+    """
+    구분자(+ / _ -)로 나뉜 단어 나열인지 (username+password+FROM+users 같은 인코딩된 문장)
+    실제 base64 조각은 대소문자/숫자가 섞여 있어 단어처럼 보이는 조각이 드묾
+    """
+    pieces = [p for p in OPAQUE_SEP_RE.split(run) if p]
+    if len(pieces) < 3:
+        return False
+    wordlike = sum(1 for p in pieces if WORDLIKE_RE.fullmatch(p))
+    return wordlike / len(pieces) >= 0.7
+
+
+def _decode_base64(run: str) -> str:
+    """base64로 디코딩되고 대부분 출력 가능한 문자면 디코딩 결과, 아니면 빈 문자열"""
+    try:
+        raw = base64.b64decode(run + "=" * (-len(run) % 4), altchars=b"-_" if "-" in run or "_" in run else None)
+    except (binascii.Error, ValueError):
+        return ""
+    text = raw.decode("utf-8", "replace")
+    # 디코딩 실패 자리(U+FFFD)는 출력 가능 문자로 세지 않음 (임의 바이너리가 텍스트로 통과하지 않도록)
+    printable = sum(1 for c in text if (c.isprintable() and c != "\ufffd") or c in "\r\n\t")
+    return text if text and printable / len(text) > 0.9 else ""
+
+
+class PayloadCompactor:
+    """요청 본문 -> 토큰 예산 안의 압축 텍스트 (+ 절감량 통계)"""
+
+    def __init__(self, budget_tokens: int = 384) -> None:
+        self.budget_tokens = max(16, int(budget_tokens))
+        self._lock = threading.Lock()
+
+        self.calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.truncated = 0  # 예산 때문에 조각을 버리거나 자른 호출 수
+        self.collapsed = 0  # 반복/불투명/배열 축약 횟수
+
+    # ===== 조각 나누기 =====
+    @staticmethod
+    def _looks_json(text: str) -> bool:
+        t = text.lstrip()
+        return t[:1] in ("{", "[")
+
+    @staticmethod
+    def _looks_form(text: str) -> bool:
+        return "=" in text and "\n" not in text.strip() and " " not in text.strip()[:200]
+
+    def _json_segments(self, value: Any, prefix: str, out: List[str], n: List[int]) -> None:
+        if isinstance(value, dict):
+            for k, v in value.items():
+                self._json_segments(v, f"{prefix}.{k}" if prefix else str(k), out, n)
+        elif isinstance(value, list):
+            for i, v in enumerate(value[:MAX_JSON_ARRAY_ITEMS]):
+                self._json_segments(v, f"{prefix}[{i}]", out, n)
+            if len(value) > MAX_JSON_ARRAY_ITEMS:
+                # 생략한 원소 중 의심스러운 것은 살림
+                rest = value[MAX_JSON_ARRAY_ITEMS:]
+                for i, v in enumerate(rest, start=MAX_JSON_ARRAY_ITEMS):
+                    if SUSPICIOUS_RE.search(json.dumps(v, ensure_ascii=False)):
+                        self._json_segments(v, f"{prefix}[{i}]", out, n)
+                out.append(f"{prefix}[...]=(+{len(rest)} items)")
+                n[0] += 1
+        else:
+            out.append(f"{prefix}={value}" if prefix else str(value))
+
+    def _form_segments(self, text: str) -> Tuple[List[str], int]:
+        pairs = parse_qsl(text, keep_blank_values=True)  # 여기서 한 번 디코딩
+        order: List[str] = []
+        values: Dict[str, List[str]] = {}
+        for k, v in pairs:
+            if k not in values:
+                order.append(k)
+                values[k] = []
+            values[k].append(v)
+
+        out, collapsed = [], 0
+        for k in order:
+            vs = values[k]
+            distinct = list(dict.fromkeys(vs))
+            if len(distinct) == 1 and len(vs) > 1:
+                out.append(f"{k}={distinct[0]} (x{len(vs)})")
+                collapsed += 1
+                continue
+            keep = distinct[:MAX_REPEATED_VALUES] + [
+                v for v in distinct[MAX_REPEATED_VALUES:] if SUSPICIOUS_RE.search(v)
+            ]
+            out.extend(f"{k}={v}" for v in keep)
+            if len(distinct) > len(keep):
+                out.append(f"{k}=(+{len(distinct) - len(keep)} more values)")
+                collapsed += 1
+        return out, collapsed
+
+    def _segments(self, text: str) -> Tuple[List[str], str, int]:
+        """(조각 목록, 합칠 때 구분자, 축약 횟수)"""
+        if self._looks_json(text):
+            try:
+                value = json.loads(text)
+            except ValueError:
+                value = None
+            if isinstance(value, (dict, list)):
+                out: List[str] = []
+                n = [0]
+                self._json_segments(value, "", out, n)
+                return out, ", ", n[0]
+
+        if self._looks_form(text):
+            out, n = self._form_segments(text)
+            return out, "&", n
+
+        return [line for line in unquote(text).splitlines() if line.strip()], "\n", 0
+
+    # ===== 값 축약 =====
+    def _collapse_value(self, seg: str) -> Tuple[str, int]:
+        n = [0]
+
+        def opaque(m: "re.Match") -> str:
+            run = m.group(0)
+            # '+'/'/' 등으로 이어진 평문(인코딩된 SQL 등)은 축약하지 않음
+            if _looks_like_text(run) or _suspicious(run):
+                return run
+            decoded = _decode_base64(run)
+            if decoded and _suspicious(decoded):
+                return f"<base64: {decoded[:200]}>"
+            n[0] += 1
+            return f"<opaque {len(run)} chars>"
+
+        def repeat(m: "re.Match") -> str:
+            n[0] += 1
+            return f"{m.group(1)}x{len(m.group(0))}"
+
+        seg = OPAQUE_RE.sub(opaque, seg)
+        seg = REPEAT_CHAR_RE.sub(repeat, seg)
+        return seg, n[0]
+
+    @staticmethod
+    def _window(seg: str, max_chars: int) -> str:
+        """의심 패턴이 있으면 그 주변을, 없으면 앞부분을 max_chars 만큼"""
+        if len(seg) <= max_chars:
+            return seg
+        m = SUSPICIOUS_RE.search(seg)
+        start = 0 if m is None else max(0, min(m.start() - max_chars // 4, len(seg) - max_chars))
+        return ("…" if start else "") + seg[start : start + max_chars] + "…"
+
+    def _prepare(self, text: str) -> Tuple[List[Tuple[int, int, str]], str, int]:
+        """조각 나누기 + 값 축약 -> ([(의심 0 / 아님 1, 원래 순서, 조각)], 구분자, 축약 횟수)"""
+        segments, sep, collapsed = self._segments(text)
+        scored = []
+        for i, seg in enumerate(segments):
+            seg, n = self._collapse_value(seg)
+            collapsed += n
+            scored.append((0 if _suspicious(seg) else 1, i, seg))
+        return scored, sep, collapsed
+
+    # ===== 메인 =====
+    def compact(self, body: Any, budget_tokens: int = 0) -> str:
+        text = str(body or "").strip()
+        if text in EMPTY_BODY_VALUES:
+            return ""
+        budget = budget_tokens or self.budget_tokens
+        in_tokens = estimate_tokens(text)
+
+        scored, sep, collapsed = self._prepare(text)
+        # 의심 조각 먼저, 같은 그룹 안에서는 원래 순서
+        scored.sort()
+
+        out: List[str] = []
+        used, dropped = 0, 0
+        sep_tokens = estimate_tokens(sep)
+        for _, _, seg in scored:
+            remaining = budget - used - (sep_tokens if out else 0)
+            if estimate_tokens(seg) > remaining:
+                dropped += 1
+                if remaining < 8:
+                    continue
+                # 남은 예산만큼만 (바이트/4 추정이므로 문자 수는 보수적으로)
+                seg = self._window(seg, remaining * 3)
+            used += estimate_tokens(seg) + (sep_tokens if out else 0)
+            out.append(seg)
+        if dropped:
+            out.append(f"…(+{dropped} segments omitted)")
+        result = sep.join(out)
+
+        with self._lock:
+            self.calls += 1
+            self.input_tokens += in_tokens
+            self.output_tokens += estimate_tokens(result)
+            self.collapsed += collapsed
+            if dropped:
+                self.truncated += 1
+        return result
+
+    def split(self, body: Any, budget_tokens: int = 0, overlap_chars: int = 128) -> List[str]:
+        """
+        압축해도 예산을 넘는 본문 -> 예산 이하의 압축 조각 묶음(chunk) 목록 (원래 순서 유지).
+        조각 하나가 예산보다 크면 overlap_chars 만큼 겹치는 창(window)으로 나눠
+        경계에 걸친 공격 문자열도 어느 한 창에는 온전히 들어가게 함.
+        예산 안에 들어가면 조각 하나짜리 목록 (이 경우는 compact()를 그대로 쓰면 됨).
+        """
+        text = str(body or "").strip()
+        if text in EMPTY_BODY_VALUES:
+            return [""]
+        budget = budget_tokens or self.budget_tokens
+        scored, sep, _ = self._prepare(text)
+        segments = [seg for _, _, seg in scored]
+        if estimate_tokens(sep.join(segments)) <= budget:
+            return [sep.join(segments)]
+
+        # 바이트/4 추정이므로 창 크기(문자 수)는 보수적으로 예산 x 3
+        window = budget * 3
+        step = max(1, window - max(0, min(overlap_chars, window // 2)))
+        pieces: List[str] = []
+        for seg in segments:
+            if estimate_tokens(seg) <= budget:
+                pieces.append(seg)
+                continue
+            for start in range(0, len(seg), step):
+                pieces.append(seg[start : start + window])
+                if start + window >= len(seg):
+                    break
+
+        chunks: List[str] = []
+        current: List[str] = []
+        for piece in pieces:
+            if current and estimate_tokens(sep.join(current + [piece])) > budget:
+                chunks.append(sep.join(current))
+                current = []
+            current.append(piece)
+        if current:
+            chunks.append(sep.join(current))
+        return chunks
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            saved = self.input_tokens - self.output_tokens
+            return {
+                "budget_tokens": self.budget_tokens,
+                "calls": self.calls,
+                "input_tokens": self.input_tokens,
+                "output_tokens": self.output_tokens,
+                "saved_ratio": round(saved / self.input_tokens, 3) if self.input_tokens else 0.0,
+                "truncated": self.truncated,
+                "collapsed": self.collapsed,
+            }
@@ -0,0 +1,170 @@
+# resilience.py
+"""
+HF Endpoint 호출용 복원력(resilience) 구성요소 (스레드 안전)
+
+- RetryBudget:     성공한 호출 비율만큼만 재시도를 허용 (재시도 폭주 방지)
+- CircuitBreaker:  연속 실패 시 빠르게 차단(open) -> cooldown 후 시험 호출(half_open) -> 복구(closed)
+- LatencyTracker:  최근 호출 지연의 분위수(p95) -> hedged request 지연 기준
+- backoff_s:       full-jitter 지수 백오프
+"""
+
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+
+def backoff_s(attempt: int, base_s: float = 0.2, cap_s: float = 5.0) -> float:
+    """attempt(1부터)에 대한 full-jitter 백오프 시간"""
+    return random.uniform(0, min(cap_s, base_s * (2 ** (attempt - 1))))
+
+
+class RetryBudget:
+    """
+    토큰 버킷 형태의 재시도 예산.
+    - 성공 1회마다 ratio 만큼 토큰 적립 (최대 max_tokens)
+    - 재시도 1회마다 토큰 1개 소모, 부족하면 재시도하지 않음
+    - min_per_s: 트래픽이 적을 때도 초당 이 정도는 재시도 허용
+    """
+
+    def __init__(self, ratio: float = 0.2, min_per_s: float = 1.0, max_tokens: float = 20.0) -> None:
+        self.ratio = float(ratio)
+        self.min_per_s = float(min_per_s)
+        self.max_tokens = float(max_tokens)
+        self._tokens = self.max_tokens
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+        self.retries = 0
+        self.denied = 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.max_tokens, self._tokens + (now - self._last) * self.min_per_s)
+        self._last = now
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                self.retries += 1
+                return True
+            self.denied += 1
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._refill()
+            return {"tokens": round(self._tokens, 2), "retries": self.retries, "denied": self.denied}
+
+
+class CircuitBreaker:
+    """
+    closed    : 정상. 연속 실패가 failure_threshold 에 도달하면 open
+    open      : cooldown_s 동안 호출하지 않고 즉시 실패 (fail fast)
+    half_open : cooldown 후 시험 호출 1개만 허용. 성공하면 closed, 실패하면 다시 open
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, cooldown_s: float = 15.0) -> None:
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.cooldown_s = float(cooldown_s)
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_inflight = False
+        self._lock = threading.Lock()
+
+        self.opens = 0
+        self.short_circuited = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _maybe_half_open(self) -> None:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.cooldown_s:
+            self._state = self.HALF_OPEN
+            self._probe_inflight = False
+
+    def allow(self) -> bool:
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and not self._probe_inflight:
+                self._probe_inflight = True
+                return True
+            self.short_circuited += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_inflight = False
+
+    def release_probe(self) -> None:
+        """결과 없이 끝난 호출(hedge 취소 등) -> half_open 시험 호출 자리만 반납"""
+        with self._lock:
+            self._probe_inflight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.opens += 1
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probe_inflight = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "opens": self.opens,
+            "short_circuited": self.short_circuited,
+        }
+
+
+class LatencyTracker:
+    """최근 window 개 호출 지연(초)의 분위수"""
+
+    def __init__(self, window: int = 200) -> None:
+        self._samples: deque = deque(maxlen=max(1, int(window)))
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def count(self) -> int:
+        return len(self._samples)
+
+    def quantile(self, q: float) -> Optional[float]:
+        with self._lock:
+            if not self._samples:
+                return None
+            data = sorted(self._samples)
+        idx = min(len(data) - 1, max(0, int(round(q * (len(data) - 1)))))
+        return data[idx]
+
+    def stats(self) -> Dict[str, Any]:
+        p50, p95 = self.quantile(0.5), self.quantile(0.95)
+        return {
+            "p50_s": round(p50, 3) if p50 is not None else None,
+            "p95_s": round(p95, 3) if p95 is not None else None,
+        }
@@ -1,23 +1,114 @@
 # server.py (single-log first, compatible with sessionizing.js + model_inference.py)
 
+import json
 import os
+import time
+import uuid
 import asyncio
 import warnings
-from typing import List, Optional
 
-from fastapi import FastAPI, HTTPException
+try:
+    import fcntl
+except ImportError:  # pragma: no cover (Windows)
+    fcntl = None
+from dataclasses import replace
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 
+import metrics
+from admission import AdmissionController, DeadlineExceeded, Overloaded, RequestBudget, current_budget
+from batcher import MicroBatcher
+from chunked_classify import ChunkedClassifier
+from fast_path import FastPathRouter
+from job_runner import JobRunner
+from job_store import JobStore
+from lanes import BACKFILL, INTERACTIVE, LaneScheduler, parse_lane_map, resolve_lane
+from local_model import LocalCascade, LocalModel
 from model_inference import MistralClassifier
+from payload_compaction import estimate_tokens
+from session_state import SessionStateStore, verdict_rank
+from shadow import ShadowMirror
+from shared_limiter import SharedTokenBucket
+from timing import RequestTimings, current_timings, emit_trace, stage
+from verdict_cache import VerdictCache, fingerprint, is_cacheable
+from verdict_store import VerdictStore
+from warmup import EndpointWarmer
 
 warnings.filterwarnings("ignore", category=FutureWarning)
 
 SESSION_MAX_REQ_DEFAULT = "20"  # 세션 내 요청 최대 반영 수(다중 요청 들어올 때만 사용)
+CLASSIFY_WORKERS_DEFAULT = "8"  # blocking 작업(디스크 저장소 등)을 돌릴 워커 스레드 수
+CLASSIFY_CONCURRENCY_DEFAULT = "8"  # 동시에 진행할 수 있는 HF 호출 수
+ADMISSION_MAX_PENDING_DEFAULT = "256"  # HF 경로에 들어와 있을 수 있는 최대 요청 수 (초과 시 429)
+BATCH_MAX_ITEMS_DEFAULT = "1000"  # /api/classify/batch 한 번에 받을 최대 item 수
+HF_BATCH_MAX_SIZE_DEFAULT = "1"  # HF Endpoint 1회 호출에 묶을 최대 프롬프트 수 (1 = 배치 끔)
+HF_BATCH_MAX_WAIT_MS_DEFAULT = "10"  # 배치를 모으기 위해 기다리는 최대 시간(ms)
+VERDICT_CACHE_SIZE_DEFAULT = "10000"  # 메모리 판정 캐시 최대 항목 수 (0 = 끔)
+VERDICT_CACHE_TTL_S_DEFAULT = "3600"  # 판정 캐시 유효 시간(초)
+VERDICT_STORE_MAX_DEFAULT = "200000"  # 디스크 판정 저장소 최대 항목 수
+VERDICT_STORE_TTL_S_DEFAULT = "0"  # 디스크 판정 유효 시간(초, 0 = 만료 없음)
+LOCAL_MODEL_NORMAL_MIN_DEFAULT = "0.98"  # 로컬 모델 P(Normal)이 이 이상이면 로컬 판정
+LOCAL_MODEL_ATTACK_MIN_DEFAULT = "0.99"  # 로컬 모델 공격 확률이 이 이상이면 로컬 판정
+SESSION_STATE_MAX_DEFAULT = "50000"  # session_id별 증분 분류 상태 최대 수 (0 = 끔)
+SESSION_IDLE_TTL_S_DEFAULT = "1800"  # 이 시간(초) 동안 요청이 없는 세션 상태는 제거
+SESSION_SUMMARY_LINES_DEFAULT = "8"  # 세션 요약에 남길 최근 요청 줄 수
+SESSION_BODY_TOKEN_BUDGET_DEFAULT = "80"  # 세션 텍스트에서 요청 하나의 본문 토큰 예산
+OVERSIZE_MAX_CHUNKS_DEFAULT = "8"  # 예산보다 큰 본문을 나눠 분류할 때 요청당 최대 HF 호출 수 (0 = 끔, 앞부분만 사용)
+OVERSIZE_CHUNK_OVERLAP_DEFAULT = "128"  # 큰 조각을 창으로 나눌 때 겹치는 문자 수
+JOB_STORE_PATH_DEFAULT = ""  # 비동기 작업(job) 상태/결과 저장 파일 (비우면 SHARED_STATE_DIR/jobs.db)
+JOB_CONCURRENCY_DEFAULT = "32"  # job item을 동시에 분류하는 수 (HF 호출 수는 CLASSIFY_CONCURRENCY가 제한)
+JOB_MAX_ITEMS_DEFAULT = "100000"  # /api/jobs 한 번에 받을 최대 item 수
+JOB_TTL_S_DEFAULT = "86400"  # 끝난 job을 보관하는 시간(초, 0 = 계속 보관)
+JOB_RETRY_MAX_DEFAULT = "3"  # HF 장애(fail_open)로 분류 못 한 job item을 다시 시도하는 횟수 (넘으면 error로 기록)
+JOB_RETRY_BACKOFF_S_DEFAULT = "5"  # 첫 재시도까지 대기(초, 재시도마다 두 배)
+LANE_WEIGHTS_DEFAULT = "interactive=8,backfill=1"  # 두 lane이 모두 밀려 있을 때 HF 슬롯 배분 비율
+LANE_MAX_CONCURRENCY_DEFAULT = "interactive=0,backfill=6"  # lane별 최대 동시 HF 호출 수 (0 = CLASSIFY_CONCURRENCY까지)
+SHADOW_SAMPLE_RATE_DEFAULT = "0.05"  # SHADOW_ENDPOINT_URL 설정 시 후보 Endpoint로 미러링할 /api/classify 비율
+SHADOW_MAX_INFLIGHT_DEFAULT = "4"  # 동시에 진행할 수 있는 shadow 호출 수 (초과분은 버림)
+WARMUP_ENABLED_DEFAULT = "1"  # 기동 시 Endpoint가 SLO 안에 응답할 때까지 probe (0 = 바로 ready)
+WARMUP_SLO_MS_DEFAULT = "3000"  # probe가 이 시간 안에 응답하면 warm
+WARMUP_PROBE_TIMEOUT_S_DEFAULT = "60"  # probe 1회 타임아웃 (scale-to-zero 기동 대기 포함)
+WARMUP_INTERVAL_S_DEFAULT = "5"  # warm-up probe 간격(초)
+KEEPWARM_INTERVAL_S_DEFAULT = "0"  # 트래픽이 예상되는 동안 keep-warm probe 간격(초, 0 = 끔)
+KEEPWARM_IDLE_S_DEFAULT = "1800"  # 마지막 요청 후 이 시간(초)까지는 트래픽이 예상된다고 봄
+KEEPWARM_HOURS_DEFAULT = ""  # 항상 트래픽이 예상되는 시간대 (로컬 시각, 예: "8-20", 비우면 없음)
+WARMUP_COLD_AFTER_DEFAULT = "3"  # warm한 Endpoint를 cold로 볼 연속 실패/느린 keep-warm probe 수
+WARMUP_RECHECK_IDLE_S_DEFAULT = "900"  # 이 시간(초) 동안 warm함을 확인 못 하면 다음 요청에서 다시 probe (0 = 끔)
+WORKERS_DEFAULT = "1"  # uvicorn 워커 프로세스 수 (CLASSIFY_CONCURRENCY / LANE_MAX_CONCURRENCY는 워커 전체 합계)
+HF_RATE_LIMIT_RPS_DEFAULT = "0"  # 모든 워커가 함께 지키는 초당 HF 호출 수 (0 = 제한 없음)
+HF_RATE_LIMIT_BURST_DEFAULT = "0"  # 순간적으로 몰아서 보낼 수 있는 HF 호출 수 (0 = 초당 호출 수와 같게)
+# 워커 간 공유 상태 파일 위치 (속도 제한, 판정 저장소, job 저장소/담당 lock)
+# 실행한 디렉터리(소스 트리)에 상태 파일이 생기지 않도록 사용자 state 디렉터리 (Docker 이미지는 /app/data)
+SHARED_STATE_DIR_DEFAULT = os.path.join(os.getenv("XDG_STATE_HOME") or os.path.expanduser("~/.local/state"), "elk-llm")
 
 app = FastAPI()
 clf: Optional[MistralClassifier] = None
 ready: bool = False
-lock = asyncio.Lock()
+
+# HF 호출은 async 연결 풀(MistralClassifier.acall_batch)로 이벤트 루프에서 직접 await하고,
+# 동시 호출 수는 lane별 스케줄러로 제한한다 (backfill이 밀려 있어도 실시간 요청이 먼저 슬롯을 받음).
+# blocking 작업은 워커 풀에서 실행 (/health, /ready는 부하 중에도 응답 가능)
+executor: Optional[ThreadPoolExecutor] = None
+lanes: Optional[LaneScheduler] = None
+admission: Optional[AdmissionController] = None
+batcher: Optional[MicroBatcher] = None
+cache: Optional[VerdictCache] = None
+store: Optional[VerdictStore] = None  # VERDICT_STORE_PATH 설정 시에만 사용
+router: Optional[FastPathRouter] = None
+cascade: Optional[LocalCascade] = None  # LOCAL_MODEL_PATH 설정 시에만 사용
+sessions: Optional[SessionStateStore] = None  # session_id가 있는 요청의 증분 분류 상태
+chunker: Optional[ChunkedClassifier] = None  # 토큰 예산보다 큰 본문의 chunk 병렬 분류
+jobs: Optional[JobRunner] = None  # /api/jobs 비동기 대량 분류
+shadow: Optional[ShadowMirror] = None  # SHADOW_ENDPOINT_URL 설정 시에만 사용
+warmer: Optional[EndpointWarmer] = None  # WARMUP_ENABLED=1 이면 Endpoint warm-up / keep-warm
+ratelimit: Optional[SharedTokenBucket] = None  # HF_RATE_LIMIT_RPS 설정 시 워커 간 공유 속도 제한
+processes: int = 1  # WORKERS (이 프로세스가 맡는 몫을 나누는 데 사용)
+_job_lock_file = None  # 재시작 시 남은 job을 이어받는 워커가 잡고 있는 lock 파일
+_resilience_registered = False
 
 
 # ===== 입력 스키마 =====
@@ -26,33 +117,64 @@ class AIItem(BaseModel):
     request_http_request: Optional[str] = ""
     request_body: Optional[str] = ""
     user_agent: Optional[str] = ""
+    # (선택) 응답 코드를 알면 fast-path에서 ConservativeFilter 규칙을 미리 적용
+    status_code: Optional[int] = None
 
 
 class AIRequest(BaseModel):
     session: List[AIItem]
+    # (선택) 세션 식별자. 있으면 이전 호출에서 분류한 요청은 다시 보내지 않고 새 요청만 분류
+    session_id: Optional[str] = None
+    # (선택) 우선순위 lane: interactive | backfill (X-Priority 헤더가 우선)
+    priority: Optional[str] = None
+
+
+class AIBatchRequest(BaseModel):
+    items: List[AIRequest]
+    # (선택) 배치 전체의 lane (기본 backfill)
+    priority: Optional[str] = None
+
+
+class AIJobRequest(BaseModel):
+    items: List[AIRequest]
+    # (선택) job 전체의 lane (기본 backfill)
+    priority: Optional[str] = None
+    # (선택) job이 끝나면 {job_id, status, total, completed, failed}를 POST할 주소
+    callback_url: Optional[str] = None
 
 
 # ===================================================================
 # (옵션) 다중 요청이 들어올 때만 사용하는 "세션 텍스트" 구성
 # - 단일로그 모드에서는 보통 사용하지 않음
 # ===================================================================
-def build_session_text(items: List[AIItem]) -> str:
+def build_session_text(
+    items: List[AIItem], start: int = 1, summary: str = "", repeats: Optional[List[int]] = None
+) -> str:
+    """
+    start:   첫 요청 번호 (증분 분류 시 이전에 분류한 요청 수 + 1)
+    summary: 이전 요청 요약 (SessionState.summary)
+    repeats: items와 같은 순서의 반복 횟수 (같은 요청을 한 줄로 합친 경우)
+    """
     max_req = int(os.getenv("SESSION_MAX_REQ", SESSION_MAX_REQ_DEFAULT))
+    body_budget = int(os.getenv("SESSION_BODY_TOKEN_BUDGET", SESSION_BODY_TOKEN_BUDGET_DEFAULT))
     lines: List[str] = []
+    if summary:
+        lines.extend([summary, "----"])
 
     # model_inference.py 자체가 라벨을 강제하는 프롬프트를 이미 갖고 있으므로
     # 여기서는 과도한 지시문을 넣기보다 "관측 데이터" 위주로만 구성
-    for idx, it in enumerate(items[:max_req], start=1):
+    for idx, it in enumerate(items[:max_req], start=start):
         method = (it.request_http_method or "").strip().upper()
         path = (it.request_http_request or "").strip()
-        body = (it.request_body or "").strip()
+        body = clf.compactor.compact(it.request_body, budget_tokens=body_budget)
         ua = (it.user_agent or "").strip()
 
-        lines.append(f"[{idx}] {method} {path}")
+        n = repeats[idx - start] if repeats else 1
+        lines.append(f"[{idx}] {method} {path}" + (f" (x{n})" if n > 1 else ""))
         if ua:
             lines.append(f"User-Agent: {ua[:120]}")
         if body:
-            lines.append(f"Body: {body[:300]}")
+            lines.append(f"Body: {body}")
         lines.append("----")
 
     return "\n".join(lines)
@@ -61,11 +183,325 @@ def build_session_text(items: List[AIItem]) -> str:
 # ===== FastAPI Startup =====
 @app.on_event("startup")
 async def startup():
-    global clf, ready
+    global clf, ready, executor, lanes, admission, batcher, cache, store, router, cascade, sessions
+    global chunker, jobs, shadow, warmer, ratelimit, processes
+    global _resilience_registered
+    workers = max(1, int(os.getenv("CLASSIFY_WORKERS", CLASSIFY_WORKERS_DEFAULT)))
+    processes = max(1, int(os.getenv("WORKERS", WORKERS_DEFAULT)))
+    shared_dir = os.getenv("SHARED_STATE_DIR") or SHARED_STATE_DIR_DEFAULT
+    # 동시 HF 호출 수는 워커 전체 합계 -> 워커마다 1/N씩
+    concurrency = worker_share(int(os.getenv("CLASSIFY_CONCURRENCY", CLASSIFY_CONCURRENCY_DEFAULT)))
+    lane_caps = parse_lane_map(os.getenv("LANE_MAX_CONCURRENCY", LANE_MAX_CONCURRENCY_DEFAULT), 0)
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="classify")
+    lanes = LaneScheduler(
+        concurrency,
+        weights=parse_lane_map(os.getenv("LANE_WEIGHTS", LANE_WEIGHTS_DEFAULT), 1.0),
+        max_concurrency={lane: worker_share(cap) for lane, cap in lane_caps.items()},
+    )
+    rps = float(os.getenv("HF_RATE_LIMIT_RPS", HF_RATE_LIMIT_RPS_DEFAULT))
+    if rps > 0:
+        ratelimit = SharedTokenBucket(
+            os.path.join(shared_dir, "ratelimit.db"),
+            rate=rps,
+            burst=float(os.getenv("HF_RATE_LIMIT_BURST", HF_RATE_LIMIT_BURST_DEFAULT)),
+        )
+    metrics.register_lanes(lanes, admission_pending=lambda lane: admission.lane_pending[lane])
+    admission = AdmissionController(
+        max_pending=int(os.getenv("ADMISSION_MAX_PENDING", ADMISSION_MAX_PENDING_DEFAULT)),
+        concurrency=concurrency,
+    )
+    metrics.ADMISSION_PENDING.set_function(lambda: admission.pending)
+    batcher = MicroBatcher(
+        dispatch_prompts,
+        max_size=int(os.getenv("HF_BATCH_MAX_SIZE", HF_BATCH_MAX_SIZE_DEFAULT)),
+        max_wait_ms=float(os.getenv("HF_BATCH_MAX_WAIT_MS", HF_BATCH_MAX_WAIT_MS_DEFAULT)),
+    )
+    metrics.QUEUE_DEPTH.set_function(lambda: len(batcher._pending))
+    cache = VerdictCache(
+        max_entries=int(os.getenv("VERDICT_CACHE_SIZE", VERDICT_CACHE_SIZE_DEFAULT)),
+        ttl_s=float(os.getenv("VERDICT_CACHE_TTL_S", VERDICT_CACHE_TTL_S_DEFAULT)),
+    )
+    router = FastPathRouter()
+    cascade = load_cascade()
+    session_max = int(os.getenv("SESSION_STATE_MAX", SESSION_STATE_MAX_DEFAULT))
+    if session_max > 0:
+        sessions = SessionStateStore(
+            max_entries=session_max,
+            idle_ttl_s=float(os.getenv("SESSION_IDLE_TTL_S", SESSION_IDLE_TTL_S_DEFAULT)),
+            summary_lines=int(os.getenv("SESSION_SUMMARY_LINES", SESSION_SUMMARY_LINES_DEFAULT)),
+        )
+        if processes > 1:
+            print("[init] WORKERS > 1: session_id state is per worker (requests of one session may be split)")
+    # 여러 워커가 판정을 나눠 쓰도록 WORKERS > 1 이면 판정 저장소를 기본으로 켬 (SQLite WAL, 파일 공유)
+    store_path = os.getenv("VERDICT_STORE_PATH") or (
+        os.path.join(shared_dir, "verdicts.db") if processes > 1 else None
+    )
+    if store_path:
+        store = VerdictStore(
+            store_path,
+            max_entries=int(os.getenv("VERDICT_STORE_MAX", VERDICT_STORE_MAX_DEFAULT)),
+            ttl_s=float(os.getenv("VERDICT_STORE_TTL_S", VERDICT_STORE_TTL_S_DEFAULT)),
+        )
+
     clf = MistralClassifier()
+    max_chunks = int(os.getenv("OVERSIZE_MAX_CHUNKS", OVERSIZE_MAX_CHUNKS_DEFAULT))
+    if max_chunks > 0:
+        chunker = ChunkedClassifier(max_chunks=max_chunks)
+    shadow = ShadowMirror.from_env(
+        clf._build_payload,
+        clf.parse_response,
+        executor,
+        sample_rate=SHADOW_SAMPLE_RATE_DEFAULT,
+        max_inflight=SHADOW_MAX_INFLIGHT_DEFAULT,
+    )
+    if shadow is not None:
+        print("[init] shadow mode:", shadow.endpoint_url, "sample_rate =", shadow.sample_rate)
+    if not _resilience_registered:
+        metrics.register_resilience(lambda: clf.resilience_stats() if clf else None)
+        metrics.register_compaction(lambda: clf.compactor.stats() if clf else None)
+        metrics.register_shadow(lambda: shadow.stats() if shadow else None)
+        _resilience_registered = True
     ok = clf.load_model()
     ready = bool(ok)
-    print("[init] ready =", ready)
+    if os.getenv("WARMUP_ENABLED", WARMUP_ENABLED_DEFAULT) == "1":
+        # Endpoint가 scale-to-zero 상태일 수 있으므로 실제로 SLO 안에 응답할 때까지 ready가 아님
+        # (백그라운드에서 진행, /health는 그동안에도 응답)
+        warmer = EndpointWarmer(
+            clf.aprobe,
+            clf.endpoints.endpoints,
+            slo_ms=float(os.getenv("WARMUP_SLO_MS", WARMUP_SLO_MS_DEFAULT)),
+            probe_timeout_s=float(os.getenv("WARMUP_PROBE_TIMEOUT_S", WARMUP_PROBE_TIMEOUT_S_DEFAULT)),
+            interval_s=float(os.getenv("WARMUP_INTERVAL_S", WARMUP_INTERVAL_S_DEFAULT)),
+            keepwarm_interval_s=float(os.getenv("KEEPWARM_INTERVAL_S", KEEPWARM_INTERVAL_S_DEFAULT)),
+            keepwarm_idle_s=float(os.getenv("KEEPWARM_IDLE_S", KEEPWARM_IDLE_S_DEFAULT)),
+            keepwarm_hours=os.getenv("KEEPWARM_HOURS", KEEPWARM_HOURS_DEFAULT),
+            cold_after=int(os.getenv("WARMUP_COLD_AFTER", WARMUP_COLD_AFTER_DEFAULT)),
+            recheck_idle_s=float(os.getenv("WARMUP_RECHECK_IDLE_S", WARMUP_RECHECK_IDLE_S_DEFAULT)),
+        )
+        warmer.start()
+    metrics.READY.set_function(lambda: float(is_ready()))
+    jobs = JobRunner(
+        JobStore(
+            os.getenv("JOB_STORE_PATH", JOB_STORE_PATH_DEFAULT) or os.path.join(shared_dir, "jobs.db"),
+            ttl_s=float(os.getenv("JOB_TTL_S", JOB_TTL_S_DEFAULT)),
+        ),
+        classify_job_item,
+        executor,
+        concurrency=int(os.getenv("JOB_CONCURRENCY", JOB_CONCURRENCY_DEFAULT)),
+        max_retries=int(os.getenv("JOB_RETRY_MAX", JOB_RETRY_MAX_DEFAULT)),
+        retry_backoff_s=float(os.getenv("JOB_RETRY_BACKOFF_S", JOB_RETRY_BACKOFF_S_DEFAULT)),
+    )
+    # 재시작 전에 끝나지 않은 job은 남은 item부터 이어서 처리 (여러 워커 중 lock을 잡은 하나만)
+    await jobs.start(resume=acquire_job_lock(os.path.join(shared_dir, "jobs.lock")))
+    print(
+        "[init] ready =", ready, "pid =", os.getpid(), "processes =", processes, "workers =", workers,
+        "concurrency =", concurrency, "hf_batch =", batcher.max_size,
+        "rate_limit =", ratelimit.rate if ratelimit else None,
+    )
+
+
+def worker_share(total: int) -> int:
+    """워커 전체 합계 설정값 중 이 워커의 몫 (0 이하 = 제한 없음은 그대로, 그 외 최소 1)"""
+    if total <= 0:
+        return int(total)
+    return max(1, int(total) // processes)
+
+
+def acquire_job_lock(path: str) -> bool:
+    """job 이어받기 담당 lock (프로세스가 살아 있는 동안 유지, 죽으면 OS가 풀어 줌)"""
+    global _job_lock_file
+    if fcntl is None:
+        return True
+    d = os.path.dirname(path)
+    if d:
+        os.makedirs(d, exist_ok=True)
+    f = open(path, "a")
+    try:
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        f.close()
+        return False
+    _job_lock_file = f
+    return True
+
+
+def load_cascade() -> Optional[LocalCascade]:
+    """LOCAL_MODEL_PATH의 1단계 로컬 모델 로드 (없거나 실패하면 LLM만 사용)"""
+    path = os.getenv("LOCAL_MODEL_PATH")
+    if not path:
+        return None
+    try:
+        model = LocalModel.load(path)
+    except Exception as e:
+        print("[init] local model disabled:", e)
+        return None
+
+    print("[init] local model loaded:", path, model.classes)
+    return LocalCascade(
+        model,
+        normal_min=float(os.getenv("LOCAL_MODEL_NORMAL_MIN", LOCAL_MODEL_NORMAL_MIN_DEFAULT)),
+        attack_min=float(os.getenv("LOCAL_MODEL_ATTACK_MIN", LOCAL_MODEL_ATTACK_MIN_DEFAULT)),
+    )
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    if warmer is not None:
+        await warmer.stop()
+    if jobs is not None:
+        await jobs.stop()
+        jobs.store.close()
+    if shadow is not None:
+        await shadow.aclose()
+    if clf is not None:
+        await clf.aclose()
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+    if store is not None:
+        store.close()
+    if ratelimit is not None:
+        ratelimit.close()
+
+
+# 배치 큐 item: (프롬프트, 요청 타이밍, 큐 진입 시각, deadline, lane)
+BatchItem = Tuple[str, Optional[RequestTimings], float, Optional[float], str]
+
+
+async def dispatch_prompts(items: List[BatchItem]) -> List[Any]:
+    """MicroBatcher가 모은 프롬프트를 동시성 제한 하에서 한 번의 Endpoint 호출로 보냄"""
+    # 실시간 요청이 하나라도 섞인 배치는 interactive lane으로
+    lane = INTERACTIVE if any(it[4] == INTERACTIVE for it in items) else BACKFILL
+
+    metrics.HF_WAITING.inc()
+    try:
+        await lanes.acquire(lane)
+    finally:
+        metrics.HF_WAITING.dec()
+    if ratelimit is not None:
+        # 워커 간 공유 속도 제한: 예약한 시각까지 슬롯을 쥔 채 대기 (대기 중 취소되면 슬롯 반납)
+        try:
+            wait = await asyncio.get_running_loop().run_in_executor(executor, ratelimit.reserve)
+            if wait > 0:
+                await asyncio.sleep(wait)
+        except BaseException:
+            lanes.release(lane)
+            raise
+
+    # queue: 배치 큐 진입 ~ 동시성 슬롯 획득 (+ 속도 제한 대기)
+    t0 = time.perf_counter()
+    for _, timings, enqueued_at, _, _ in items:
+        if timings is not None:
+            timings.add("queue", (t0 - enqueued_at) * 1000.0)
+        metrics.LANE_QUEUE_WAIT.labels(lane).observe(t0 - enqueued_at)
+
+    # 기다리는 동안 호출자의 deadline이 지난 item은 HF에 보내지 않음
+    now = time.monotonic()
+    live = [i for i, it in enumerate(items) if it[3] is None or it[3] > now]
+    results: List[Any] = [DeadlineExceeded() for _ in items]
+    if len(live) < len(items):
+        metrics.SHED.labels("deadline").inc(len(items) - len(live))
+    if not live:
+        lanes.release(lane)
+        return results
+    prompts = [items[i][0] for i in live]
+
+    metrics.HF_INFLIGHT.inc()
+    try:
+        # keep-alive 연결 풀을 쓰는 async 호출 (이벤트 루프를 막지 않음)
+        raw = await clf.acall_batch(prompts)
+    finally:
+        metrics.HF_INFLIGHT.dec()
+        lanes.release(lane)
+
+    hf_s = time.perf_counter() - t0
+    metrics.HF_LATENCY.observe(hf_s)
+    metrics.HF_BATCH_SIZE.observe(len(prompts))
+    admission.observe_latency(hf_s)
+
+    parsed = []
+    for i, r in zip(live, raw):
+        timings = items[i][1]
+        t1 = time.perf_counter()
+        results[i] = clf.parse_response(r)
+        parsed.append(results[i])
+        if timings is not None:
+            timings.add("hf", hf_s * 1000.0)
+            timings.add("parse", (time.perf_counter() - t1) * 1000.0)
+
+    # 배치 호출이 실패하면 모든 item에 같은 오류가 들어있으므로 호출 1회로 집계
+    failed = next((r for r in parsed if "hf_error" in r), None)
+    if failed is not None:
+        metrics.HF_ERRORS.labels(failed.get("hf_error_kind", "other")).inc()
+    elif warmer is not None:
+        warmer.note_hf_ok()
+    return results
+
+
+async def run_predict(method: str, path: str, body: str, compacted: bool = False) -> Dict[str, Any]:
+    """
+    판정 캐시 조회 -> 디스크 저장소 조회 -> (miss) 프롬프트를 만들어 배치 큐에 넣고 결과를 기다림.
+    같은 요청이 동시에 여러 개 들어오면 HF 호출은 한 번만 수행.
+    반환 dict의 source: "cache" (메모리/디스크 캐시) | "model" (HF 호출)
+    compacted=True: body가 이미 압축된 본문 chunk (원본 본문과 캐시 키가 섞이지 않도록 구분)
+    """
+    fp = fingerprint(f"{method}#chunk" if compacted else method, path, body)
+    loop = asyncio.get_running_loop()
+
+    async def _compute() -> Dict[str, Any]:
+        if store is not None:
+            saved = await loop.run_in_executor(executor, store.get, clf.model_id, fp)
+            if saved is not None:
+                return dict(saved, source="cache")
+
+        # HF 경로 승인: 자리가 없으면 429, deadline이 지났으면 504
+        budget = current_budget.get()
+        try:
+            await admission.acquire(budget)
+        except Overloaded:
+            metrics.SHED.labels("overloaded").inc()
+            raise
+        except DeadlineExceeded:
+            metrics.SHED.labels("deadline").inc()
+            raise
+
+        try:
+            with stage("prompt"):
+                prompt = clf.build_prompt(method, path, body, compacted=compacted)
+            item = (prompt, current_timings.get(), time.perf_counter(), budget.deadline, budget.lane)
+            result = await batcher.submit(item)
+            # HF 호출 실패(breaker open, timeout 등)로 만든 대체 결과는 모델 판정과 구분
+            result = dict(result, source="fail_open" if "hf_error" in result else "model")
+        finally:
+            await admission.release(budget.lane)
+
+        if store is not None and is_cacheable(result):
+            await loop.run_in_executor(executor, store.put, clf.model_id, fp, result)
+        return result
+
+    t0 = time.perf_counter()
+    result, origin = await cache.get_or_compute(fp, _compute)
+    timings = current_timings.get()
+    if origin == "coalesced" and timings is not None:
+        # 같은 요청의 in-flight 계산을 기다린 시간
+        timings.add("coalesced", (time.perf_counter() - t0) * 1000.0)
+    if origin == "hit":
+        return dict(result, source="cache")
+    return result
+
+
+# ===== Load shedding =====
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "overloaded"},
+        headers={"Retry-After": str(exc.retry_after_s)},
+    )
+
+
+@app.exception_handler(DeadlineExceeded)
+async def deadline_handler(request: Request, exc: DeadlineExceeded):
+    return JSONResponse(status_code=504, content={"detail": "deadline_exceeded"})
 
 
 # ===== Health =====
@@ -74,34 +510,187 @@ def health():
     return {"status": "alive"}
 
 
+def is_ready() -> bool:
+    """초기화가 끝났고 (warm-up을 켰으면) Endpoint가 SLO 안에 응답하는 상태"""
+    return ready and (warmer is None or warmer.ready)
+
+
+async def require_ready() -> None:
+    """
+    분류 API 진입 확인. 유휴 후 첫 요청이면 Endpoint가 아직 떠 있는지 다시 probe (최대 WARMUP_SLO_MS 대기)
+    """
+    if ready and warmer is not None and not warmer.ready:
+        warmer.note_traffic()
+        await warmer.recheck()
+    if not is_ready():
+        raise HTTPException(status_code=503, detail="model_not_ready")
+
+
 @app.get("/ready")
 def readyz():
-    return {"status": "ok" if ready else "loading"}
+    if is_ready():
+        return {"status": "ok"}
+    # idle: warm이었지만 WARMUP_RECHECK_IDLE_S 동안 확인 못 함 (scale-to-zero 가능, 다음 분류 요청이 다시 확인)
+    if not ready:
+        status = "loading"
+    elif warmer is not None and warmer.idle:
+        status = "idle"
+    else:
+        status = "warming"
+    return JSONResponse(
+        status_code=503,
+        content={"status": status, "warmup": warmer.stats() if warmer else None},
+    )
 
 
-# ===== Main Classification Endpoint =====
-@app.post("/api/classify")
-async def classify(req: AIRequest):
-    if not ready:
-        raise HTTPException(status_code=503, detail="model_not_ready")
-    if not req.session:
-        raise HTTPException(status_code=400, detail="empty_session")
+# ===== Metrics (Prometheus) =====
+@app.get("/metrics")
+def prometheus_metrics():
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
+
+
+# ===== Stats =====
+@app.get("/stats")
+def stats():
+    return {
+        "admission": admission.stats() if admission else None,
+        "lanes": lanes.stats() if lanes else None,
+        "cache": cache.stats() if cache else None,
+        "batcher": batcher.stats() if batcher else None,
+        "store": store.stats() if store else None,
+        "fast_path": router.stats() if router else None,
+        "local_model": cascade.stats() if cascade else None,
+        "sessions": sessions.stats() if sessions else None,
+        "hf": clf.resilience_stats() if clf else None,
+        "hf_pool": clf.pool_info() if clf else None,
+        "compaction": clf.compactor.stats() if clf else None,
+        "labels": {"protocol": clf.label_protocol, **clf.label_stats} if clf else None,
+        "chunked": chunker.stats() if chunker else None,
+        "jobs": jobs.stats() if jobs else None,
+        "shadow": shadow.stats() if shadow else None,
+        "warmup": warmer.stats() if warmer else None,
+        "ratelimit": ratelimit.stats() if ratelimit else None,
+        # WORKERS > 1 이면 /stats, /metrics는 요청을 받은 워커 하나의 값
+        "worker": {"pid": os.getpid(), "processes": processes},
+    }
+
 
+# ===== Classification Core =====
+def item_fields(it: AIItem) -> Tuple[str, str, str]:
+    """(method, path, body) — 빈 값은 GET, / 로"""
+    method = (it.request_http_method or "").strip() or "GET"
+    path = (it.request_http_request or "").strip() or "/"
+    body = (it.request_body or "") or ""
+    return method, path, body
+
+
+async def classify_items(items: List[AIItem]) -> Dict[str, Any]:
+    """요청 목록(세션)을 분류해 source가 포함된 결과 dict 반환"""
     # ✅ 단일로그 우선: sessionizing.js는 보통 길이 1로 보냄
-    first = req.session[0]
-    method = (first.request_http_method or "").strip() or "GET"
-    path = (first.request_http_request or "").strip() or "/"
-    body = (first.request_body or "") or ""
+    first = items[0]
+    method, path, body = item_fields(first)
 
     # 혹시 다중 요청이 들어오면(예: 나중에 실험 확장) 세션 텍스트로 합쳐서 처리
-    if len(req.session) > 1:
-        body = build_session_text(req.session)
+    if len(items) > 1:
+        body = build_session_text(items)
         method = "SESSION"
         path = "/session"
 
-    # 하나씩 처리 (LLM concurrency 제한)
-    async with lock:
-        result = clf.predict(method, path, body)
+    # 정적 파일/정상 라우트/필터가 Normal로 덮어쓸 요청은 LLM 호출 없이 바로 판정
+    result = None
+    if len(items) == 1:
+        with stage("fast_path"):
+            result = router.route(method, path, body, first.status_code)
+        if result is not None:
+            result["source"] = "fast_path"
+
+    # 1단계 로컬 모델이 확신하는 경우도 LLM 호출 없이 판정 (불확실 구간만 에스컬레이션)
+    # n-gram 해싱이 본문 길이에 비례해 ms 단위로 걸리므로 이벤트 루프 밖(워커 풀)에서 실행
+    if result is None and cascade is not None and len(items) == 1:
+        with stage("local_model"):
+            result, _ = await asyncio.get_running_loop().run_in_executor(
+                executor, cascade.decide, method, path, body
+            )
+        if result is not None:
+            result["source"] = "local_model"
+
+    # 압축해도 토큰 예산을 넘는 본문은 겹치는 chunk로 나눠 병렬 분류 (앞부분만 보고 판정하지 않도록)
+    if result is None and chunker is not None and len(items) == 1 and body:
+        if estimate_tokens(str(body)) > clf.compactor.budget_tokens:
+            chunks = clf.compactor.split(
+                body,
+                overlap_chars=int(os.getenv("OVERSIZE_CHUNK_OVERLAP", OVERSIZE_CHUNK_OVERLAP_DEFAULT)),
+            )
+            if len(chunks) > 1:
+                with stage("chunked"):
+                    result = await chunker.classify(
+                        chunks, lambda c: run_predict(method, path, c, compacted=True)
+                    )
+
+    # 이벤트 루프를 막지 않도록 워커 풀에서 처리 (CLASSIFY_CONCURRENCY로 동시 호출 제한,
+    # HF_BATCH_MAX_SIZE > 1 이면 동시 요청들을 하나의 Endpoint 호출로 묶음)
+    if result is None:
+        result = await run_predict(method, path, body)
+    return result
+
+
+async def classify_session(session_id: str, items: List[AIItem]) -> Dict[str, Any]:
+    """
+    session_id 기준 증분 분류: 이전 호출에서 분류한 요청은 건너뛰고
+    새 요청만 "이전 요청 요약 + 새 요청" 프롬프트로 분류한 뒤 세션 판정에 합침.
+    반환 dict의 source가 "session_state"면 새 요청 없이 저장된 세션 판정을 돌려준 것.
+    """
+    state = sessions.get_or_create(session_id)
+    async with state.lock:
+        fields = [item_fields(it) for it in items]
+        new = sessions.split_new(state, fields)
+        if not new:
+            return dict(state.verdict, source="session_state", session_requests=state.count, new_requests=0)
+
+        # 한 프롬프트에는 새 요청 SESSION_MAX_REQ개까지, 넘치면 이어서 같은 호출 안에서 나눠 분류
+        # (새 요청만 보내는 클라이언트는 다시 보내지 않으므로 다음 호출로 미루면 빠짐)
+        max_req = max(1, int(os.getenv("SESSION_MAX_REQ", SESSION_MAX_REQ_DEFAULT)))
+        done, last = 0, None
+        for g in range(0, len(new), max_req):
+            group = new[g : g + max_req]
+            new_items = [items[i] for _, i, _ in group]
+            summary = state.summary()
+            if not summary and len(group) == 1 and group[0][2] == 1:
+                # 세션의 첫 요청은 단일 요청과 같은 경로 (fast-path / 로컬 모델 / 캐시)
+                result = await classify_items(new_items)
+            else:
+                text = build_session_text(
+                    new_items, start=state.count + 1, summary=summary, repeats=[n for _, _, n in group]
+                )
+                result = await run_predict("SESSION", "/session", text)
+
+            # HF 호출 실패(fail-open)는 세션 상태에 반영하지 않음 -> 다음 호출에서 다시 분류
+            if result.get("source") == "fail_open":
+                if last is not None and verdict_rank(state.verdict)[0]:
+                    # 앞 그룹에서 이미 공격으로 판정됐으면 그 판정을 유지
+                    return dict(last, **state.verdict, session_requests=state.count, new_requests=done)
+                return dict(result, session_requests=state.count, new_requests=len(new))
+
+            sessions.record_new(len(group))
+            state.update(((key, *fields[i][:2], n) for key, i, n in group), result)
+            done += len(group)
+            last = result
+        return dict(last, **state.verdict, session_requests=state.count, new_requests=done)
+
+
+async def classify_one(req: AIRequest) -> Dict[str, Any]:
+    """단일 AIRequest(=session 리스트)를 분류해 응답 dict 반환"""
+    t0 = time.perf_counter()
+    if warmer is not None:
+        warmer.note_traffic()
+    if req.session_id and sessions is not None:
+        result = await classify_session(req.session_id, req.session)
+    else:
+        result = await classify_items(req.session)
+
+    metrics.LANE_LATENCY.labels(current_budget.get().lane).observe(time.perf_counter() - t0)
+    metrics.observe_verdict(result)
 
     # model_inference.py가 반환하는 구조 그대로 사용
     classification = result.get("classification", "Normal")
@@ -109,15 +698,252 @@ async def classify(req: AIRequest):
     raw = result.get("raw_response", "")
 
     # sessionizing.js는 classification/confidence/raw_response만 써도 충분
-    return {
+    # source: 판정 출처 (fast_path | local_model | cache | model | fail_open | session_state)
+    response = {
         "classification": classification,
         "confidence": confidence,
         "raw_response": raw,
+        "source": result.get("source", "model"),
     }
+    # LABEL_PROTOCOL=code + Endpoint가 토큰 확률을 주면 라벨 확률 (confidence는 이 값의 구간)
+    if "confidence_score" in result:
+        response["confidence_score"] = result["confidence_score"]
+    # fail_open이면 원인 (circuit_open / timeout / http / network ...)
+    if response["source"] == "fail_open":
+        response["degraded_reason"] = result.get("hf_error_kind", "other")
+    # 큰 본문 chunk 분류: 전체 chunk 수 / 실제 분류한 chunk 수 (early stop 시 더 적음)
+    if "chunks" in result:
+        response["chunks"] = result["chunks"]
+        response["chunks_classified"] = result["chunks_classified"]
+    # 증분 세션 분류: 세션에서 지금까지 분류한 요청 수 / 이번에 새로 분류한 요청 수
+    if "session_requests" in result:
+        response["session_requests"] = result["session_requests"]
+        response["new_requests"] = result["new_requests"]
+    return response
+
+
+def request_lane(request: Optional[Request], *fields: Optional[str], default: str = INTERACTIVE) -> str:
+    """X-Priority 헤더 -> 입력 필드 순서로 lane 결정 (잘못된 값이면 400)"""
+    header = request.headers.get("x-priority") if request is not None else None
+    try:
+        return resolve_lane(header, *fields, default=default)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# ===== Main Classification Endpoint =====
+@app.post("/api/classify")
+async def classify(req: AIRequest, request: Request, response: Response):
+    await require_ready()
+    metrics.REQUESTS.labels("classify").inc()
+    if not req.session:
+        raise HTTPException(status_code=400, detail="empty_session")
+
+    metrics.ITEMS.labels("classify").inc()
+
+    # 요청별 단계 타이밍 (queue / prompt / hf / parse ...) -> Server-Timing 헤더
+    request_id = request.headers.get("x-request-id") or uuid.uuid4().hex
+    timings = RequestTimings()
+    current_timings.set(timings)
+    # 호출자가 기다릴 수 있는 남은 시간 (없으면 무제한) + 우선순위 lane (기본 interactive)
+    lane = request_lane(request, req.priority)
+    current_budget.set(
+        RequestBudget.from_timeout_ms(request.headers.get("x-request-timeout-ms"), lane=lane)
+    )
+
+    result = await classify_one(req)
+
+    # (선택) 모델 판정을 후보 Endpoint로 미러링 — 백그라운드 task라 이 응답은 기다리지 않음
+    if shadow is not None and result["source"] in ("model", "cache") and len(req.session) == 1:
+        if not req.session_id and "chunks" not in result:
+            shadow.maybe_mirror(
+                lambda: clf.build_prompt(*item_fields(req.session[0])),
+                result,
+                timings.stages.get("hf") if result["source"] == "model" else None,
+            )
+
+    response.headers["Server-Timing"] = timings.server_timing()
+    response.headers["X-Request-ID"] = request_id
+    emit_trace(
+        request_id,
+        timings,
+        {
+            "source": result["source"],
+            "classification": result["classification"],
+            "confidence": result["confidence"],
+            "n_requests": len(req.session),
+            "lane": lane,
+        },
+    )
+    return result
+
+
+# ===== Batch Classification Endpoint =====
+@app.post("/api/classify/batch")
+async def classify_batch(req: AIBatchRequest, request: Request):
+    """
+    여러 개의 독립 요청을 한 번의 HTTP 호출로 분류.
+    - 각 item은 /api/classify 의 body와 동일한 형식
+    - 결과는 입력 순서 그대로, 실패한 item은 {"error": ...}로 표시
+    """
+    await require_ready()
+    metrics.REQUESTS.labels("batch").inc()
+    if not req.items:
+        raise HTTPException(status_code=400, detail="empty_batch")
+
+    max_items = int(os.getenv("BATCH_MAX_ITEMS", BATCH_MAX_ITEMS_DEFAULT))
+    if len(req.items) > max_items:
+        raise HTTPException(status_code=413, detail=f"batch_too_large (max {max_items})")
+
+    # 배치 item은 승인 큐가 차면 거절 대신 (deadline까지) 대기, lane은 기본 backfill
+    budget = RequestBudget.from_timeout_ms(
+        request.headers.get("x-request-timeout-ms"),
+        wait=True,
+        lane=request_lane(request, req.priority, default=BACKFILL),
+    )
+    item_lanes = [request_lane(request, item.priority, req.priority, default=BACKFILL) for item in req.items]
+
+    async def _one(item: AIRequest, lane: str) -> Dict[str, Any]:
+        if not item.session:
+            return {"error": "empty_session"}
+        # gather가 item마다 context를 복사하므로 item별 lane 지정이 서로 섞이지 않음
+        current_budget.set(replace(budget, lane=lane))
+        try:
+            return await classify_one(item)
+        except Exception as e:
+            return {"error": str(e) or type(e).__name__}
+
+    metrics.ITEMS.labels("batch").inc(len(req.items))
+    # 동시 실행 수는 run_predict 내부의 lane 스케줄러가 제한
+    results = await asyncio.gather(*(_one(item, lane) for item, lane in zip(req.items, item_lanes)))
+    return {"results": list(results)}
+
+
+# ===== Async Job API (대량/백필 분류) =====
+async def classify_job_item(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """JobRunner worker가 부르는 item 하나 분류 (실패는 {"error": ...})"""
+    item = AIRequest(**payload)
+    if not item.session:
+        return {"error": "empty_session"}
+    # Endpoint가 warm-up 중이면 (fail-open 결과를 쌓지 않도록) warm해질 때까지 대기
+    if warmer is not None:
+        await warmer.wait_ready()
+    # job item은 호출자가 기다리지 않으므로 승인 큐가 차면 거절 대신 대기
+    # lane은 등록 시 정한 값 (기본 backfill)
+    current_budget.set(RequestBudget(wait=True, lane=resolve_lane(item.priority, default=BACKFILL)))
+    return await classify_one(item)
+
+
+def _get_job(job_id: str) -> Dict[str, Any]:
+    job = jobs.store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="job_not_found")
+    job.pop("callback_url", None)
+    return job
+
+
+async def _aget_job(job_id: str) -> Dict[str, Any]:
+    """_get_job을 워커 풀에서 (SQLite 조회가 이벤트 루프를 막지 않도록)"""
+    return await asyncio.get_running_loop().run_in_executor(executor, _get_job, job_id)
+
+
+@app.post("/api/jobs", status_code=202)
+async def create_job(req: AIJobRequest, request: Request):
+    """
+    item들을 job으로 등록하고 바로 job_id 반환 (분류는 백그라운드에서).
+    - 각 item은 /api/classify 의 body와 동일한 형식
+    - 결과: GET /api/jobs/{id}/results (커서로 이어받기) 또는 /stream (NDJSON)
+    """
+    await require_ready()
+    metrics.REQUESTS.labels("jobs").inc()
+    if not req.items:
+        raise HTTPException(status_code=400, detail="empty_batch")
+
+    max_items = int(os.getenv("JOB_MAX_ITEMS", JOB_MAX_ITEMS_DEFAULT))
+    if len(req.items) > max_items:
+        raise HTTPException(status_code=413, detail=f"job_too_large (max {max_items})")
+
+    metrics.ITEMS.labels("jobs").inc(len(req.items))
+    payloads = [
+        dict(item.model_dump(), priority=request_lane(request, item.priority, req.priority, default=BACKFILL))
+        for item in req.items
+    ]
+    job_id = await jobs.submit(payloads, req.callback_url)
+    return {"job_id": job_id, "status": "queued", "total": len(req.items)}
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    return await _aget_job(job_id)
+
+
+@app.get("/api/jobs/{job_id}/results")
+async def get_job_results(job_id: str, after: int = 0, limit: int = 1000):
+    """
+    완료 순서대로 결과를 after(이전 응답의 next) 이후부터 limit개씩.
+    done이 true이고 results가 비어 있으면 모두 받은 것.
+    """
+    job = await _aget_job(job_id)
+    results = await asyncio.get_running_loop().run_in_executor(
+        executor, jobs.store.results, job_id, after, max(1, min(limit, 10000))
+    )
+    return {
+        "job_id": job_id,
+        "status": job["status"],
+        "results": results,
+        "next": results[-1]["seq"] if results else after,
+        "done": job["status"] in ("done", "cancelled"),
+    }
+
+
+@app.get("/api/jobs/{job_id}/stream")
+async def stream_job_results(job_id: str, after: int = 0):
+    """
+    결과를 완료되는 대로 NDJSON 한 줄씩 ({"index", "seq", "result"}).
+    job이 끝나면 마지막 줄에 job 요약 ({"job": {...}})을 보내고 종료.
+    """
+    await _aget_job(job_id)
+
+    async def _lines():
+        cursor = after
+        while True:
+            job = await _aget_job(job_id)
+            while True:
+                rows = await asyncio.get_running_loop().run_in_executor(
+                    executor, jobs.store.results, job_id, cursor, 1000
+                )
+                for row in rows:
+                    yield json.dumps(row, ensure_ascii=False) + "\n"
+                if rows:
+                    cursor = rows[-1]["seq"]
+                if len(rows) < 1000:
+                    break
+            # 결과를 다 읽은 뒤에 확인한 상태가 끝이면 종료 (그 사이 기록된 결과는 위에서 읽음)
+            if job["status"] in ("done", "cancelled"):
+                jobs.forget(job_id)
+                yield json.dumps({"job": job}, ensure_ascii=False) + "\n"
+                return
+            await jobs.wait_update(job_id, timeout=1.0)
+
+    return StreamingResponse(_lines(), media_type="application/x-ndjson")
+
+
+@app.delete("/api/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """남은 item 분류를 멈춤 (이미 나온 결과는 계속 조회 가능)"""
+    job = await _aget_job(job_id)
+    if job["status"] not in ("done", "cancelled"):
+        await jobs.cancel(job_id)
+    return await _aget_job(job_id)
 
 
 # ===== Local Dev =====
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run("server:app", host="0.0.0.0", port=3002, workers=1)
+    uvicorn.run(
+        "server:app",
+        host="0.0.0.0",
+        port=3002,
+        workers=max(1, int(os.getenv("WORKERS", WORKERS_DEFAULT))),
+    )
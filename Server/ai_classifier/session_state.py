@@ -0,0 +1,174 @@
+# session_state.py
+"""
+세션 단위 증분 분류 상태 (프로세스 내 메모리)
+
+세션이 길어질 때마다 전체 요청을 다시 프롬프트에 넣으면 토큰이 세션 길이의 제곱으로 늘어나므로,
+session_id별로 "이미 분류한 요청 지문 + 짧은 요약 + 세션 판정"만 유지하고 새 요청만 분류한다.
+
+- SessionState: 본 요청 지문별 반복 횟수, 최근 요청 몇 줄, 누적 요청 수, 세션 판정(가장 심각한 판정 유지)
+- SessionStateStore: session_id -> SessionState (유휴 시간 TTL + 최대 항목 수 LRU)
+"""
+
+import asyncio
+import time
+from collections import Counter, OrderedDict, deque
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from verdict_cache import fingerprint
+
+# 세션 판정 우선순위: 공격(high) > 공격(medium) > 공격(low) > Normal
+CONFIDENCE_RANK = {"high": 3, "medium": 2, "low": 1}
+
+
+def verdict_rank(result: Dict[str, Any]) -> Tuple[int, int]:
+    is_attack = not str(result.get("classification", "Normal")).startswith("Normal")
+    return (int(is_attack), CONFIDENCE_RANK.get(result.get("confidence", "low"), 0))
+
+
+class SessionState:
+    def __init__(self, session_id: str, summary_lines: int = 8, max_seen: int = 512) -> None:
+        self.session_id = session_id
+        self.count = 0  # 지금까지 분류한 요청 수 (같은 요청은 1건)
+        self.repeats = 0  # 같은 요청이 추가로 반복된 횟수 (합계)
+        self.recent: deque = deque(maxlen=max(0, summary_lines))
+        # 지문 -> 한 호출에서 본 최대 횟수 (세션 전체를 다시 보내도 부풀지 않도록 합이 아니라 최댓값)
+        self._seen: "OrderedDict[str, int]" = OrderedDict()
+        self._max_seen = max(1, max_seen)
+        self.verdict: Optional[Dict[str, Any]] = None
+        self.touched = time.monotonic()
+        # 같은 세션의 동시 요청은 순서대로 처리 (같은 요청을 두 번 분류하지 않도록)
+        self.lock = asyncio.Lock()
+
+    @staticmethod
+    def item_key(method: str, path: str, body: str) -> str:
+        return fingerprint(method, path, body)
+
+    def is_new(self, key: str) -> bool:
+        return key not in self._seen
+
+    def seen_count(self, key: str) -> int:
+        return self._seen.get(key, 0)
+
+    def summary(self) -> str:
+        """프롬프트에 넣을 이전 요청 요약 (분류한 요청이 없으면 빈 문자열)"""
+        if self.count == 0:
+            return ""
+        lines = [f"이전 요청 {self.count}건"]
+        if self.repeats:
+            lines[0] += f" (같은 요청 반복 {self.repeats}회)"
+        if self.verdict is not None:
+            lines[0] += f", 현재 세션 판정: {self.verdict['classification']} ({self.verdict['confidence']})"
+        if self.recent:
+            lines.append("최근 요청: " + " | ".join(self.recent))
+        return "\n".join(lines)
+
+    def update(self, items: Iterable[Tuple[str, str, str, int]], result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        새로 분류한 요청들(key, method, path, 반복 횟수)과 그 판정을 반영하고 세션 판정을 반환.
+        세션 판정은 지금까지 본 판정 중 가장 심각한 것 (한 번 공격이면 계속 공격)
+        """
+        for key, method, path, n in items:
+            prev = self._seen.pop(key, 0)
+            n = max(n, prev, 1)
+            self._seen[key] = n
+            if len(self._seen) > self._max_seen:
+                self._seen.popitem(last=False)
+            self.recent.append(f"{method} {path[:120]}" + (f" (x{n})" if n > 1 else ""))
+            if prev == 0:
+                self.count += 1
+                self.repeats += n - 1
+            else:
+                self.repeats += n - prev
+
+        verdict = {k: result.get(k) for k in ("classification", "confidence", "raw_response")}
+        if self.verdict is None or verdict_rank(verdict) >= verdict_rank(self.verdict):
+            self.verdict = verdict
+        self.touched = time.monotonic()
+        return self.verdict
+
+
+class SessionStateStore:
+    """session_id -> SessionState (idle_ttl_s 동안 안 쓰이면 제거, max_entries 초과 시 LRU 제거)"""
+
+    def __init__(
+        self,
+        max_entries: int = 50000,
+        idle_ttl_s: float = 1800.0,
+        summary_lines: int = 8,
+    ) -> None:
+        self.max_entries = max(1, int(max_entries))
+        self.idle_ttl_s = float(idle_ttl_s)
+        self.summary_lines = int(summary_lines)
+        self._data: "OrderedDict[str, SessionState]" = OrderedDict()
+
+        self.created = 0
+        self.evictions = 0
+        self.expired = 0
+        self.items_new = 0  # 실제로 분류한 요청 수
+        self.items_skipped = 0  # 이미 분류해서 다시 보내지 않은 요청 수
+
+    def _evict(self) -> None:
+        # 가장 오래 안 쓰인 것이 앞쪽에 있으므로 앞에서부터 만료 확인
+        now = time.monotonic()
+        while self._data:
+            sid, state = next(iter(self._data.items()))
+            if now - state.touched >= self.idle_ttl_s and not state.lock.locked():
+                del self._data[sid]
+                self.expired += 1
+            elif len(self._data) > self.max_entries:
+                del self._data[sid]
+                self.evictions += 1
+            else:
+                break
+
+    def get_or_create(self, session_id: str) -> SessionState:
+        state = self._data.get(session_id)
+        if state is not None and time.monotonic() - state.touched >= self.idle_ttl_s:
+            del self._data[session_id]
+            self.expired += 1
+            state = None
+
+        if state is None:
+            state = SessionState(session_id, summary_lines=self.summary_lines)
+            self._data[session_id] = state
+            self.created += 1
+        else:
+            self._data.move_to_end(session_id)
+        state.touched = time.monotonic()
+        self._evict()
+        return state
+
+    def split_new(self, state: SessionState, items: List[Tuple[str, str, str]]) -> List[Tuple[str, int, int]]:
+        """
+        (method, path, body) 목록 중 다시 분류할 것만 (key, 첫 index, 이번 호출의 반복 횟수)로.
+        - 이 세션에서 아직 분류하지 않은 요청
+        - 이미 분류했지만 반복 횟수가 이전의 두 배 이상으로 늘어난 요청 (무차별 대입 등)
+        같은 요청이 여러 번 오면 한 줄로 합치고 횟수를 함께 넘긴다.
+        """
+        keys = [state.item_key(*it) for it in items]
+        counts = Counter(keys)
+        new, picked = [], set()
+        for i, key in enumerate(keys):
+            if key in picked:
+                continue
+            prev = state.seen_count(key)
+            if prev == 0 or counts[key] >= 2 * prev:
+                picked.add(key)
+                new.append((key, i, counts[key]))
+        self.items_skipped += len(items) - len(new)
+        return new
+
+    def record_new(self, n: int) -> None:
+        self.items_new += n
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sessions": len(self._data),
+            "max_entries": self.max_entries,
+            "idle_ttl_s": self.idle_ttl_s,
+            "created": self.created,
+            "evictions": self.evictions,
+            "expired": self.expired,
+            "items_new": self.items_new,
+            "items_skipped": self.items_skipped,
+        }
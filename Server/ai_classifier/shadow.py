@@ -0,0 +1,186 @@
+# shadow.py
+"""
+후보(candidate) 분류 Endpoint로의 shadow 트래픽 미러링
+
+새 fine-tune 모델을 HF_ENDPOINT_URL 교체 전에 실제 트래픽으로 비교하기 위한 기능.
+
+- /api/classify 응답 중 모델 판정(source: model / cache)을 sample_rate 비율로 골라
+  같은 프롬프트를 후보 Endpoint에 비동기로 보냄 (응답을 보낸 뒤 백그라운드에서, 재시도 없음)
+- 동시에 진행 중인 shadow 호출이 max_inflight 이상이면 그 샘플은 버림 (주 경로에 대기/지연을 만들지 않음)
+- 기록: 판정 일치율, 라벨별 혼동 행렬(primary x shadow), 지연 비교(주 Endpoint hf 단계 vs 후보 호출)
+- (선택) log_path: 판정이 다른 샘플을 JSONL로 남김 (나중에 어느 쪽이 맞는지 검토)
+"""
+
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, Optional
+
+from resilience import LatencyTracker
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None
+
+
+def verdict_label(result: Dict[str, Any]) -> str:
+    """비교용 라벨 ("Normal (benign)"과 "Normal"은 같은 라벨로)"""
+    label = str(result.get("classification", "Normal"))
+    return "Normal" if label.startswith("Normal") else label
+
+
+class ShadowMirror:
+    def __init__(
+        self,
+        endpoint_url: str,
+        api_key: str,
+        build_payload: Callable[[str], str],
+        parse_response: Callable[[Any], Dict[str, Any]],
+        executor: Executor,
+        sample_rate: float = 0.05,
+        max_inflight: int = 4,
+        timeout_s: float = 30.0,
+        log_path: Optional[str] = None,
+    ) -> None:
+        if httpx is None:
+            raise RuntimeError("httpx is required for shadow mode")
+        self.endpoint_url = endpoint_url
+        self.build_payload = build_payload
+        self.parse_response = parse_response
+        self.executor = executor
+        self.sample_rate = max(0.0, min(1.0, float(sample_rate)))
+        self.max_inflight = max(1, int(max_inflight))
+        self.log_path = log_path
+        self._log_lock = threading.Lock()
+
+        self._client = httpx.AsyncClient(
+            headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
+            timeout=timeout_s,
+            limits=httpx.Limits(max_connections=self.max_inflight, max_keepalive_connections=self.max_inflight),
+        )
+        self._tasks: set = set()
+
+        self.sampled = 0
+        self.dropped = 0  # max_inflight 초과로 버린 샘플
+        self.compared = 0
+        self.agreed = 0
+        self.errors: Dict[str, int] = {}
+        self.confusion: Dict[str, Dict[str, int]] = {}  # primary 라벨 -> shadow 라벨 -> 수
+        self.primary_latency = LatencyTracker(window=1000)
+        self.shadow_latency = LatencyTracker(window=1000)
+
+    @classmethod
+    def from_env(
+        cls,
+        build_payload: Callable[[str], str],
+        parse_response: Callable[[Any], Dict[str, Any]],
+        executor: Executor,
+        sample_rate: str,
+        max_inflight: str,
+    ) -> Optional["ShadowMirror"]:
+        """SHADOW_ENDPOINT_URL이 없거나 비율이 0이면 None (shadow 모드 끔)"""
+        url = os.getenv("SHADOW_ENDPOINT_URL")
+        rate = float(os.getenv("SHADOW_SAMPLE_RATE", sample_rate))
+        if not url or rate <= 0:
+            return None
+        try:
+            return cls(
+                url,
+                os.getenv("SHADOW_API_KEY") or os.getenv("HF_API_KEY", ""),
+                build_payload,
+                parse_response,
+                executor,
+                sample_rate=rate,
+                max_inflight=int(os.getenv("SHADOW_MAX_INFLIGHT", max_inflight)),
+                timeout_s=float(os.getenv("SHADOW_TIMEOUT_S", os.getenv("HF_TIMEOUT_S", "30"))),
+                log_path=os.getenv("SHADOW_LOG_PATH") or None,
+            )
+        except RuntimeError as e:
+            print("[init] shadow mode disabled:", e)
+            return None
+
+    def maybe_mirror(self, prompt_fn: Callable[[], str], primary: Dict[str, Any], primary_hf_ms: Optional[float]) -> None:
+        """
+        샘플에 뽑히면 백그라운드 task로 후보 Endpoint 호출을 시작하고 바로 반환.
+        prompt_fn은 뽑힌 경우에만 호출 (뽑히지 않은 요청에는 비용 없음)
+        """
+        if random.random() >= self.sample_rate:
+            return
+        self.sampled += 1
+        if len(self._tasks) >= self.max_inflight:
+            self.dropped += 1
+            return
+
+        task = asyncio.ensure_future(self._mirror(prompt_fn(), primary, primary_hf_ms))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _mirror(self, prompt: str, primary: Dict[str, Any], primary_hf_ms: Optional[float]) -> None:
+        t0 = time.perf_counter()
+        try:
+            r = await self._client.post(self.endpoint_url, content=self.build_payload(prompt))
+            r.raise_for_status()
+            shadow = self.parse_response(r.json())
+        except Exception as e:
+            kind = "timeout" if httpx is not None and isinstance(e, httpx.TimeoutException) else type(e).__name__
+            self.errors[kind] = self.errors.get(kind, 0) + 1
+            return
+        shadow_s = time.perf_counter() - t0
+
+        self.shadow_latency.observe(shadow_s)
+        if primary_hf_ms is not None:
+            self.primary_latency.observe(primary_hf_ms / 1000.0)
+
+        p_label, s_label = verdict_label(primary), verdict_label(shadow)
+        self.compared += 1
+        row = self.confusion.setdefault(p_label, {})
+        row[s_label] = row.get(s_label, 0) + 1
+        if p_label == s_label:
+            self.agreed += 1
+        elif self.log_path:
+            record = {
+                "ts": time.time(),
+                "prompt": prompt,
+                "primary": {k: primary.get(k) for k in ("classification", "confidence", "raw_response", "source")},
+                "shadow": {k: shadow.get(k) for k in ("classification", "confidence", "raw_response")},
+                "primary_hf_ms": primary_hf_ms,
+                "shadow_ms": round(shadow_s * 1000.0, 1),
+            }
+            await asyncio.get_running_loop().run_in_executor(self.executor, self._append_log, record)
+
+    def _append_log(self, record: Dict[str, Any]) -> None:
+        with self._log_lock:
+            d = os.path.dirname(self.log_path)
+            if d:
+                os.makedirs(d, exist_ok=True)
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    async def aclose(self) -> None:
+        for t in list(self._tasks):
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self._client.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "endpoint": self.endpoint_url,
+            "sample_rate": self.sample_rate,
+            "inflight": len(self._tasks),
+            "sampled": self.sampled,
+            "dropped": self.dropped,
+            "compared": self.compared,
+            "agreed": self.agreed,
+            "agreement": round(self.agreed / self.compared, 4) if self.compared else None,
+            "errors": dict(self.errors),
+            "confusion": {p: dict(row) for p, row in self.confusion.items()},
+            "latency": {
+                "primary": self.primary_latency.stats(),
+                "shadow": self.shadow_latency.stats(),
+            },
+        }
@@ -0,0 +1,105 @@
+# shared_limiter.py
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class SharedTokenBucket:
+    """
+    여러 워커 프로세스가 함께 쓰는 HF 호출 속도 제한 (파일 기반 SQLite token bucket).
+
+    - rate: 초당 토큰(HF 호출) 수, burst: 최대 누적 토큰 수
+    - reserve(): 토큰 1개를 예약하고 기다려야 할 시간(초)을 반환 (토큰이 모자라면 빚으로 기록)
+      -> 호출자는 그만큼 sleep 후 호출. DB 왕복은 호출당 1회, 예약 순서대로 통과 (FIFO)
+    - BEGIN IMMEDIATE로 프로세스 간 갱신을 직렬화, 시각은 프로세스 간 공유되는 time.time()
+    """
+
+    def __init__(self, path: str, rate: float, burst: float = 0.0, name: str = "hf") -> None:
+        self.path = path
+        self.rate = float(rate)
+        self.burst = float(burst) if burst and burst > 0 else max(1.0, self.rate)
+        self.name = name
+
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+        self.reserved = 0
+        self.delayed = 0
+        self.wait_s_total = 0.0
+        self.errors = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            d = os.path.dirname(self.path)
+            if d:
+                os.makedirs(d, exist_ok=True)
+
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS token_buckets (
+                  name TEXT PRIMARY KEY,
+                  tokens REAL NOT NULL,
+                  updated_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "INSERT OR IGNORE INTO token_buckets (name, tokens, updated_at) VALUES (?, ?, ?)",
+                (self.name, self.burst, time.time()),
+            )
+            self._conn = conn
+        return self._conn
+
+    def reserve(self) -> float:
+        """토큰 1개 예약 -> 기다릴 시간(초, 0이면 바로 호출 가능). 저장소 오류 시 제한 없이 통과"""
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    tokens, updated_at = conn.execute(
+                        "SELECT tokens, updated_at FROM token_buckets WHERE name=?", (self.name,)
+                    ).fetchone()
+                    now = time.time()
+                    tokens = min(self.burst, tokens + max(0.0, now - updated_at) * self.rate) - 1.0
+                    conn.execute(
+                        "UPDATE token_buckets SET tokens=?, updated_at=? WHERE name=?",
+                        (tokens, now, self.name),
+                    )
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+        except Exception as e:
+            # 속도 제한 저장소 문제로 분류를 멈추지 않음 (fail-open)
+            self.errors += 1
+            print("[ratelimit] reserve failed:", e)
+            return 0.0
+
+        wait = -tokens / self.rate if tokens < 0 else 0.0
+        self.reserved += 1
+        if wait > 0:
+            self.delayed += 1
+            self.wait_s_total += wait
+        return wait
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rate_per_s": self.rate,
+            "burst": self.burst,
+            "reserved": self.reserved,
+            "delayed": self.delayed,
+            "avg_wait_ms": round(self.wait_s_total / self.reserved * 1000.0, 2) if self.reserved else 0.0,
+            "errors": self.errors,
+        }
@@ -0,0 +1,5 @@
+# ai_classifier 모듈은 서로 flat import(from verdict_cache import ...)를 하므로 상위 폴더를 경로에 추가
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
@@ -0,0 +1,109 @@
+import asyncio
+import time
+
+import pytest
+
+from admission import AdmissionController, DeadlineExceeded, Overloaded, RequestBudget
+from lanes import BACKFILL, INTERACTIVE
+
+
+def budget(timeout_s=None, wait=False, lane=INTERACTIVE):
+    deadline = None if timeout_s is None else time.monotonic() + timeout_s
+    return RequestBudget(deadline=deadline, wait=wait, lane=lane)
+
+
+def test_full_lane_rejects_with_retry_after():
+    async def go():
+        adm = AdmissionController(max_pending=2, concurrency=2)
+        adm.latency_ewma = 1.5
+        await adm.acquire(budget())
+        await adm.acquire(budget())
+        with pytest.raises(Overloaded) as exc:
+            await adm.acquire(budget())
+        return exc.value, adm.stats()
+
+    exc, stats = asyncio.run(go())
+    # 대기 2건 x 1.5초 / 동시성 2 -> 1.5초 -> 올림 2초
+    assert exc.retry_after_s == 2
+    assert (stats["admitted"], stats["rejected"], stats["pending"]) == (2, 1, 2)
+
+
+def test_retry_after_is_at_least_one_second():
+    adm = AdmissionController(max_pending=1, concurrency=8)
+    adm.latency_ewma = 0.01
+    assert adm.retry_after() == 1
+
+
+def test_lanes_are_admitted_separately():
+    async def go():
+        adm = AdmissionController(max_pending=1, concurrency=1)
+        await adm.acquire(budget(lane=BACKFILL))
+        await adm.acquire(budget(lane=INTERACTIVE))  # backfill이 가득 차도 실시간 요청은 통과
+        return adm.stats()["lane_pending"]
+
+    assert asyncio.run(go()) == {INTERACTIVE: 1, BACKFILL: 1}
+
+
+def test_waiting_item_is_admitted_on_release():
+    async def go():
+        adm = AdmissionController(max_pending=1, concurrency=1)
+        await adm.acquire(budget(lane=BACKFILL))
+        waiter = asyncio.ensure_future(adm.acquire(budget(timeout_s=5, wait=True, lane=BACKFILL)))
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+        await adm.release(BACKFILL)
+        await asyncio.wait_for(waiter, 1)
+        return adm.stats()
+
+    stats = asyncio.run(go())
+    assert (stats["admitted"], stats["rejected"], stats["expired"], stats["pending"]) == (2, 0, 0, 1)
+
+
+def test_waiting_item_times_out_at_deadline():
+    async def go():
+        adm = AdmissionController(max_pending=1, concurrency=1)
+        await adm.acquire(budget())
+        t0 = time.monotonic()
+        with pytest.raises(DeadlineExceeded):
+            await adm.acquire(budget(timeout_s=0.05, wait=True))
+        return time.monotonic() - t0, adm.stats()
+
+    waited, stats = asyncio.run(go())
+    assert 0.04 <= waited < 1.0
+    assert (stats["expired"], stats["pending"]) == (1, 1)
+
+
+def test_expired_budget_is_refused_before_queueing():
+    async def go():
+        adm = AdmissionController(max_pending=4, concurrency=1)
+        with pytest.raises(DeadlineExceeded):
+            await adm.acquire(budget(timeout_s=-0.001))
+        return adm.stats()
+
+    stats = asyncio.run(go())
+    assert (stats["expired"], stats["admitted"], stats["pending"]) == (1, 0, 0)
+
+
+def test_budget_from_timeout_header():
+    b = RequestBudget.from_timeout_ms("250", wait=True)
+    assert 0.2 < b.remaining() <= 0.25
+    assert b.wait and not b.expired()
+    assert RequestBudget.from_timeout_ms("0").expired()
+    assert RequestBudget.from_timeout_ms("abc").deadline is None
+    assert RequestBudget.from_timeout_ms(None).remaining() is None
+
+
+def test_latency_ewma():
+    adm = AdmissionController(max_pending=1, concurrency=1)
+    adm.observe_latency(3.0, alpha=0.5)
+    assert adm.latency_ewma == pytest.approx(2.0)
+
+
+def test_http_mapping_429_and_504():
+    server = pytest.importorskip("server")
+    resp = asyncio.run(server.overloaded_handler(None, Overloaded(7)))
+    assert resp.status_code == 429
+    assert resp.headers["Retry-After"] == "7"
+    resp = asyncio.run(server.deadline_handler(None, DeadlineExceeded()))
+    assert resp.status_code == 504
+    assert resp.body == b'{"detail":"deadline_exceeded"}'
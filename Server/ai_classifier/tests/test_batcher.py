@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+from batcher import MicroBatcher
+
+
+class Recorder:
+    def __init__(self, fail=None):
+        self.batches = []
+        self.fail = fail
+
+    async def __call__(self, items):
+        self.batches.append(list(items))
+        await asyncio.sleep(0)
+        if self.fail is not None:
+            raise self.fail
+        return [ValueError(i) if str(i).startswith("bad") else f"r:{i}" for i in items]
+
+
+def test_flushes_immediately_when_batch_is_full():
+    async def go():
+        dispatch = Recorder()
+        b = MicroBatcher(dispatch, max_size=3, max_wait_ms=10_000)
+        t0 = asyncio.get_running_loop().time()
+        results = await asyncio.gather(*(b.submit(i) for i in range(3)))
+        return results, dispatch.batches, asyncio.get_running_loop().time() - t0, b.stats()
+
+    results, batches, elapsed, stats = asyncio.run(go())
+    assert results == ["r:0", "r:1", "r:2"]
+    assert batches == [[0, 1, 2]]
+    assert elapsed < 1.0  # max_wait(10초)를 기다리지 않음
+    assert stats == {"batches": 1, "items": 3, "avg_batch_size": 3.0, "pending": 0}
+
+
+def test_partial_batch_flushes_after_max_wait():
+    async def go():
+        dispatch = Recorder()
+        b = MicroBatcher(dispatch, max_size=8, max_wait_ms=50)
+        tasks = [asyncio.ensure_future(b.submit(i)) for i in range(2)]
+        await asyncio.sleep(0.01)
+        before = list(dispatch.batches)
+        results = await asyncio.gather(*tasks)
+        return before, results, dispatch.batches
+
+    before, results, batches = asyncio.run(go())
+    assert before == []  # 시간이 지나기 전에는 보내지 않음
+    assert results == ["r:0", "r:1"]
+    assert batches == [[0, 1]]
+
+
+def test_overflow_is_split_into_max_size_batches():
+    async def go():
+        dispatch = Recorder()
+        b = MicroBatcher(dispatch, max_size=2, max_wait_ms=20)
+        results = await asyncio.gather(*(b.submit(i) for i in range(5)))
+        return results, dispatch.batches
+
+    results, batches = asyncio.run(go())
+    assert results == [f"r:{i}" for i in range(5)]
+    assert batches == [[0, 1], [2, 3], [4]]
+
+
+def test_zero_wait_sends_each_item_alone():
+    async def go():
+        dispatch = Recorder()
+        b = MicroBatcher(dispatch, max_size=8, max_wait_ms=0)
+        await asyncio.gather(*(b.submit(i) for i in range(3)))
+        return dispatch.batches
+
+    assert asyncio.run(go()) == [[0], [1], [2]]
+
+
+def test_item_exception_goes_only_to_its_caller():
+    async def go():
+        b = MicroBatcher(Recorder(), max_size=3, max_wait_ms=10)
+        return await asyncio.gather(b.submit("a"), b.submit("bad"), b.submit("c"), return_exceptions=True)
+
+    a, bad, c = asyncio.run(go())
+    assert (a, c) == ("r:a", "r:c")
+    assert isinstance(bad, ValueError)
+
+
+@pytest.mark.parametrize("fail", [RuntimeError("endpoint down"), None])
+def test_dispatch_failure_or_size_mismatch_fails_whole_batch(fail):
+    async def go():
+        if fail is None:
+            async def dispatch(items):
+                return items[:1]
+        else:
+            dispatch = Recorder(fail=fail)
+        b = MicroBatcher(dispatch, max_size=2, max_wait_ms=10)
+        return await asyncio.gather(b.submit(1), b.submit(2), return_exceptions=True)
+
+    results = asyncio.run(go())
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_cancelled_caller_does_not_break_batch():
+    async def go():
+        b = MicroBatcher(Recorder(), max_size=8, max_wait_ms=20)
+        gone = asyncio.ensure_future(b.submit("gone"))
+        kept = asyncio.ensure_future(b.submit("kept"))
+        await asyncio.sleep(0)
+        gone.cancel()
+        return await kept, gone.cancelled()
+
+    assert asyncio.run(go()) == ("r:kept", True)
@@ -0,0 +1,161 @@
+import asyncio
+
+import pytest
+
+from chunked_classify import ChunkedClassifier, select_chunks
+
+
+def normal(conf="high", raw="Normal"):
+    return {"classification": "Normal (benign)", "confidence": conf, "raw_response": raw, "source": "model"}
+
+
+def attack(label="SQL Injection", conf="high"):
+    return {"classification": label, "confidence": conf, "raw_response": label, "source": "model"}
+
+
+def fail_open():
+    return {
+        "classification": "Normal (benign)", "confidence": "low", "raw_response": "",
+        "source": "fail_open", "hf_error": "timeout", "hf_error_kind": "timeout",
+    }
+
+
+def run(chunks, answers, max_chunks=8):
+    """answers: chunk -> 결과 dict 또는 예외"""
+    clf = ChunkedClassifier(max_chunks=max_chunks)
+    seen = []
+
+    async def predict(chunk):
+        seen.append(chunk)
+        await asyncio.sleep(0)
+        answer = answers[chunk]
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    result = asyncio.run(clf.classify(chunks, predict))
+    return result, seen, clf.stats()
+
+
+# ===== select_chunks =====
+def test_select_all_when_within_limit():
+    assert select_chunks(["a", "b", "c"], 3) == [0, 1, 2]
+    assert select_chunks(["a"], 8) == [0]
+
+
+def test_select_prefers_suspicious_then_first_then_spread():
+    chunks = ["plain"] * 20
+    chunks[7] = "id=1 union select password from users"
+    chunks[15] = "<script>alert(1)</script>"
+    picked = select_chunks(chunks, 5)
+    assert len(picked) == 5
+    assert picked == sorted(picked)
+    assert {0, 7, 15} <= set(picked)
+    # 나머지 2개는 앞쪽에 몰리지 않고 남은 구간에 고르게
+    rest = [i for i in picked if i not in (0, 7, 15)]
+    assert max(rest) >= 10
+
+
+def test_select_caps_suspicious_chunks_at_max():
+    chunks = ["../../etc/passwd"] * 10
+    assert select_chunks(chunks, 3) == [0, 1, 2]
+
+
+def test_select_spread_covers_whole_body():
+    picked = select_chunks([f"c{i}" for i in range(100)], 4)
+    assert picked == [0, 17, 50, 83]
+
+
+# ===== 병합 =====
+def test_attack_wins_over_normal_and_picks_highest_confidence():
+    answers = {"a": normal(), "b": attack("Code Injection", "medium"), "c": attack("SQL Injection", "low")}
+    result, _, _ = run(list(answers), answers)
+    assert result["classification"] == "Code Injection"
+    assert result["confidence"] == "medium"
+    assert (result["chunks"], result["chunks_classified"]) == (3, 3)
+
+
+def test_all_normal_uses_most_confident_chunk():
+    answers = {"a": normal("low", "weak"), "b": normal("high", "strong"), "c": normal("medium", "mid")}
+    result, _, _ = run(list(answers), answers)
+    assert result["classification"] == "Normal (benign)"
+    assert result["confidence"] == "high"
+    assert result["raw_response"] == "strong"
+    assert result["source"] == "model"
+
+
+def test_failed_chunk_without_attack_is_not_confirmed_normal():
+    answers = {"a": normal(), "b": fail_open(), "c": normal()}
+    result, _, _ = run(list(answers), answers)
+    assert result["source"] == "fail_open"
+    assert result["hf_error_kind"] == "timeout"
+
+
+def test_raised_chunk_without_attack_is_partial_fail_open():
+    answers = {"a": normal(), "b": RuntimeError("deadline"), "c": normal()}
+    result, _, _ = run(list(answers), answers)
+    assert result["source"] == "fail_open"
+    assert result["hf_error_kind"] == "partial"
+    assert result["chunks_classified"] == 2
+
+
+def test_all_chunks_failing_reraises():
+    answers = {"a": RuntimeError("deadline"), "b": RuntimeError("overload")}
+    with pytest.raises(RuntimeError):
+        run(list(answers), answers)
+
+
+def test_attack_still_wins_when_other_chunk_failed():
+    answers = {"a": fail_open(), "b": attack()}
+    result, _, _ = run(list(answers), answers)
+    assert result["classification"] == "SQL Injection"
+    assert result["source"] == "model"
+
+
+def test_skipped_chunks_downgrade_normal_to_low():
+    chunks = [f"plain{i}" for i in range(10)]
+    answers = {c: normal("high") for c in chunks}
+    result, seen, stats = run(chunks, answers, max_chunks=3)
+    assert len(seen) == 3
+    assert result["classification"] == "Normal (benign)"
+    assert result["confidence"] == "low"
+    assert result["source"] == "model"
+    assert (result["chunks"], result["chunks_classified"]) == (10, 3)
+    assert stats["chunks_skipped"] == 7
+    assert stats["unconfirmed"] == 1
+
+
+def test_skipped_chunks_keep_attack_verdict():
+    chunks = [f"plain{i}" for i in range(10)]
+    answers = {c: normal() for c in chunks}
+    answers["plain0"] = attack("Path Traversal", "medium")
+    result, _, stats = run(chunks, answers, max_chunks=3)
+    assert result["classification"] == "Path Traversal"
+    assert result["confidence"] == "medium"
+    assert stats["unconfirmed"] == 0
+
+
+def test_decisive_attack_cancels_remaining_chunks():
+    async def go():
+        clf = ChunkedClassifier(max_chunks=8)
+        cancelled = []
+
+        async def predict(chunk):
+            if chunk == "evil":
+                return attack()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(chunk)
+                raise
+            return normal()
+
+        result = await clf.classify(["a", "evil", "b"], predict)
+        await asyncio.sleep(0)
+        return result, cancelled, clf.stats()
+
+    result, cancelled, stats = asyncio.run(go())
+    assert result["classification"] == "SQL Injection"
+    assert result["chunks_classified"] == 1
+    assert sorted(cancelled) == ["a", "b"]
+    assert stats["early_stops"] == 1
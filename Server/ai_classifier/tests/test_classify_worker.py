@@ -0,0 +1,113 @@
+import json
+import os
+import re
+import shutil
+import subprocess
+
+import pytest
+
+psycopg = pytest.importorskip("psycopg")
+
+from classify_worker import ClassifyWorker, heuristic_label, pg_dsn, to_confidence, to_session_label  # noqa: E402
+
+SESSIONIZING_JS = os.path.join(os.path.dirname(__file__), "..", "..", "log_collector", "sessionizing.js")
+
+LABELS = [
+    None, "", "Normal", "Normal (benign)", "  NORMAL ", "benign", "SQL Injection", "sql", "Code Injection",
+    "Path Traversal", "traversal", "attack", "Malicious", "XSS", "unknown", 0, "normalish", "Blind SQL",
+]
+CONFIDENCES = [None, "", "high", "HIGH", " High ", "medium", "low", "LOW", "very high", 1]
+HEURISTIC_TEXTS = [
+    ["GET /", ""],
+    ["GET /?id=1' or 1=1", ""],
+    ["GET /?q=%27", ""],
+    ["POST /login", "user=a&pass=b -- x"],
+    ["GET /?x=<script>alert(1)</script>", ""],
+    ["GET /img?src=javascript:alert(1)", ""],
+    ["GET /union-station", ""],
+    ["GET /?q=UNION SELECT 1", ""],
+    ["GET /?order by name", ""],
+]
+
+
+def test_pg_dsn_drops_prisma_params():
+    url = "postgresql://u:p@db:5432/app?schema=public&sslmode=require&connection_limit=5&pgbouncer=true"
+    assert pg_dsn(url) == "postgresql://u:p@db:5432/app?sslmode=require"
+    assert pg_dsn("postgresql://u:p@db/app?schema=public") == "postgresql://u:p@db/app"
+    assert pg_dsn("postgresql://u@/app?host=/tmp/pg") == "postgresql://u@/app?host=%2Ftmp%2Fpg"
+
+
+def worker(monkeypatch, max_fail_open=3):
+    monkeypatch.setenv("MAX_FAIL_OPEN", str(max_fail_open))
+    monkeypatch.delenv("HF_RATE_LIMIT_RPS", raising=False)
+    return ClassifyWorker(clf=None, dsn="")
+
+
+def row(fail_open=0, uri="/?id=1' or 1=1", body=""):
+    return {"id": 7, "method": "GET", "uri": uri, "request_body": body, "classify_fail_open": fail_open}
+
+
+OK = {"classification": "SQL Injection", "confidence": "high", "raw_response": "SQL Injection"}
+FAILED = {"classification": "Normal", "confidence": "low", "raw_response": "", "hf_error": "timeout"}
+
+
+def test_settle_passes_model_result_through(monkeypatch):
+    w = worker(monkeypatch)
+    assert w._settle(row(fail_open=2), OK) is OK
+
+
+def test_settle_retries_until_persisted_count_reaches_limit(monkeypatch):
+    w = worker(monkeypatch, max_fail_open=3)
+    # 이전 claim(어느 replica였든)에서 0, 1번 실패 -> 이번 실패는 아직 재시도
+    assert w._settle(row(fail_open=0), FAILED) is None
+    assert w._settle(row(fail_open=1), FAILED) is None
+    # 세 번째 실패 -> 휴리스틱으로 확정
+    settled = w._settle(row(fail_open=2), FAILED)
+    assert settled == {"label": "SQL_INJECTION", "confidence": "low", "raw_response": None, "classification": None}
+    assert to_confidence(settled["confidence"]) == "LOW"
+
+
+def test_settle_heuristic_uses_body(monkeypatch):
+    w = worker(monkeypatch, max_fail_open=1)
+    assert w._settle(row(uri="/comment", body="<script>alert(1)</script>"), FAILED)["label"] == "CODE_INJECTION"
+    assert w._settle(row(uri="/", body=""), FAILED)["label"] == "NORMAL"
+
+
+def test_settle_missing_count_counts_as_first_failure(monkeypatch):
+    w = worker(monkeypatch, max_fail_open=2)
+    r = row()
+    del r["classify_fail_open"]
+    assert w._settle(r, FAILED) is None
+
+
+def _js_functions(*names):
+    with open(SESSIONIZING_JS, encoding="utf-8") as f:
+        src = f.read()
+    out = []
+    for name in names:
+        m = re.search(rf"^function {name}\(.*?^}}\n", src, re.M | re.S)
+        assert m, f"{name} not found in sessionizing.js"
+        out.append(m.group(0))
+    return "\n".join(out)
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node not installed")
+def test_label_confidence_heuristic_match_sessionizing_js():
+    script = _js_functions("toSessionLabelEnum", "toConfidenceEnum", "heuristicLabel") + """
+const input = JSON.parse(require('fs').readFileSync(0, 'utf8'));
+console.log(JSON.stringify({
+  labels: input.labels.map(toSessionLabelEnum),
+  // normalizeClassifierResult: 모르는 값(null)은 LOW
+  confidences: input.confidences.map((c) => toConfidenceEnum(c) || 'LOW'),
+  heuristics: input.heuristics.map(heuristicLabel),
+}));
+"""
+    payload = {"labels": LABELS, "confidences": CONFIDENCES, "heuristics": HEURISTIC_TEXTS}
+    proc = subprocess.run(
+        ["node", "-e", script], input=json.dumps(payload), capture_output=True, text=True, timeout=30, check=True
+    )
+    js = json.loads(proc.stdout)
+
+    assert [to_session_label(x) for x in LABELS] == js["labels"]
+    assert [to_confidence(x) for x in CONFIDENCES] == js["confidences"]
+    assert [heuristic_label(t) for t in HEURISTIC_TEXTS] == js["heuristics"]
@@ -0,0 +1,114 @@
+import pytest
+
+import resilience
+from endpoints import Endpoint, EndpointPool, parse_endpoint_urls
+from resilience import CircuitBreaker
+
+
+def pool(*weights, strategy="least_outstanding", failure_threshold=2):
+    eps = [
+        Endpoint(f"http://ep{i}", f"ep{i}", weight=w, failure_threshold=failure_threshold, cooldown_s=10)
+        for i, w in enumerate(weights)
+    ]
+    return EndpointPool(eps, strategy=strategy), eps
+
+
+def test_parse_endpoint_urls():
+    assert parse_endpoint_urls(" http://a|2, http://b ,,http://c|0.5") == [
+        ("http://a", 2.0), ("http://b", 1.0), ("http://c", 0.5)
+    ]
+    for bad in ("http://a|x", "http://a|0", "http://a|-1"):
+        with pytest.raises(RuntimeError):
+            parse_endpoint_urls(bad)
+
+
+def test_from_env_names_and_strategy(monkeypatch):
+    monkeypatch.setenv("HF_ENDPOINT_URLS", "http://h:1/a|3,http://h:1/b,http://other")
+    monkeypatch.setenv("HF_LB_STRATEGY", "ewma")
+    p = EndpointPool.from_env(failure_threshold=3, cooldown_s=5)
+    assert [e.name for e in p.endpoints] == ["h:1#0", "h:1#1", "other"]
+    assert p.primary.weight == 3.0
+    assert p.strategy == "ewma"
+
+    monkeypatch.setenv("HF_LB_STRATEGY", "round_robin")
+    with pytest.raises(RuntimeError):
+        EndpointPool.from_env(failure_threshold=3, cooldown_s=5)
+
+
+def test_least_outstanding_spreads_by_weight():
+    p, (a, b) = pool(1.0, 2.0)
+    picks = []
+    for _ in range(6):
+        ep = p.pick()
+        ep.begin()
+        picks.append(ep.name)
+    # (outstanding + 1) / weight: 가중치 2인 b가 두 배 받음
+    assert picks.count("ep1") == 4 and picks.count("ep0") == 2
+    assert (a.outstanding, b.outstanding) == (2, 4)
+
+
+def test_least_outstanding_prefers_idle_endpoint():
+    p, (a, b, c) = pool(1.0, 1.0, 1.0)
+    a.begin()
+    c.begin()
+    c.begin()
+    assert p.pick() is b
+
+
+def test_ewma_prefers_faster_endpoint_and_tries_unknown_once():
+    p, (fast, slow, new) = pool(1.0, 1.0, 1.0, strategy="ewma")
+    fast.ewma_s, slow.ewma_s = 0.1, 0.5
+    # 기록이 없는 Endpoint는 가장 빠른 쪽(0.1)과 같다고 봄 -> fast와 동점
+    assert p.pick() in (fast, new)
+    new.ewma_s = 0.3
+    assert p.pick() is fast
+    # 처리 중인 요청이 쌓이면 느려도 한가한 쪽으로: fast 0.1 x 6 > new 0.3 x 1
+    for _ in range(5):
+        fast.begin()
+    assert p.pick() is new
+
+
+def test_exclude_is_used_only_as_last_resort():
+    p, (a, b) = pool(1.0, 1.0)
+    b.begin()
+    assert p.pick(exclude=[a]) is b
+    assert p.pick(exclude=[a, b]) is a
+
+
+def test_open_breaker_ejects_endpoint(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: now[0])
+    p, (a, b) = pool(10.0, 1.0)
+    for _ in range(2):
+        a.end(a.begin(), ok=False)
+    assert a.breaker.state == CircuitBreaker.OPEN
+    assert all(p.pick() is b for _ in range(3))
+
+    for _ in range(2):
+        b.end(b.begin(), ok=False)
+    assert p.pick() is None
+
+    # cooldown 후 시험 호출 1개만 a로
+    now[0] += 10
+    assert p.pick() is a
+    assert p.pick() is b
+
+
+def test_end_bookkeeping():
+    (ep,) = pool(1.0)[1]
+    ep.end(ep.begin(), ok=True)
+    assert ep.ewma_s is not None
+    ewma = ep.ewma_s
+
+    ep.end(ep.begin(), ok=False)  # 실패는 EWMA에 넣지 않음
+    assert ep.ewma_s == ewma
+    assert ep.breaker.stats()["consecutive_failures"] == 1
+
+    ep.end(ep.begin(), ok=False, retryable=False)  # 4xx: Endpoint는 살아있음
+    assert ep.breaker.stats()["consecutive_failures"] == 0
+    assert ep.failures == 2
+
+    ep.end(ep.begin(), ok=None)  # hedge 취소: 통계에 성공/실패로 남지 않음
+    stats = ep.stats()
+    assert (stats["requests"], stats["failures"], stats["outstanding"]) == (4, 2, 0)
+    assert stats["state"] == "closed"
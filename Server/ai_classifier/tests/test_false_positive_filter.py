@@ -0,0 +1,82 @@
+import random
+import re
+
+import pytest
+
+import false_positive_filter as fpf
+from false_positive_filter import DEFAULT_SAFE_PATTERNS, ConservativeFilter, PatternSet, required_literal
+
+ESCAPE_PATTERNS = [
+    r"\x2fadmin\x2fbackup",
+    r"\x41bc",
+    r"\101xyz",
+    r"Admin.php",
+    r"\U0001F600smile",
+    r"\N{SOLIDUS}etc\N{SOLIDUS}hosts",
+    r"\0abc",
+    r"(ab)\1cd",
+    r"(?P<x>q)(?P=x)zz",
+    r"[\x41-\x5a]{3}\x2ebak",
+    r"\d+\.php\?id=\x31",
+    r"ab\x43?d",
+    r"foo|\x62ar",
+    r"\bwp-login\.php\b",
+]
+
+FRAGMENTS = [
+    "/", "/admin/backup", "/ADMIN/BACKUP", "Abc", "abc", "Axyz", "axyz", "Admin.php", "admin.PHP", "\U0001F600smile",
+    "/etc/hosts", "\x00abc", "ababcd", "abcd", "qqzz", "XYZ.bak", "xyz.bak", "12.php?id=1", "abd", "abCd", "bar",
+    "wp-login.php", "xwp-login.php", "%2f", "a", "b", "z", ".", "?", "1",
+]
+
+
+def naive(patterns, text):
+    for name, p in patterns:
+        if re.compile(p, re.IGNORECASE).search(text):
+            return name
+    return None
+
+
+@pytest.mark.parametrize(
+    "pattern, literal",
+    [
+        (r"\x41bc", "Abc"),
+        (r"\101xyz", "Axyz"),
+        (r"\x2fadmin\x2fbackup", "/admin/backup"),
+        (r"(ab)\1cd", "cd"),
+        (r"\N{SOLIDUS}etc", "/etc"),
+        (r"ab\x43?d", "ab"),
+        (r"\{\{\s*data\.model", "data.model"),
+        (r"foo|bar", ""),
+    ],
+)
+def test_required_literal_escapes(pattern, literal):
+    assert required_literal(pattern) == literal
+
+
+@pytest.mark.parametrize("backend", ["default", "trie-regex"])
+def test_pattern_set_matches_plain_re_search(monkeypatch, backend):
+    if backend == "trie-regex":
+        monkeypatch.setattr(fpf, "ahocorasick", None)
+    patterns = [(p, p) for p in ESCAPE_PATTERNS] + DEFAULT_SAFE_PATTERNS
+    rng = random.Random(3)
+    texts = FRAGMENTS + ["".join(rng.choice(FRAGMENTS) for _ in range(rng.randint(1, 4))) for _ in range(5000)]
+
+    # 하나씩 따로: 어떤 패턴이든 re.search와 같은 결과
+    for name, p in patterns:
+        single = PatternSet([(name, p)])
+        for text in texts:
+            assert single.match(text) == naive([(name, p)], text), (p, text)
+
+    # 전체 묶음: 먼저 선언된 패턴 이름까지 같음
+    combined = PatternSet(patterns)
+    for text in texts:
+        assert combined.match(text) == naive(patterns, text), text
+
+
+def test_config_pattern_with_escapes(tmp_path):
+    cfg = tmp_path / "fp.json"
+    cfg.write_text('{"extend": false, "safe_patterns": [{"name": "backup", "pattern": "\\\\x2fadmin\\\\x2fbackup"}]}')
+    f = ConservativeFilter(str(cfg))
+    assert f.is_safe_pattern("/admin/backup")
+    assert f.explain("Path Traversal", "/admin/backup", 404) == ("Normal (benign)", "safe_404:backup")
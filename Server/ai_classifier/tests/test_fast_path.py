@@ -0,0 +1,38 @@
+import pytest
+
+from fast_path import FastPathRouter
+
+
+@pytest.fixture
+def router(monkeypatch):
+    for name in ("FAST_PATH_CLASSES", "FAST_PATH_STATIC_EXT", "FAST_PATH_STATIC_QUERY", "FAST_PATH_BENIGN_ROUTES", "FP_FILTER_PATTERNS"):
+        monkeypatch.delenv(name, raising=False)
+    return FastPathRouter()
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        "/app.js?id=1%20OR%201=1--",
+        "/x.css?q=1 union select password from users",
+        "/a.js?cmd=system(id)",
+        "/static/app.js?v=1&id=1",
+        "/style.css?v=1;ls",
+        "/img/logo.png?file=../../etc/shadow",
+    ],
+)
+def test_static_with_attack_query_goes_to_model(router, path):
+    assert router.route("GET", path) is None
+
+
+@pytest.mark.parametrize("path", ["/static/app.js", "/static/app.js?v=3", "/css/site.css?ver=2.1.0", "/logo.png?_=1700000000"])
+def test_static_without_query_or_with_cache_buster(router, path):
+    result = router.route("GET", path)
+    assert result is not None and result["raw_response"] == "fast_path:static"
+
+
+def test_static_query_disabled(monkeypatch):
+    monkeypatch.setenv("FAST_PATH_STATIC_QUERY", "")
+    router = FastPathRouter()
+    assert router.route("GET", "/app.js?v=3") is None
+    assert router.route("GET", "/app.js") is not None
@@ -0,0 +1,159 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from job_runner import JobRunner
+from job_store import JobStore
+
+
+def test_put_results_rolls_back_on_error(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    job_id = store.create([{"a": 1}, {"a": 2}])
+
+    with pytest.raises(TypeError):
+        store.put_results(job_id, [(0, {"classification": "Normal"}), (1, {"bad": object()})])
+
+    # 실패한 트랜잭션이 남아 있지 않아야 다음 기록이 성공
+    job = store.put_results(job_id, [(0, {"classification": "Normal"}), (1, {"classification": "Normal"})])
+    assert (job["status"], job["completed"]) == ("done", 2)
+    store.close()
+
+
+def test_flush_failure_keeps_results_and_job_finishes(tmp_path):
+    async def run():
+        store = JobStore(str(tmp_path / "jobs.db"))
+        fail = {"n": 1}
+        real_put = store.put_results
+
+        def flaky_put(job_id, results):
+            if fail["n"]:
+                fail["n"] -= 1
+                raise RuntimeError("disk I/O error")
+            return real_put(job_id, results)
+
+        store.put_results = flaky_put
+
+        async def classify(item):
+            return {"classification": "Normal (benign)"}
+
+        with ThreadPoolExecutor(2) as ex:
+            runner = JobRunner(store, classify, ex, concurrency=2, flush_ms=10)
+            await runner.start()
+            job_id = await runner.submit([{"i": i} for i in range(5)])
+            for _ in range(200):
+                await runner.wait_update(job_id, timeout=0.02)
+                if store.get(job_id)["status"] == "done":
+                    break
+            await runner.stop()
+
+            job = store.get(job_id)
+            assert (job["status"], job["completed"]) == ("done", 5)
+            # 끝난 job의 알림 event는 정리됨
+            assert runner.stats()["watched_jobs"] == 0
+        store.close()
+
+    asyncio.run(run())
+
+
+async def _wait_finished(runner, store, job_id, rounds=300):
+    for _ in range(rounds):
+        await runner.wait_update(job_id, timeout=0.02)
+        if store.get(job_id)["status"] in ("done", "cancelled"):
+            return
+
+
+def test_fail_open_items_are_retried_not_stored(tmp_path):
+    async def run():
+        store = JobStore(str(tmp_path / "jobs.db"))
+        calls = {}
+
+        async def classify(item):
+            # 각 item의 첫 시도는 HF 장애 대체 결과
+            n = calls[item["i"]] = calls.get(item["i"], 0) + 1
+            if n == 1:
+                return {"classification": "Normal (benign)", "source": "fail_open", "degraded_reason": "timeout"}
+            return {"classification": "SQL Injection", "source": "model"}
+
+        with ThreadPoolExecutor(2) as ex:
+            runner = JobRunner(store, classify, ex, concurrency=2, flush_ms=10, max_retries=3, retry_backoff_s=0.01)
+            await runner.start()
+            job_id = await runner.submit([{"i": i} for i in range(3)])
+            await _wait_finished(runner, store, job_id)
+            await runner.stop()
+
+            job = store.get(job_id)
+            assert (job["status"], job["completed"], job["failed"]) == ("done", 3, 0)
+            assert [r["result"]["classification"] for r in store.results(job_id)] == ["SQL Injection"] * 3
+            stats = runner.stats()
+            assert (stats["items_retried"], stats["items_gave_up"]) == (3, 0)
+            assert (stats["active_jobs"], stats["retry_waiting"]) == (0, 0)
+        store.close()
+
+    asyncio.run(run())
+
+
+def test_fail_open_gives_up_as_error_after_max_retries(tmp_path):
+    async def run():
+        store = JobStore(str(tmp_path / "jobs.db"))
+        calls = []
+
+        async def classify(item):
+            calls.append(item["i"])
+            return {"classification": "Normal (benign)", "source": "fail_open", "degraded_reason": "circuit_open"}
+
+        with ThreadPoolExecutor(2) as ex:
+            runner = JobRunner(store, classify, ex, concurrency=2, flush_ms=10, max_retries=2, retry_backoff_s=0.01)
+            await runner.start()
+            job_id = await runner.submit([{"i": 0}, {"i": 1}])
+            await _wait_finished(runner, store, job_id)
+            await runner.stop()
+
+            job = store.get(job_id)
+            # 모델이 내지 않은 Normal을 결과로 남기지 않고 실패로 집계
+            assert (job["status"], job["completed"], job["failed"]) == ("done", 2, 2)
+            assert [r["result"] for r in store.results(job_id)] == [
+                {"error": "fail_open", "degraded_reason": "circuit_open"}
+            ] * 2
+            assert sorted(calls) == [0, 0, 0, 1, 1, 1]  # 첫 시도 + 재시도 2번
+            assert runner.stats()["items_gave_up"] == 2
+        store.close()
+
+    asyncio.run(run())
+
+
+def test_cancelled_job_is_forgotten_once_its_items_drain(tmp_path):
+    async def run():
+        store = JobStore(str(tmp_path / "jobs.db"))
+        gate = asyncio.Event()
+        classified = []
+
+        async def classify(item):
+            await gate.wait()
+            classified.append(item["i"])
+            return {"classification": "Normal (benign)", "source": "model"}
+
+        with ThreadPoolExecutor(2) as ex:
+            runner = JobRunner(store, classify, ex, concurrency=1, flush_ms=10)
+            await runner.start()
+            job_id = await runner.submit([{"i": i} for i in range(5)])
+            await asyncio.sleep(0.01)
+            await runner.cancel(job_id)
+            assert runner.stats()["cancelled_jobs"] == 1
+
+            gate.set()
+            await runner._queue.join()
+            await runner.stop()
+
+            # 취소 전에 분류 중이던 하나만 끝나고 나머지는 건너뜀, 취소 표시는 정리됨
+            assert classified == [0]
+            assert store.get(job_id)["status"] == "cancelled"
+            stats = runner.stats()
+            assert (stats["cancelled_jobs"], stats["active_jobs"], stats["watched_jobs"]) == (0, 0, 0)
+
+            # 끝난 job에 대한 취소는 아무것도 남기지 않음
+            await runner.cancel(job_id)
+            assert runner.stats()["cancelled_jobs"] == 0
+        store.close()
+
+    asyncio.run(run())
@@ -0,0 +1,84 @@
+import math
+
+import pytest
+
+from model_inference import MistralClassifier
+
+
+@pytest.fixture
+def clf(monkeypatch):
+    monkeypatch.setenv("HF_API_KEY", "test")
+    monkeypatch.setenv("HF_ENDPOINT_URL", "http://127.0.0.1:9")
+    monkeypatch.setenv("LABEL_PROTOCOL", "code")
+    monkeypatch.setenv("LABEL_CONF_HIGH", "0.9")
+    monkeypatch.setenv("LABEL_CONF_MEDIUM", "0.6")
+    return MistralClassifier()
+
+
+def tok(text, p=None):
+    return {"text": text, "logprob": None if p is None else math.log(p)}
+
+
+def test_code_without_details_is_high_unscored(clf):
+    assert clf._derive_code("S", {}) == ("SQL Injection", "high", None)
+    assert clf._derive_code(" p\n", {}) == ("Path Traversal", "high", None)
+    assert clf.label_stats == {"code": 2, "off_protocol": 0, "scored": 0}
+
+
+@pytest.mark.parametrize(
+    "output, label",
+    [
+        ("SQL Injection", "SQL Injection"),  # 첫 글자가 코드와 같아도 라벨 이름이면 off-protocol
+        ("Normal", "Normal (benign)"),
+        ("Path traversal attempt", "Path Traversal"),
+    ],
+)
+def test_label_name_answer_falls_back_to_text_parsing(clf, output, label):
+    details = {"tokens": [tok("S", 0.99)]}
+    classification, _, score = clf._derive_code(output, details)
+    assert classification == label
+    assert score is None
+    assert clf.label_stats == {"code": 0, "off_protocol": 1, "scored": 0}
+
+
+def test_unknown_code_is_off_protocol(clf):
+    classification, confidence, score = clf._derive_code("X", {})
+    assert score is None
+    assert (classification, confidence) == clf._derive_classification("X")
+    assert clf.label_stats["off_protocol"] == 1
+
+
+def test_top_tokens_normalized_among_label_codes(clf):
+    details = {
+        "tokens": [tok(" ", 0.9), tok("C", 0.5)],
+        "top_tokens": [
+            [tok(" ", 0.9)],
+            # 라벨 코드 후보만 정규화: 대소문자/공백이 다른 같은 코드는 합침, 코드가 아닌 후보는 무시
+            [tok("C", 0.5), tok(" c", 0.1), tok("S", 0.2), tok("The", 0.15), tok("N", None)],
+        ],
+    }
+    classification, confidence, score = clf._derive_code("C", details)
+    assert classification == "Code Injection"
+    assert score == pytest.approx(0.6 / 0.8)
+    assert confidence == "medium"
+    assert clf.label_stats == {"code": 1, "off_protocol": 0, "scored": 1}
+
+
+def test_logprob_only_fallback_when_code_missing_from_top_tokens(clf):
+    details = {"tokens": [tok("N", 0.95)], "top_tokens": [[tok("S", 0.03)]]}
+    assert clf._code_score("N", details) == pytest.approx(0.95)
+    assert clf._derive_code("N", details) == ("Normal (benign)", "high", pytest.approx(0.95))
+
+    # top_tokens 자체가 없을 때도 선택된 토큰의 확률
+    assert clf._code_score("P", {"tokens": [tok("P", 0.4)]}) == pytest.approx(0.4)
+
+
+def test_code_score_none_without_logprobs(clf):
+    assert clf._code_score("S", {"tokens": [tok("S")]}) is None
+    assert clf._code_score("S", {"tokens": [tok(" "), tok("\n")]}) is None
+    assert clf._code_score("S", {}) is None
+
+
+@pytest.mark.parametrize("p, confidence", [(0.9, "high"), (0.89, "medium"), (0.6, "medium"), (0.59, "low")])
+def test_confidence_buckets(clf, p, confidence):
+    assert clf._derive_code("S", {"tokens": [tok("S", p)]}) == ("SQL Injection", confidence, pytest.approx(p))
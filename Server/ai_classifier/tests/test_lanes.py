@@ -0,0 +1,141 @@
+import asyncio
+
+import pytest
+
+from lanes import BACKFILL, INTERACTIVE, LaneScheduler, parse_lane_map, resolve_lane
+
+
+def scheduler(concurrency=1, interactive=1.0, backfill=1.0, caps=None):
+    return LaneScheduler(concurrency, weights={INTERACTIVE: interactive, BACKFILL: backfill}, max_concurrency=caps or {})
+
+
+async def drain(sched, order, tasks, releases):
+    """슬롯을 받은 순서를 order에 남기면서 releases번 슬롯을 하나씩 반납"""
+    for _ in range(releases):
+        await asyncio.sleep(0)
+        lane = order[-1]
+        sched.release(lane)
+    await asyncio.sleep(0)
+    for t in tasks:
+        t.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def enqueue(sched, lane, n, order):
+    async def one():
+        await sched.acquire(lane)
+        order.append(lane)
+
+    return [asyncio.ensure_future(one()) for _ in range(n)]
+
+
+def test_stride_shares_slots_by_weight():
+    async def go():
+        sched = scheduler(concurrency=1, interactive=3.0, backfill=1.0)
+        await sched.acquire(BACKFILL)
+        order = [BACKFILL]
+        tasks = enqueue(sched, INTERACTIVE, 40, order) + enqueue(sched, BACKFILL, 40, order)
+        await asyncio.sleep(0)
+        await drain(sched, order, tasks, 31)
+        return order[:32]
+
+    granted = asyncio.run(go())
+    assert granted.count(INTERACTIVE) == 24
+    assert granted.count(BACKFILL) == 8
+    # 몰아주지 않고 섞임: backfill도 슬롯 5개 안에 한 번은 받음
+    runs = "".join("i" if lane == INTERACTIVE else "b" for lane in granted)
+    assert "iiiii" not in runs
+
+
+def test_returning_idle_lane_gets_no_stale_credit():
+    async def go():
+        sched = scheduler(concurrency=1)
+        await sched.acquire(BACKFILL)
+        order = [BACKFILL]
+        tasks = enqueue(sched, BACKFILL, 30, order)
+        await asyncio.sleep(0)
+        await drain(sched, order, [], 10)  # backfill만 10번
+        tasks += enqueue(sched, INTERACTIVE, 10, order)
+        await asyncio.sleep(0)
+        start = len(order)
+        await drain(sched, order, tasks, 8)
+        return order[start:]
+
+    after = asyncio.run(go())
+    # 쉬던 interactive가 그동안 못 받은 몫(10개)을 한꺼번에 쓰지 않고 거의 1:1로 번갈아
+    assert after.count(INTERACTIVE) in (4, 5)
+    runs = "".join("i" if lane == INTERACTIVE else "b" for lane in after)
+    assert "iii" not in runs
+
+
+def test_lane_cap_keeps_slots_for_interactive():
+    async def go():
+        sched = scheduler(concurrency=3, caps={BACKFILL: 1})
+        await sched.acquire(BACKFILL)
+        blocked = asyncio.ensure_future(sched.acquire(BACKFILL))
+        await asyncio.sleep(0)
+        assert not blocked.done()  # 전체 슬롯은 남아도 backfill 상한
+        await sched.acquire(INTERACTIVE)
+        await sched.acquire(INTERACTIVE)
+        stats = sched.stats()
+        sched.release(BACKFILL)
+        await asyncio.wait_for(blocked, 1)
+        return stats, sched.stats()
+
+    before, after = asyncio.run(go())
+    assert before["inflight"] == 3
+    assert before["lanes"][BACKFILL]["waiting"] == 1
+    assert after["lanes"][BACKFILL]["inflight"] == 1
+    assert after["lanes"][BACKFILL]["granted"] == 2
+
+
+def test_fifo_within_lane_and_cancelled_waiter_is_skipped():
+    async def go():
+        sched = scheduler(concurrency=1)
+        await sched.acquire(INTERACTIVE)
+        order = []
+
+        async def one(tag):
+            await sched.acquire(INTERACTIVE)
+            order.append(tag)
+
+        tasks = {tag: asyncio.ensure_future(one(tag)) for tag in "abc"}
+        await asyncio.sleep(0)
+        tasks["a"].cancel()
+        await asyncio.sleep(0)
+        sched.release(INTERACTIVE)
+        await asyncio.sleep(0)
+        sched.release(INTERACTIVE)
+        await asyncio.sleep(0)
+        return order, sched.stats()
+
+    order, stats = asyncio.run(go())
+    assert order == ["b", "c"]
+    assert stats["inflight"] == 1
+    assert stats["lanes"][INTERACTIVE]["waiting"] == 0
+
+
+def test_cancel_after_grant_returns_slot():
+    async def go():
+        sched = scheduler(concurrency=1)
+        await sched.acquire(INTERACTIVE)
+        first = asyncio.ensure_future(sched.acquire(INTERACTIVE))
+        second = asyncio.ensure_future(sched.acquire(INTERACTIVE))
+        await asyncio.sleep(0)
+        sched.release(INTERACTIVE)  # first가 슬롯을 받음 (아직 깨어나기 전)
+        first.cancel()
+        await asyncio.gather(first, return_exceptions=True)
+        await asyncio.wait_for(second, 1)
+        return sched.stats()
+
+    stats = asyncio.run(go())
+    assert stats["inflight"] == 1
+
+
+def test_parse_lane_map_and_resolve_lane():
+    assert parse_lane_map("interactive=8, Backfill=2,bogus=1,junk", 1.0) == {INTERACTIVE: 8.0, BACKFILL: 2.0}
+    assert parse_lane_map("", 0) == {INTERACTIVE: 0, BACKFILL: 0}
+    assert resolve_lane(None, "", " BackFill ") == BACKFILL
+    assert resolve_lane(None, default=BACKFILL) == BACKFILL
+    with pytest.raises(ValueError):
+        resolve_lane("urgent")
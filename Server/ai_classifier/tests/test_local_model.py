@@ -0,0 +1,170 @@
+import array
+import math
+import random
+import zlib
+
+import pytest
+
+import local_model as lm
+from local_model import LocalCascade, LocalModel, hash_features, request_text
+
+CLASSES = ["Normal", "SQL Injection", "Code Injection", "Path Traversal"]
+
+
+def reference_features(text, n_features, ngram_min=2, ngram_max=4):
+    """학습 때 쓰던 그대로의 dict 루프 구현"""
+    counts = {}
+    data = text.encode("utf-8", "surrogatepass")
+    for k in range(ngram_min, ngram_max + 1):
+        for i in range(len(data) - k + 1):
+            idx = zlib.crc32(data[i : i + k]) % n_features
+            counts[idx] = counts.get(idx, 0.0) + 1.0
+    norm = math.sqrt(sum(v * v for v in counts.values()))
+    return {idx: v / norm for idx, v in counts.items()}
+
+
+def random_model(n_features=1 << 12, seed=0):
+    rng = random.Random(seed)
+    weights = array.array("f", (rng.uniform(-2, 2) for _ in range(len(CLASSES) * n_features)))
+    bias = [rng.uniform(-1, 1) for _ in CLASSES]
+    return LocalModel(CLASSES, weights, bias, n_features, meta={"seed": seed})
+
+
+def reference_proba(model, method, path, body=""):
+    feats = reference_features(request_text(method, path, body), model.n_features, model.ngram_min, model.ngram_max)
+    scores = [
+        b + sum(model.weights[c * model.n_features + idx] * v for idx, v in feats.items())
+        for c, b in enumerate(model.bias)
+    ]
+    top = max(scores)
+    exps = [math.exp(s - top) for s in scores]
+    return {label: e / sum(exps) for label, e in zip(model.classes, exps)}
+
+
+REQUESTS = [
+    ("GET", "/", ""),
+    ("", "", ""),
+    ("GET", "/index.php?id=1%27%20or%201=1", ""),
+    ("POST", "/login", "user=admin&pass=%3Cscript%3E"),
+    ("GET", "/../../etc/passwd", "nan"),
+    ("GET", "/검색?q=한글", ""),
+    ("POST", "/upload", "A" * 5000),
+]
+
+
+def test_hash_features_is_stable():
+    # 저장된 모델의 bucket 배치가 바뀌면 안 됨 (crc32 % n_features, 2~4-gram, L2 정규화)
+    assert hash_features("get /a", 16) == pytest.approx(
+        {0: 1 / math.sqrt(18), 1: 1 / math.sqrt(18), 3: 1 / math.sqrt(18), 4: 2 / math.sqrt(18),
+         5: 2 / math.sqrt(18), 7: 1 / math.sqrt(18), 8: 2 / math.sqrt(18), 10: 1 / math.sqrt(18),
+         12: 1 / math.sqrt(18)}
+    )
+    assert sorted(hash_features("get /", 1 << 18)) == [101, 2820, 19683, 34135, 36549, 65882, 96840, 208496, 211000]
+    assert hash_features("", 1 << 18) == {}
+    for method, path, body in REQUESTS:
+        text = request_text(method, path, body)
+        assert hash_features(text, 1 << 18) == pytest.approx(reference_features(text, 1 << 18))
+
+
+def test_request_text_caps_and_normalizes():
+    assert request_text("get", "/A%20B", "null") == "get /a b"
+    assert request_text("POST", "/x", "a+b") == "post /x a b"
+    assert len(request_text("POST", "/upload", "A" * 5000)) == lm.MAX_TEXT_CHARS
+
+
+@pytest.mark.parametrize("backend", ["numpy", "python"])
+def test_predict_proba_matches_dense_reference(monkeypatch, backend):
+    if backend == "python":
+        monkeypatch.setattr(lm, "np", None)
+    elif lm.np is None:
+        pytest.skip("numpy not installed")
+    model = random_model()
+    for method, path, body in REQUESTS:
+        probs = model.predict_proba(method, path, body)
+        assert list(probs) == CLASSES
+        assert sum(probs.values()) == pytest.approx(1.0)
+        assert probs == pytest.approx(reference_proba(model, method, path, body), abs=1e-6)
+
+
+def test_save_load_round_trip(tmp_path):
+    model = random_model(seed=7)
+    path = tmp_path / "local_model.json.gz"
+    model.save(str(path))
+    loaded = LocalModel.load(str(path))
+
+    assert loaded.classes == model.classes
+    assert loaded.n_features == model.n_features
+    assert (loaded.ngram_min, loaded.ngram_max) == (model.ngram_min, model.ngram_max)
+    assert loaded.bias == model.bias
+    assert loaded.weights.tobytes() == model.weights.tobytes()
+    assert loaded.meta == {"seed": 7}
+    for req in REQUESTS:
+        assert loaded.predict_proba(*req) == pytest.approx(model.predict_proba(*req))
+
+
+def test_load_rejects_unknown_format(tmp_path):
+    import gzip
+    import json
+
+    path = tmp_path / "bad.json.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump({"format": "something-else"}, f)
+    with pytest.raises(ValueError):
+        LocalModel.load(str(path))
+
+
+def test_weights_size_is_checked():
+    with pytest.raises(ValueError):
+        LocalModel(CLASSES, array.array("f", [0.0] * 10), [0.0] * 4, 4)
+
+
+class FixedModel:
+    meta = {}
+
+    def __init__(self, probs):
+        self.probs = probs
+
+    def predict_proba(self, method, path, body=""):
+        return dict(self.probs)
+
+
+def decide(probs, normal_min=0.98, attack_min=0.99):
+    cascade = LocalCascade(FixedModel(probs), normal_min=normal_min, attack_min=attack_min)
+    result, _ = cascade.decide("GET", "/")
+    return result, cascade.stats()
+
+
+def test_cascade_local_normal_at_threshold():
+    result, stats = decide({"Normal": 0.98, "SQL Injection": 0.02})
+    assert result["classification"] == "Normal (benign)"
+    assert result["confidence"] == "high"
+    assert result["raw_response"] == "local_model:Normal (benign):0.9800"
+    assert stats["local_normal"] == 1 and stats["escalated"] == 0
+
+
+def test_cascade_local_attack_picks_top_attack_label():
+    result, stats = decide({"Normal": 0.001, "SQL Injection": 0.004, "Path Traversal": 0.995})
+    assert result["classification"] == "Path Traversal"
+    assert stats["local_attack"] == 1
+
+
+@pytest.mark.parametrize(
+    "probs",
+    [
+        {"Normal": 0.979, "SQL Injection": 0.021},  # Normal 임계값 바로 아래
+        {"Normal": 0.005, "SQL Injection": 0.985, "Code Injection": 0.01},  # 공격 임계값 아래
+        {"Normal": 0.5, "SQL Injection": 0.5},
+    ],
+)
+def test_cascade_escalates_uncertain(probs):
+    result, stats = decide(probs)
+    assert result is None
+    assert stats["escalated"] == 1
+    assert stats["escalation_rate"] == 1.0
+
+
+def test_cascade_with_real_model_probs_are_returned():
+    cascade = LocalCascade(random_model(), normal_min=1.1, attack_min=1.1)  # 항상 에스컬레이션
+    result, probs = cascade.decide("GET", "/index.php?id=1")
+    assert result is None
+    assert set(probs) == set(CLASSES)
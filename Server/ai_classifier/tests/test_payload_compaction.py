@@ -0,0 +1,39 @@
+import base64
+import json
+import random
+
+from payload_compaction import PayloadCompactor
+
+PLUS_SQLI = "1+UNION+ALL+SELECT+username+password+FROM+users+WHERE+1-1+LIMIT+1/union/select/1/2/3"
+
+
+def test_plus_encoded_sqli_in_json_is_not_collapsed():
+    out = PayloadCompactor().compact(json.dumps({"q": PLUS_SQLI}))
+    assert "<opaque" not in out
+    assert "UNION+ALL+SELECT" in out
+
+
+def test_plus_encoded_sqli_in_plain_line_is_not_collapsed():
+    out = PayloadCompactor().compact("search " + PLUS_SQLI + "\nfoo bar")
+    assert "<opaque" not in out
+    assert "UNION+ALL+SELECT" in out
+
+
+def test_plus_encoded_segment_is_ordered_first():
+    body = json.dumps({"a": "x" * 10, "q": PLUS_SQLI})
+    assert PayloadCompactor().compact(body).startswith("q=")
+
+
+def test_real_base64_and_hex_still_collapse():
+    rng = random.Random(0)
+    for _ in range(500):
+        blob = base64.b64encode(rng.randbytes(96)).decode()
+        hexrun = rng.randbytes(48).hex()
+        out = PayloadCompactor().compact(json.dumps({"file": blob, "sig": hexrun}))
+        assert out.count("<opaque") == 2, blob
+
+
+def test_base64_of_attack_is_decoded():
+    blob = base64.b64encode(b"' UNION SELECT password FROM users -- padding padding padding").decode()
+    out = PayloadCompactor().compact(json.dumps({"data": blob}))
+    assert "<base64: ' UNION SELECT" in out
@@ -0,0 +1,126 @@
+import random
+
+import pytest
+
+import resilience
+from resilience import CircuitBreaker, LatencyTracker, RetryBudget, backoff_s
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = FakeClock()
+    monkeypatch.setattr(resilience, "time", c)
+    return c
+
+
+# ===== CircuitBreaker =====
+def test_breaker_opens_after_consecutive_failures(clock):
+    cb = CircuitBreaker(failure_threshold=3, cooldown_s=10)
+    cb.record_failure()
+    cb.record_failure()
+    cb.record_success()  # 성공하면 연속 실패 수 초기화
+    cb.record_failure()
+    cb.record_failure()
+    assert cb.state == CircuitBreaker.CLOSED
+    cb.record_failure()
+    assert cb.state == CircuitBreaker.OPEN
+    assert [cb.allow() for _ in range(3)] == [False, False, False]
+    assert cb.stats()["short_circuited"] == 3
+    assert cb.stats()["opens"] == 1
+
+
+def test_half_open_allows_a_single_probe(clock):
+    cb = CircuitBreaker(failure_threshold=1, cooldown_s=10)
+    cb.record_failure()
+    clock.now += 9.9
+    assert not cb.allow()
+    clock.now += 0.1
+    assert cb.state == CircuitBreaker.HALF_OPEN
+    assert cb.allow()
+    assert not cb.allow()  # 시험 호출은 하나만
+
+    cb.record_success()
+    assert cb.state == CircuitBreaker.CLOSED
+    assert cb.allow() and cb.allow()
+
+
+def test_failed_probe_reopens_for_another_cooldown(clock):
+    cb = CircuitBreaker(failure_threshold=5, cooldown_s=10)
+    for _ in range(5):
+        cb.record_failure()
+    clock.now += 10
+    assert cb.allow()
+    cb.record_failure()  # half_open 실패는 threshold와 상관없이 바로 open
+    assert cb.state == CircuitBreaker.OPEN
+    assert cb.stats()["opens"] == 2
+    clock.now += 9
+    assert not cb.allow()
+    clock.now += 1
+    assert cb.allow()
+
+
+def test_release_probe_frees_the_half_open_slot(clock):
+    cb = CircuitBreaker(failure_threshold=1, cooldown_s=1)
+    cb.record_failure()
+    clock.now += 1
+    assert cb.allow()
+    # hedge가 취소되는 등 결과 없이 끝난 시험 호출: 자리를 반납하지 않으면 half_open에 갇힘
+    cb.release_probe()
+    assert cb.state == CircuitBreaker.HALF_OPEN
+    assert cb.allow()
+    assert not cb.allow()
+
+
+# ===== RetryBudget =====
+def test_retry_budget_is_spent_then_denied(clock):
+    rb = RetryBudget(ratio=0.5, min_per_s=0.0, max_tokens=3)
+    assert [rb.try_spend() for _ in range(4)] == [True, True, True, False]
+    # 성공 2번 = 토큰 1개 -> 재시도 1번
+    rb.record_success()
+    assert not rb.try_spend()
+    rb.record_success()
+    assert rb.try_spend()
+    assert rb.stats() == {"tokens": 0.0, "retries": 4, "denied": 2}
+
+
+def test_retry_budget_min_rate_and_cap(clock):
+    rb = RetryBudget(ratio=0.2, min_per_s=2.0, max_tokens=4)
+    for _ in range(4):
+        assert rb.try_spend()
+    assert not rb.try_spend()
+    clock.now += 0.5  # 초당 2개 -> 1개 회복
+    assert rb.try_spend()
+    clock.now += 100  # 오래 쉬어도 max_tokens까지만
+    for _ in range(20):
+        rb.record_success()
+    assert rb.stats()["tokens"] == 4.0
+
+
+# ===== LatencyTracker / backoff =====
+def test_latency_quantiles_over_window():
+    lt = LatencyTracker(window=100)
+    assert lt.quantile(0.95) is None
+    for ms in range(1, 201):
+        lt.observe(ms / 1000.0)
+    assert lt.count() == 100  # 최근 100개만
+    assert lt.quantile(0.0) == pytest.approx(0.101)
+    assert lt.quantile(0.95) == pytest.approx(0.195)
+    assert lt.stats() == {"p50_s": 0.151, "p95_s": 0.195}
+
+
+def test_backoff_is_full_jitter_and_capped(monkeypatch):
+    random.seed(0)
+    samples = [backoff_s(3) for _ in range(200)]
+    assert all(0 <= s <= 0.8 for s in samples)
+    assert min(samples) < 0.1  # 0부터 고르게 (full jitter)
+
+    monkeypatch.setattr(resilience.random, "uniform", lambda lo, hi: hi)
+    assert [backoff_s(a, base_s=0.2, cap_s=1.0) for a in (1, 2, 3, 4, 10)] == pytest.approx([0.2, 0.4, 0.8, 1.0, 1.0])
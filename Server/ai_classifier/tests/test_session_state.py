@@ -0,0 +1,144 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from session_state import SessionState, SessionStateStore
+
+LOGIN = ("POST", "/login", "user=admin&pass=x")
+HOME = ("GET", "/", "")
+
+
+def normal():
+    return {"classification": "Normal (benign)", "confidence": "high", "raw_response": "Normal", "source": "model"}
+
+
+def attack(conf="high"):
+    return {"classification": "SQL Injection", "confidence": conf, "raw_response": "SQL Injection", "source": "model"}
+
+
+def classify(store, state, items, result):
+    new = store.split_new(state, items)
+    state.update(((key, *items[i][:2], n) for key, i, n in new), result)
+    return new
+
+
+def test_repeats_within_call_are_counted_not_dropped():
+    store = SessionStateStore()
+    state = store.get_or_create("s")
+    items = [HOME] + [LOGIN] * 5
+
+    new = store.split_new(state, items)
+    assert [(i, n) for _, i, n in new] == [(0, 1), (1, 5)]
+    assert store.stats()["items_skipped"] == 4
+
+    state.update(((key, *items[i][:2], n) for key, i, n in new), normal())
+    assert (state.count, state.repeats) == (2, 4)
+    summary = state.summary()
+    assert "이전 요청 2건 (같은 요청 반복 4회)" in summary
+    assert "POST /login (x5)" in summary
+
+
+def test_resending_whole_session_does_not_inflate_repeats():
+    store = SessionStateStore()
+    state = store.get_or_create("s")
+    items = [HOME, LOGIN, LOGIN]
+    classify(store, state, items, normal())
+
+    assert store.split_new(state, items) == []
+    assert store.split_new(state, items + [LOGIN]) == []  # 2 -> 3회는 두 배 미만
+    assert (state.count, state.repeats) == (2, 1)
+
+
+def test_repeat_count_doubling_reclassifies():
+    store = SessionStateStore()
+    state = store.get_or_create("s")
+    classify(store, state, [LOGIN, LOGIN], normal())
+
+    # 2 -> 3회: 아직 두 배가 아니므로 건너뜀
+    assert store.split_new(state, [LOGIN] * 3) == []
+    # 2 -> 4회: 다시 분류, 누적 요청 수는 그대로 반복만 늘어남
+    new = classify(store, state, [LOGIN] * 4, attack())
+    assert [n for _, _, n in new] == [4]
+    assert (state.count, state.repeats) == (1, 3)
+    assert state.verdict["classification"] == "SQL Injection"
+
+
+def test_seen_is_bounded():
+    state = SessionState("s", max_seen=2)
+    keys = [state.item_key("GET", f"/{i}", "") for i in range(3)]
+    state.update(((k, "GET", "/", 1) for k in keys), normal())
+    assert state.is_new(keys[0])
+    assert not state.is_new(keys[2])
+
+
+# ===== server.classify_session =====
+@pytest.fixture
+def srv(monkeypatch):
+    server = pytest.importorskip("server")
+    prompts = []
+
+    async def run_predict(method, path, body):
+        prompts.append(body)
+        return attack() if "union" in body else normal()
+
+    async def classify_items(items):
+        prompts.append(items[0].request_http_request)
+        return normal()
+
+    compactor = SimpleNamespace(compact=lambda body, budget_tokens: body or "")
+    monkeypatch.setattr(server, "clf", SimpleNamespace(compactor=compactor))
+    monkeypatch.setattr(server, "sessions", SessionStateStore())
+    monkeypatch.setattr(server, "run_predict", run_predict)
+    monkeypatch.setattr(server, "classify_items", classify_items)
+    monkeypatch.setenv("SESSION_MAX_REQ", "3")
+    return server, prompts
+
+
+def session(*paths):
+    return [SimpleNamespace(request_http_method="GET", request_http_request=p, request_body="", user_agent="")
+            for p in paths]
+
+
+def test_overflow_beyond_max_req_is_classified_in_same_call(srv):
+    server, prompts = srv
+    paths = [f"/p{i}" for i in range(7)] + ["/q?id=1 union select 1"]
+    result = asyncio.run(server.classify_session("s", session(*paths)))
+
+    assert (result["new_requests"], result["session_requests"]) == (8, 8)
+    assert result["classification"] == "SQL Injection"
+    # 3개씩 세 번, 번호는 이어지고 뒤 그룹에는 앞 그룹 요약이 붙음
+    assert len(prompts) == 3
+    assert "[4] GET /p3" in prompts[1] and "이전 요청 3건" in prompts[1]
+    assert "[7] GET /p6" in prompts[2] and "[8] GET /q?id=1 union select 1" in prompts[2]
+
+    again = asyncio.run(server.classify_session("s", session(*paths)))
+    assert again["source"] == "session_state"
+    assert len(prompts) == 3
+
+
+def test_first_request_repeated_goes_to_session_prompt(srv):
+    server, prompts = srv
+    result = asyncio.run(server.classify_session("s", session("/login", "/login", "/login")))
+    assert result["new_requests"] == 1
+    assert prompts == ["[1] GET /login (x3)\n----"]
+
+
+def test_fail_open_in_later_group_keeps_earlier_attack(srv, monkeypatch):
+    server, prompts = srv
+
+    async def run_predict(method, path, body):
+        prompts.append(body)
+        if len(prompts) == 1:
+            return attack()
+        return dict(normal(), source="fail_open", confidence="low", hf_error="timeout")
+
+    monkeypatch.setattr(server, "run_predict", run_predict)
+    result = asyncio.run(server.classify_session("s", session(*[f"/p{i}" for i in range(5)])))
+    assert result["classification"] == "SQL Injection"
+    assert result["source"] == "model"
+    assert (result["new_requests"], result["session_requests"]) == (3, 3)
+
+    # 실패한 그룹은 상태에 없으므로 다음 호출에서 다시 분류
+    retry = server.sessions.split_new(server.sessions.get_or_create("s"), [server.item_fields(i) for i in session("/p3", "/p4")])
+    assert len(retry) == 2
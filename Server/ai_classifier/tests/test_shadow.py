@@ -0,0 +1,133 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+from shadow import ShadowMirror, verdict_label  # noqa: E402
+
+EXECUTOR = ThreadPoolExecutor(max_workers=1)
+
+
+def parse(data):
+    return {"classification": data["label"], "confidence": "high", "raw_response": data["label"]}
+
+
+def mirror(handler, **kw):
+    m = ShadowMirror(
+        "http://shadow/generate", "key", build_payload=lambda p: json.dumps({"inputs": p}), parse_response=parse,
+        executor=EXECUTOR, **kw,
+    )
+    m._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return m
+
+
+def primary(label="SQL Injection"):
+    return {"classification": label, "confidence": "high", "raw_response": label, "source": "model"}
+
+
+def test_over_max_inflight_samples_are_dropped_without_building_prompt():
+    async def go():
+        gate = asyncio.Event()
+
+        async def handler(request):
+            await gate.wait()
+            return httpx.Response(200, json={"label": "SQL Injection"})
+
+        m = mirror(handler, sample_rate=1.0, max_inflight=2)
+        built = []
+
+        def prompt_fn(i):
+            return lambda: built.append(i) or f"prompt {i}"
+
+        for i in range(5):
+            m.maybe_mirror(prompt_fn(i), primary(), 12.0)
+        during = m.stats()
+        gate.set()
+        await asyncio.gather(*m._tasks)
+        after = m.stats()
+        # 자리가 나면 다시 받음
+        m.maybe_mirror(prompt_fn(5), primary(), None)
+        await asyncio.gather(*m._tasks)
+        await m.aclose()
+        return built, during, after, m.stats()
+
+    built, during, after, final = asyncio.run(go())
+    assert built == [0, 1, 5]
+    assert (during["sampled"], during["dropped"], during["inflight"]) == (5, 3, 2)
+    assert (after["compared"], after["agreed"], after["inflight"]) == (2, 2, 0)
+    assert (final["sampled"], final["dropped"], final["compared"]) == (6, 3, 3)
+
+
+def test_unsampled_requests_cost_nothing():
+    async def go():
+        m = mirror(lambda request: httpx.Response(200, json={"label": "Normal"}), sample_rate=0.0)
+        m.maybe_mirror(lambda: pytest.fail("prompt built for unsampled request"), primary(), None)
+        await m.aclose()
+        return m.stats()
+
+    stats = asyncio.run(go())
+    assert (stats["sampled"], stats["inflight"], stats["agreement"]) == (0, 0, None)
+
+
+def test_agreement_confusion_and_disagreement_log(tmp_path):
+    log = tmp_path / "shadow" / "diff.jsonl"
+
+    async def go():
+        answers = iter(["Normal", "Code Injection", "SQL Injection"])
+        m = mirror(lambda request: httpx.Response(200, json={"label": next(answers)}), sample_rate=1.0,
+                   max_inflight=1, log_path=str(log))
+        for p in (primary("Normal (benign)"), primary("SQL Injection"), primary("SQL Injection")):
+            m.maybe_mirror(lambda: "GET /x", p, 40.0)
+            await asyncio.gather(*m._tasks)
+        await m.aclose()
+        return m.stats()
+
+    stats = asyncio.run(go())
+    assert (stats["compared"], stats["agreed"], stats["agreement"]) == (3, 2, 0.6667)
+    assert stats["confusion"] == {"Normal": {"Normal": 1}, "SQL Injection": {"Code Injection": 1, "SQL Injection": 1}}
+    assert stats["latency"]["primary"]["p50_s"] == 0.04
+
+    records = [json.loads(line) for line in log.read_text().splitlines()]
+    assert len(records) == 1
+    assert records[0]["primary"]["classification"] == "SQL Injection"
+    assert records[0]["shadow"]["classification"] == "Code Injection"
+    assert records[0]["prompt"] == "GET /x"
+
+
+def test_errors_are_counted_by_kind():
+    async def go():
+        responses = iter([httpx.Response(503), httpx.TimeoutException("slow")])
+
+        def handler(request):
+            r = next(responses)
+            if isinstance(r, Exception):
+                raise r
+            return r
+
+        m = mirror(handler, sample_rate=1.0, max_inflight=1)
+        for _ in range(2):
+            m.maybe_mirror(lambda: "GET /", primary(), None)
+            await asyncio.gather(*m._tasks)
+        await m.aclose()
+        return m.stats()
+
+    stats = asyncio.run(go())
+    assert stats["errors"] == {"HTTPStatusError": 1, "timeout": 1}
+    assert stats["compared"] == 0
+
+
+def test_from_env_disabled_without_url_or_rate(monkeypatch):
+    monkeypatch.delenv("SHADOW_ENDPOINT_URL", raising=False)
+    assert ShadowMirror.from_env(lambda p: p, parse, EXECUTOR, "0.05", "4") is None
+    monkeypatch.setenv("SHADOW_ENDPOINT_URL", "http://shadow")
+    monkeypatch.setenv("SHADOW_SAMPLE_RATE", "0")
+    assert ShadowMirror.from_env(lambda p: p, parse, EXECUTOR, "0.05", "4") is None
+
+
+def test_verdict_label_merges_normal_variants():
+    assert verdict_label({"classification": "Normal (benign)"}) == "Normal"
+    assert verdict_label({}) == "Normal"
+    assert verdict_label({"classification": "Path Traversal"}) == "Path Traversal"
@@ -0,0 +1,84 @@
+import pytest
+
+import shared_limiter
+from shared_limiter import SharedTokenBucket
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = FakeClock()
+    monkeypatch.setattr(shared_limiter, "time", c)
+    return c
+
+
+def test_two_workers_share_one_bucket_in_fifo_order(tmp_path, clock):
+    path = str(tmp_path / "ratelimit.db")
+    a = SharedTokenBucket(path, rate=10.0, burst=2.0)
+    b = SharedTokenBucket(path, rate=10.0, burst=2.0)
+
+    # burst 2개는 바로 통과, 그다음부터는 빚: 예약 순서대로 1/rate씩 늦게
+    waits = [a.reserve(), b.reserve(), a.reserve(), b.reserve(), a.reserve()]
+    assert waits == pytest.approx([0.0, 0.0, 0.1, 0.2, 0.3])
+
+    # 0.25초 지나면 2.5토큰 회복: 빚 -3 -> -0.5, 다음 예약은 -1.5 -> 0.15초
+    clock.now += 0.25
+    assert b.reserve() == pytest.approx(0.15)
+
+    # 오래 쉬어도 burst 이상은 쌓이지 않음
+    clock.now += 100.0
+    assert [a.reserve(), b.reserve(), a.reserve()] == pytest.approx([0.0, 0.0, 0.1])
+
+    sa, sb = a.stats(), b.stats()
+    assert (sa["reserved"], sb["reserved"]) == (5, 4)
+    assert (sa["delayed"], sb["delayed"]) == (3, 2)
+    assert sa["avg_wait_ms"] == pytest.approx((0.1 + 0.3 + 0.1) / 5 * 1000.0)
+    assert sa["errors"] == sb["errors"] == 0
+    a.close()
+    b.close()
+
+
+def test_burst_defaults_to_rate_and_at_least_one(tmp_path, clock):
+    assert SharedTokenBucket(str(tmp_path / "a.db"), rate=5.0).burst == 5.0
+    slow = SharedTokenBucket(str(tmp_path / "b.db"), rate=0.5)
+    assert slow.burst == 1.0
+    assert slow.reserve() == 0.0
+    assert slow.reserve() == pytest.approx(2.0)
+    slow.close()
+
+
+def test_reserve_fails_open_when_store_is_unusable(tmp_path, clock):
+    blocker = tmp_path / "not_a_dir"
+    blocker.write_text("x")
+    bucket = SharedTokenBucket(str(blocker / "ratelimit.db"), rate=1.0)
+
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    stats = bucket.stats()
+    assert (stats["errors"], stats["reserved"]) == (3, 0)
+
+
+def test_reserve_rolls_back_and_fails_open_on_bad_row(tmp_path, clock):
+    path = str(tmp_path / "ratelimit.db")
+    a = SharedTokenBucket(path, rate=10.0, burst=1.0)
+    b = SharedTokenBucket(path, rate=10.0, burst=1.0)
+    assert a.reserve() == 0.0
+
+    # 다른 워커가 행을 지운 상태: 통과시키되 쓰기 트랜잭션을 남기지 않음
+    b._connect().execute("DELETE FROM token_buckets")
+    assert a.reserve() == 0.0
+    assert a.stats()["errors"] == 1
+
+    b._connect().execute(
+        "INSERT INTO token_buckets (name, tokens, updated_at) VALUES ('hf', 1.0, ?)", (clock.now,)
+    )
+    assert b.reserve() == 0.0
+    assert a.reserve() == pytest.approx(0.1)
+    a.close()
+    b.close()
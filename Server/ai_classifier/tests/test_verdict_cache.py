@@ -0,0 +1,58 @@
+import asyncio
+
+from verdict_cache import VerdictCache
+
+
+def test_leader_cancel_hands_compute_to_waiter():
+    async def run():
+        cache = VerdictCache()
+        calls = []
+        gate = asyncio.Event()
+
+        async def compute():
+            calls.append(1)
+            if len(calls) == 1:
+                await gate.wait()  # 첫 계산은 취소될 때까지 대기
+            return {"classification": "Normal (benign)", "confidence": "high", "raw_response": "Normal"}
+
+        leader = asyncio.ensure_future(cache.get_or_compute("k", compute))
+        await asyncio.sleep(0)
+        waiters = [asyncio.ensure_future(cache.get_or_compute("k", compute)) for _ in range(3)]
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        results = await asyncio.gather(*waiters)
+
+        assert leader.cancelled()
+        assert [r["classification"] for r, _ in results] == ["Normal (benign)"] * 3
+        # 기다리던 요청 중 하나만 새로 계산, 나머지는 그 결과를 받음 (coalesced 또는 hit)
+        assert sorted(origin for _, origin in results).count("miss") == 1
+        assert len(calls) == 2
+        assert cache.stats()["takeovers"] >= 1
+        assert cache.get("k") is not None
+
+    asyncio.run(run())
+
+
+def test_waiter_cancel_does_not_affect_leader():
+    async def run():
+        cache = VerdictCache()
+        gate = asyncio.Event()
+
+        async def compute():
+            await gate.wait()
+            return {"classification": "SQL Injection", "confidence": "high", "raw_response": "SQL Injection"}
+
+        leader = asyncio.ensure_future(cache.get_or_compute("k", compute))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(cache.get_or_compute("k", compute))
+        await asyncio.sleep(0)
+
+        waiter.cancel()
+        gate.set()
+        result, origin = await leader
+
+        assert waiter.cancelled()
+        assert (result["classification"], origin) == ("SQL Injection", "miss")
+
+    asyncio.run(run())
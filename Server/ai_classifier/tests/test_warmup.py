@@ -0,0 +1,89 @@
+import asyncio
+
+from endpoints import Endpoint
+from warmup import EndpointWarmer
+
+
+class FakeProbe:
+    """probe 결과를 차례로 돌려줌: 숫자 = 걸린 시간(초), Exception = 실패"""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    async def __call__(self, ep, timeout):
+        self.calls += 1
+        out = self.outcomes.pop(0) if self.outcomes else 0.01
+        if isinstance(out, Exception):
+            raise out
+        return out
+
+
+def make(probe, **kw):
+    kw.setdefault("slo_ms", 100.0)
+    return EndpointWarmer(probe, [Endpoint("http://hf", "hf")], **kw)
+
+
+def test_single_slow_keepwarm_probe_keeps_endpoint_warm():
+    async def run():
+        probe = FakeProbe(0.01, 0.5, RuntimeError("reset"), 0.01, 0.5, 0.5, 0.5)
+        warmer = make(probe, cold_after=3)
+        w = warmer._eps[0]
+
+        await warmer._probe_one(w)  # warm-up 성공
+        assert warmer.ready
+        await warmer._probe_one(w)  # 느림 1
+        await warmer._probe_one(w)  # 실패 2
+        assert warmer.ready and w.strikes == 2
+        await warmer._probe_one(w)  # 성공 -> 연속 횟수 초기화
+        assert w.strikes == 0
+        for _ in range(3):
+            await warmer._probe_one(w)
+        assert not warmer.ready
+        await warmer.stop()
+
+    asyncio.run(run())
+
+
+def test_idle_endpoint_is_rechecked_on_next_request():
+    async def run():
+        probe = FakeProbe(0.01, 0.01)
+        warmer = make(probe, recheck_idle_s=0.05)
+        await warmer._probe_one(warmer._eps[0])
+        assert warmer.ready
+
+        await asyncio.sleep(0.08)
+        assert not warmer.ready and warmer.idle
+
+        assert await warmer.recheck()
+        assert warmer.ready and probe.calls == 2
+        await warmer.stop()
+
+    asyncio.run(run())
+
+
+def test_recheck_of_scaled_down_endpoint_marks_cold():
+    async def run():
+        probe = FakeProbe(0.01, RuntimeError("503 scaled to zero"))
+        warmer = make(probe, recheck_idle_s=0.05, cold_after=3)
+        await warmer._probe_one(warmer._eps[0])
+
+        await asyncio.sleep(0.08)
+        assert not await warmer.recheck()
+        assert not warmer._eps[0].warm and not warmer.idle
+        await warmer.stop()
+
+    asyncio.run(run())
+
+
+def test_hf_success_keeps_endpoint_confirmed():
+    async def run():
+        warmer = make(FakeProbe(0.01), recheck_idle_s=0.05)
+        await warmer._probe_one(warmer._eps[0])
+        for _ in range(3):
+            await asyncio.sleep(0.03)
+            warmer.note_hf_ok()
+            assert warmer.ready
+        await warmer.stop()
+
+    asyncio.run(run())
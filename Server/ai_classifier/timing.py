@@ -0,0 +1,93 @@
+# timing.py
+"""
+요청 단위 단계별 타이밍 (Server-Timing 헤더 + 샘플링된 trace 로그)
+
+- RequestTimings: 단계별 소요 시간(ms) 누적
+- current_timings: 현재 요청의 RequestTimings (contextvar, 요청 task마다 따로 설정)
+- emit_trace: TRACE_SAMPLE_RATE 비율 또는 TRACE_SLOW_MS 이상 걸린 요청을 JSON 한 줄로 로깅
+"""
+
+import json
+import logging
+import os
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+TRACE_SAMPLE_RATE_DEFAULT = "0"  # 0.0 ~ 1.0
+TRACE_SLOW_MS_DEFAULT = "0"  # 이 이상 걸린 요청은 항상 로깅 (0 = 끔)
+
+trace_logger = logging.getLogger("classifier.trace")
+if not trace_logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    trace_logger.addHandler(_handler)
+    trace_logger.setLevel(logging.INFO)
+    trace_logger.propagate = False
+
+
+class RequestTimings:
+    """단계 이름 -> 누적 ms (삽입 순서 유지)"""
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+
+    def add(self, name: str, ms: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + max(0.0, ms)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - t0) * 1000.0)
+
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000.0
+
+    def server_timing(self) -> str:
+        """Server-Timing 헤더 값 (예: queue;dur=1.2, hf;dur=310.5, total;dur=312.0)"""
+        parts = [f"{name};dur={ms:.1f}" for name, ms in self.stages.items()]
+        parts.append(f"total;dur={self.total_ms():.1f}")
+        return ", ".join(parts)
+
+
+current_timings: ContextVar[Optional[RequestTimings]] = ContextVar(
+    "current_timings", default=None
+)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """현재 요청에 RequestTimings가 있으면 측정, 없으면 아무것도 안 함"""
+    t = current_timings.get()
+    if t is None:
+        yield
+        return
+    with t.stage(name):
+        yield
+
+
+def emit_trace(request_id: str, timings: RequestTimings, fields: Dict[str, Any]) -> None:
+    total = timings.total_ms()
+    rate = float(os.getenv("TRACE_SAMPLE_RATE", TRACE_SAMPLE_RATE_DEFAULT))
+    slow_ms = float(os.getenv("TRACE_SLOW_MS", TRACE_SLOW_MS_DEFAULT))
+
+    sampled = rate > 0 and random.random() < rate
+    slow = slow_ms > 0 and total >= slow_ms
+    if not (sampled or slow):
+        return
+
+    record = {
+        "event": "classify_trace",
+        "request_id": request_id,
+        "total_ms": round(total, 2),
+        "stages_ms": {k: round(v, 2) for k, v in timings.stages.items()},
+        "slow": slow,
+    }
+    record.update(fields)
+    trace_logger.info(json.dumps(record, ensure_ascii=False))
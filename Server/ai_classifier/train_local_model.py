@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+1단계 로컬 분류기 학습 CLI
+
+scripts/1_split_dataset.py 와 같은 라벨링/시드(7:3, random_state=42, stratify)로
+train split만 사용해 학습하고, test split으로 임계값별 로컬 판정 정확도/에스컬레이션 비율을 출력.
+
+예)
+  cd Server
+  python ai_classifier/train_local_model.py \
+      --dataset dataset/raw/sessionized_dataset.csv \
+      --out ai_classifier/models/local_model.json.gz
+
+학습에만 pandas / scikit-learn / scipy가 필요 (분류 서버는 필요 없음).
+"""
+import argparse
+import array
+import os
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import train_test_split
+
+from local_model import LocalCascade, LocalModel, hash_features, request_text
+
+
+# scripts/1_split_dataset.py 와 동일한 라벨링
+def get_attack_type(row):
+    if row.get("66 - SQL Injection", 0) == 1:
+        return "SQL Injection"
+    elif row.get("242 - Code Injection", 0) == 1:
+        return "Code Injection"
+    elif row.get("126 - Path Traversal", 0) == 1:
+        return "Path Traversal"
+    else:
+        return "Normal"
+
+
+def _fields(row):
+    """(method, path, body) — NaN은 빈 문자열로"""
+    return tuple(
+        "" if pd.isna(row.get(col)) else str(row.get(col))
+        for col in ("request_http_method", "request_http_request", "request_body")
+    )
+
+
+def _text(row) -> str:
+    return request_text(*_fields(row))
+
+
+def build_matrix(df, n_features, ngram_min, ngram_max):
+    indptr, indices, values = [0], [], []
+    for _, row in df.iterrows():
+        feats = hash_features(_text(row), n_features, ngram_min, ngram_max)
+        indices.extend(feats.keys())
+        values.extend(feats.values())
+        indptr.append(len(indices))
+    return csr_matrix(
+        (np.asarray(values, dtype=np.float32), np.asarray(indices), np.asarray(indptr)),
+        shape=(len(df), n_features),
+    )
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--dataset", default="dataset/raw/sessionized_dataset.csv")
+    ap.add_argument("--out", default="ai_classifier/models/local_model.json.gz")
+    ap.add_argument("--n-features", type=int, default=1 << 16)
+    ap.add_argument("--ngram-min", type=int, default=2)
+    ap.add_argument("--ngram-max", type=int, default=4)
+    ap.add_argument("--C", type=float, default=4.0, help="LogisticRegression 규제 강도 역수")
+    ap.add_argument("--normal-min", type=float, default=0.98)
+    ap.add_argument("--attack-min", type=float, default=0.99)
+    args = ap.parse_args()
+
+    df = pd.read_csv(args.dataset)
+    df["attack_type"] = df.apply(get_attack_type, axis=1)
+
+    # 7:3 분할 (파인튜닝/1_split_dataset.py와 동일한 시드)
+    train, test = train_test_split(
+        df, test_size=0.3, random_state=42, stratify=df["attack_type"]
+    )
+    print(f"Train: {len(train):,}개 / Test: {len(test):,}개")
+
+    X_train = build_matrix(train, args.n_features, args.ngram_min, args.ngram_max)
+    clf = LogisticRegression(C=args.C, max_iter=2000)
+    clf.fit(X_train, train["attack_type"].values)
+
+    classes = [str(c) for c in clf.classes_]
+    coef = np.asarray(clf.coef_, dtype=np.float32)
+    bias = [float(b) for b in clf.intercept_]
+    if len(classes) == 2:
+        # 이진 분류면 scikit-learn은 계수 1행만 줌 -> softmax 형태로 맞춤
+        coef = np.vstack([-coef[0] / 2, coef[0] / 2])
+        bias = [-bias[0] / 2, bias[0] / 2]
+
+    model = LocalModel(
+        classes=classes,
+        weights=array.array("f", coef.ravel().tobytes()),
+        bias=bias,
+        n_features=args.n_features,
+        ngram_min=args.ngram_min,
+        ngram_max=args.ngram_max,
+        meta={"dataset": args.dataset, "train_rows": int(len(train)), "C": args.C},
+    )
+
+    # ===== test split 평가 (로컬 판정 정확도 / 에스컬레이션 비율) =====
+    cascade = LocalCascade(model, normal_min=args.normal_min, attack_min=args.attack_min)
+    local_total, local_correct = 0, 0
+    for _, row in test.iterrows():
+        result, _ = cascade.decide(*_fields(row))
+        if result is None:
+            continue
+        local_total += 1
+        pred = "Normal" if result["classification"].startswith("Normal") else result["classification"]
+        local_correct += int(pred == row["attack_type"])
+
+    s = cascade.stats()
+    print(f"로컬 판정: {local_total:,}건 (정확도 {local_correct / max(local_total, 1) * 100:.2f}%)")
+    print(f"에스컬레이션(LLM): {s['escalated']:,}건 ({s['escalation_rate'] * 100:.1f}%)")
+
+    model.meta.update(
+        {
+            "test_local_accuracy": round(local_correct / max(local_total, 1), 4),
+            "test_escalation_rate": s["escalation_rate"],
+        }
+    )
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    model.save(args.out)
+    print(f"저장 완료: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
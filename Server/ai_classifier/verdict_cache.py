@@ -0,0 +1,146 @@
+# verdict_cache.py
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+EMPTY_BODY_VALUES = ["nan", "", "None", "null"]
+
+
+def fingerprint(method: str, path: str, body: str = "") -> str:
+    """
+    (method, path, body) 정규화 후 sha256.
+    - method: 대문자
+    - path/body: 앞뒤 공백 제거, body의 nan/None/null은 빈 값으로 취급
+    """
+    m = (method or "").strip().upper()
+    p = (path or "").strip()
+    b = str(body or "").strip()
+    if b in EMPTY_BODY_VALUES:
+        b = ""
+
+    h = hashlib.sha256()
+    for part in (m, p, b):
+        h.update(part.encode("utf-8", "surrogatepass"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+def is_cacheable(result: Dict[str, Any]) -> bool:
+    """HF 호출 실패로 만들어진 fail-open 결과는 캐시하지 않음"""
+    return "hf_error" not in result and not str(result.get("raw_response", "")).startswith(
+        "System Error"
+    )
+
+
+class _LeaderCancelled(Exception):
+    """in-flight 계산을 맡은 요청이 취소됨 -> 기다리던 요청은 다시 시도 (그중 하나가 이어서 계산)"""
+
+
+class VerdictCache:
+    """
+    LRU + TTL 판정 캐시 (프로세스 내 메모리).
+
+    - max_entries 초과 시 가장 오래 안 쓰인 항목부터 제거
+    - ttl_s 가 지난 항목은 조회 시 만료 처리
+    - get_or_compute: 같은 키로 동시에 들어온 요청은 하나의 계산(in-flight)만 수행
+      계산하던 요청이 취소되면 기다리던 요청 중 하나가 이어서 계산 (기다리던 쪽은 취소되지 않음)
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_s: float = 3600.0) -> None:
+        self.max_entries = max(0, int(max_entries))
+        self.ttl_s = float(ttl_s)
+        self._data: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.takeovers = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+
+        self._data.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        if self.max_entries == 0:
+            return
+
+        self._data[key] = (time.monotonic() + self.ttl_s, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_compute(
+        self, key: str, compute: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Tuple[Dict[str, Any], str]:
+        """
+        캐시 조회 후 없으면 compute() 실행.
+        반환: (결과, 출처) — 출처는 "hit" | "coalesced" | "miss"
+        """
+        while True:
+            cached = self.get(key)
+            if cached is not None:
+                self.hits += 1
+                return cached, "hit"
+
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                break
+
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(inflight), "coalesced"
+            except _LeaderCancelled:
+                # 계산하던 요청이 취소됨 -> 다시 조회 (먼저 깨어난 쪽이 새로 계산, 나머지는 그쪽을 기다림)
+                self.coalesced -= 1
+                self.takeovers += 1
+
+        self.misses += 1
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        try:
+            result = await compute()
+        except asyncio.CancelledError:
+            # 공유 future를 cancel하면 기다리던 요청까지 CancelledError를 받으므로 재시도 신호만 전달
+            fut.set_exception(_LeaderCancelled())
+            fut.exception()
+            raise
+        except Exception as e:
+            fut.set_exception(e)
+            # 기다리는 쪽이 없으면 "exception was never retrieved" 경고 방지
+            fut.exception()
+            raise
+        else:
+            fut.set_result(result)
+            if is_cacheable(result):
+                self.put(key, result)
+            return result, "miss"
+        finally:
+            self._inflight.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._data),
+            "max_entries": self.max_entries,
+            "ttl_s": self.ttl_s,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "takeovers": self.takeovers,
+            "hit_ratio": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+        }
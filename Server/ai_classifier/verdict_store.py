@@ -0,0 +1,146 @@
+# verdict_store.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class VerdictStore:
+    """
+    재시작 후에도 유지되는 로컬 SQLite 판정 저장소 (외부 서비스 불필요).
+
+    - 키: (model_id, fingerprint) — 모델/프롬프트가 바뀌면 이전 판정은 자동으로 무시됨
+    - 최초 조회/저장 시점에 파일을 연다 (startup을 막지 않음)
+    - max_entries 초과 시 가장 오래 사용되지 않은 항목부터 제거
+    - ttl_s 가 지난 항목은 조회 시 무시 (0 = 만료 없음)
+    """
+
+    # 저장할 때마다 개수를 세지 않고 일정 횟수마다 정리
+    EVICT_EVERY = 256
+
+    def __init__(self, path: str, max_entries: int = 200000, ttl_s: float = 0.0) -> None:
+        self.path = path
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_s = float(ttl_s)
+
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._puts_since_evict = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            d = os.path.dirname(self.path)
+            if d:
+                os.makedirs(d, exist_ok=True)
+
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS verdicts (
+                  model_id TEXT NOT NULL,
+                  fp TEXT NOT NULL,
+                  value TEXT NOT NULL,
+                  created_at REAL NOT NULL,
+                  last_used REAL NOT NULL,
+                  PRIMARY KEY (model_id, fp)
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_verdicts_last_used ON verdicts(last_used)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, model_id: str, fp: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT value, created_at FROM verdicts WHERE model_id=? AND fp=?",
+                    (model_id, fp),
+                ).fetchone()
+
+                if row is None or (self.ttl_s > 0 and row[1] + self.ttl_s < now):
+                    self.misses += 1
+                    return None
+
+                conn.execute(
+                    "UPDATE verdicts SET last_used=? WHERE model_id=? AND fp=?",
+                    (now, model_id, fp),
+                )
+                conn.commit()
+                self.hits += 1
+                return json.loads(row[0])
+
+        except Exception as e:
+            # 저장소 문제로 분류 자체가 실패하면 안 됨 -> miss로 처리
+            self.errors += 1
+            print("[verdict_store] get failed:", e)
+            return None
+
+    def put(self, model_id: str, fp: str, value: Dict[str, Any]) -> None:
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    """
+                    INSERT INTO verdicts (model_id, fp, value, created_at, last_used)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(model_id, fp) DO UPDATE SET
+                      value=excluded.value,
+                      created_at=excluded.created_at,
+                      last_used=excluded.last_used
+                    """,
+                    (model_id, fp, json.dumps(value, ensure_ascii=False), now, now),
+                )
+
+                self._puts_since_evict += 1
+                if self._puts_since_evict >= self.EVICT_EVERY:
+                    self._puts_since_evict = 0
+                    self._evict(conn)
+
+                conn.commit()
+
+        except Exception as e:
+            self.errors += 1
+            print("[verdict_store] put failed:", e)
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        (count,) = conn.execute("SELECT COUNT(*) FROM verdicts").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            conn.execute(
+                """
+                DELETE FROM verdicts WHERE rowid IN (
+                  SELECT rowid FROM verdicts ORDER BY last_used ASC LIMIT ?
+                )
+                """,
+                (excess,),
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+        }
@@ -0,0 +1,271 @@
+# warmup.py
+"""
+scale-to-zero HF Endpoint의 warm-up / keep-warm
+
+- 기동 시 warm-up: 각 Endpoint에 짧은 분류 요청(probe)을 interval_s 마다 보내
+  slo_ms 안에 응답하면 warm. warm한 Endpoint가 하나라도 있어야 ready (/ready, 분류 API)
+- keep-warm (keepwarm_interval_s > 0): 트래픽이 예상되는 동안에만 keepwarm_interval_s 마다 probe
+  - 트래픽 예상 = 마지막 요청 후 keepwarm_idle_s 이내, 또는 keepwarm_hours 시간대 (예: "8-20")
+  - 그 사이 실제 HF 호출이 성공했으면 probe 생략 (실제 트래픽이 이미 깨워 두고 있음)
+  - 트래픽이 예상되지 않으면 probe하지 않음 -> Endpoint가 scale-to-zero로 내려가도록 둠
+  - 유휴 후 첫 요청이 오면 바로 probe (이후 요청들이 cold start를 덜 겪도록)
+- keep-warm probe가 cold_after 번 연속 실패/느리면 그 Endpoint는 다시 warm-up 대상 (트래픽이 예상되는 동안만)
+  (한 번 느린 probe로 /ready와 분류 API가 503이 되지 않도록)
+- recheck_idle_s 동안 warm함을 확인하지 못한 Endpoint(probe 성공도 실제 HF 호출 성공도 없음)는
+  scale-to-zero로 내려갔을 수 있으므로 ready로 보지 않음 -> 유휴 후 첫 요청이 recheck()로 다시 probe
+  (SLO 안에 답하면 그대로 진행, 아니면 cold로 표시하고 warm-up 재개)
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from endpoints import Endpoint
+
+
+def parse_hours(spec: str) -> List[Tuple[int, int]]:
+    """"8-20,22-24" -> [(8, 20), (22, 24)] (로컬 시각 기준, 끝 시각 미포함)"""
+    out = []
+    for part in (spec or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        lo, _, hi = part.partition("-")
+        out.append((int(lo), int(hi or int(lo) + 1)))
+    return out
+
+
+class _Warmth:
+    def __init__(self, ep: Endpoint) -> None:
+        self.ep = ep
+        self.warm = False
+        self.probes = 0
+        self.failures = 0
+        self.last_probe_ms: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.warm_since: Optional[float] = None
+        self.confirmed_at: Optional[float] = None  # 마지막으로 warm함을 확인한 시각 (probe / 실제 HF 호출 성공)
+        self.strikes = 0  # warm 상태에서 연속으로 실패/느린 probe 수
+
+
+class EndpointWarmer:
+    def __init__(
+        self,
+        probe: Callable[[Endpoint, float], Awaitable[float]],
+        endpoints: List[Endpoint],
+        slo_ms: float = 3000.0,
+        probe_timeout_s: float = 60.0,
+        interval_s: float = 5.0,
+        keepwarm_interval_s: float = 0.0,
+        keepwarm_idle_s: float = 1800.0,
+        keepwarm_hours: str = "",
+        cold_after: int = 3,
+        recheck_idle_s: float = 900.0,
+    ) -> None:
+        self.probe = probe
+        self._eps = [_Warmth(ep) for ep in endpoints]
+        self.slo_s = float(slo_ms) / 1000.0
+        self.probe_timeout_s = float(probe_timeout_s)
+        self.interval_s = max(0.5, float(interval_s))
+        self.keepwarm_interval_s = max(0.0, float(keepwarm_interval_s))
+        self.keepwarm_idle_s = float(keepwarm_idle_s)
+        self.keepwarm_hours = parse_hours(keepwarm_hours)
+        self.cold_after = max(1, int(cold_after))
+        self.recheck_idle_s = max(0.0, float(recheck_idle_s))
+
+        self.started_at = time.monotonic()
+        self.ready_at: Optional[float] = None
+        self.last_traffic: Optional[float] = None
+        self.last_hf_ok: Optional[float] = None
+        self.keepwarm_probes = 0
+        self.rechecks = 0
+        self._recheck_task: Optional[asyncio.Task] = None
+        self._ready_event = asyncio.Event()
+        self._kick = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    # ===== 상태 =====
+    def _fresh(self, w: _Warmth, now: float) -> bool:
+        if self.recheck_idle_s <= 0:
+            return True
+        return w.confirmed_at is not None and now - w.confirmed_at <= self.recheck_idle_s
+
+    @property
+    def ready(self) -> bool:
+        """warm하고 최근 recheck_idle_s 안에 확인된 Endpoint가 하나라도 있음"""
+        now = time.monotonic()
+        return any(w.warm and self._fresh(w, now) for w in self._eps)
+
+    @property
+    def idle(self) -> bool:
+        """ready가 아닌 이유가 오래 확인하지 못해서인지 (cold로 판정된 것은 아님)"""
+        return not self.ready and bool(self._stale())
+
+    def _stale(self) -> List[_Warmth]:
+        """warm으로 표시돼 있지만 오래 확인하지 못한 Endpoint"""
+        now = time.monotonic()
+        return [w for w in self._eps if w.warm and not self._fresh(w, now)]
+
+    async def wait_ready(self) -> None:
+        while not self.ready:
+            if self._stale():
+                await self.recheck()
+            else:
+                await self._ready_event.wait()
+
+    async def recheck(self) -> bool:
+        """
+        유휴 후 요청이 오면 오래 확인하지 못한 Endpoint를 다시 probe (동시 요청은 같은 probe를 기다림).
+        최대 SLO만큼만 기다리고 그 안에 ready가 아니면 False (probe는 백그라운드에서 계속)
+        """
+        if self.ready:
+            return True
+        stale = self._stale()
+        if not stale:
+            return False
+        if self._recheck_task is None or self._recheck_task.done():
+            self.rechecks += 1
+            self._recheck_task = asyncio.ensure_future(
+                asyncio.gather(*(self._probe_one(w, recheck=True) for w in stale))
+            )
+        try:
+            await asyncio.wait_for(asyncio.shield(self._recheck_task), timeout=self.slo_s)
+        except asyncio.TimeoutError:
+            pass
+        return self.ready
+
+    def note_traffic(self) -> None:
+        if self.keepwarm_interval_s > 0 and not self.traffic_expected():
+            self._kick.set()  # 유휴 후 첫 요청 -> keep-warm 루프가 바로 probe
+        self.last_traffic = time.monotonic()
+
+    def note_hf_ok(self) -> None:
+        self.last_hf_ok = time.monotonic()
+        # 실제 호출이 성공했으면 warm한 Endpoint들은 아직 떠 있다고 봄
+        for w in self._eps:
+            if w.warm:
+                w.confirmed_at = self.last_hf_ok
+
+    def traffic_expected(self) -> bool:
+        now = time.monotonic()
+        if self.last_traffic is not None and now - self.last_traffic < self.keepwarm_idle_s:
+            return True
+        hour = datetime.now().hour
+        return any(lo <= hour < hi for lo, hi in self.keepwarm_hours)
+
+    # ===== probe =====
+    async def _probe_one(self, w: _Warmth, recheck: bool = False) -> None:
+        """recheck=True: 유휴 후 재확인 probe -> 한 번만 실패/느려도 cold (이미 내려갔을 가능성이 큼)"""
+        w.probes += 1
+        try:
+            took = await self.probe(w.ep, self.probe_timeout_s)
+        except Exception as e:
+            w.failures += 1
+            w.last_error = str(e)[:200] or type(e).__name__
+            self._probe_failed(w, recheck)
+            return
+        w.last_probe_ms = round(took * 1000.0, 1)
+        if took <= self.slo_s:
+            w.last_error = None
+            w.strikes = 0
+            w.confirmed_at = time.monotonic()
+            self._set_warm(w, True)
+        else:
+            w.last_error = f"slow ({w.last_probe_ms}ms > SLO)"
+            self._probe_failed(w, recheck)
+
+    def _probe_failed(self, w: _Warmth, recheck: bool) -> None:
+        if not w.warm:
+            return
+        w.strikes += 1
+        if recheck or w.strikes >= self.cold_after:
+            self._set_warm(w, False)
+            self._ensure_running()  # warm-up 루프가 끝나 있었으면 다시 시작
+
+    def _set_warm(self, w: _Warmth, warm: bool) -> None:
+        if warm and not w.warm:
+            w.warm_since = time.monotonic()
+            print(f"[warmup] {w.ep.name} warm ({w.last_probe_ms}ms)")
+        elif not warm and w.warm:
+            w.warm_since = None
+            w.strikes = 0
+            print(f"[warmup] {w.ep.name} cold: {w.last_error}")
+        w.warm = warm
+
+        # event는 "warm한 Endpoint가 있음" (오래 확인 못 한 경우는 wait_ready가 recheck로 처리)
+        if any(x.warm for x in self._eps):
+            if self.ready_at is None:
+                self.ready_at = time.monotonic()
+            self._ready_event.set()
+        else:
+            self._ready_event.clear()
+
+    async def _run(self) -> None:
+        # 1) 기동 시 warm-up: warm한 Endpoint가 생길 때까지 (나머지는 아래 루프에서 계속)
+        while True:
+            cold = [w for w in self._eps if not w.warm]
+            if cold and (self.ready_at is None or self.traffic_expected()):
+                await asyncio.gather(*(self._probe_one(w) for w in cold))
+                if any(not w.warm for w in self._eps):
+                    await asyncio.sleep(self.interval_s)
+                    continue
+
+            if self.keepwarm_interval_s <= 0:
+                if all(w.warm for w in self._eps):
+                    return  # keep-warm 끔 + 모두 warm -> 더 할 일 없음
+                await asyncio.sleep(self.interval_s)
+                continue
+
+            # 2) keep-warm: 트래픽이 예상되는 동안, 실제 HF 호출이 뜸할 때만
+            try:
+                await asyncio.wait_for(self._kick.wait(), timeout=self.keepwarm_interval_s)
+            except asyncio.TimeoutError:
+                pass
+            kicked = self._kick.is_set()
+            self._kick.clear()
+            recent_ok = self.last_hf_ok is not None and time.monotonic() - self.last_hf_ok < self.keepwarm_interval_s
+            if self.traffic_expected() and (kicked or not recent_ok):
+                self.keepwarm_probes += 1
+                await asyncio.gather(*(self._probe_one(w) for w in self._eps))
+
+    def start(self) -> None:
+        self._task = asyncio.ensure_future(self._run())
+
+    def _ensure_running(self) -> None:
+        if self._task is not None and self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        tasks = [t for t in (self._task, self._recheck_task) if t is not None]
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "ready": self.ready,
+            "warmup_s": round(self.ready_at - self.started_at, 1) if self.ready_at else None,
+            "slo_ms": self.slo_s * 1000.0,
+            "traffic_expected": self.traffic_expected(),
+            "keepwarm_interval_s": self.keepwarm_interval_s,
+            "keepwarm_probes": self.keepwarm_probes,
+            "cold_after": self.cold_after,
+            "recheck_idle_s": self.recheck_idle_s,
+            "rechecks": self.rechecks,
+            "idle_s": round(now - self.last_traffic, 1) if self.last_traffic else None,
+            "endpoints": [
+                {
+                    "name": w.ep.name,
+                    "warm": w.warm,
+                    "stale": w.warm and not self._fresh(w, now),
+                    "strikes": w.strikes,
+                    "probes": w.probes,
+                    "failures": w.failures,
+                    "last_probe_ms": w.last_probe_ms,
+                    "last_error": w.last_error,
+                }
+                for w in self._eps
+            ],
+        }
@@ -69,7 +69,13 @@ session_loop() {
 }
 
 # ✅ parser는 백그라운드, sessionizing은 포그라운드
-parser_loop &
-session_loop
+# (ai_classifier의 classify_worker를 쓰면 SESSIONIZING_ENABLED=0 -> parser만 실행)
+if [ "${SESSIONIZING_ENABLED:-1}" = "1" ]; then
+  parser_loop &
+  session_loop
+else
+  log "[sessionizing] disabled (SESSIONIZING_ENABLED!=1)"
+  parser_loop
+fi
 
 wait
@@ -0,0 +1,3 @@
+-- AlterTable
+ALTER TABLE "RawLog" ADD COLUMN     "classify_claimed_at" TIMESTAMP(3),
+ADD COLUMN     "classify_fail_open" INTEGER NOT NULL DEFAULT 0;
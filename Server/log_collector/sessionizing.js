@@ -9,6 +9,8 @@ const CLASSIFIER_ENDPOINT =
   process.env.CLASSIFIER_ENDPOINT || 'http://ai_classifier:3002/api/classify';
 const DEBUG_CLASSIFIER = process.env.DEBUG_CLASSIFIER === '1';
 const CLASSIFIER_TIMEOUT_MS = Number(process.env.CLASSIFIER_TIMEOUT_MS || 120000);
+// 이 시간(초)보다 오래된 rawlog는 밀린 로그(backfill)로 보고 낮은 우선순위 lane으로 분류 요청
+const CLASSIFIER_BACKFILL_AGE_S = Number(process.env.CLASSIFIER_BACKFILL_AGE_S || 300);
 
 const MAX_BODY_CHARS = Number(process.env.MAX_BODY_CHARS || 300);
 const MAX_UA_CHARS = Number(process.env.MAX_UA_CHARS || 120);
@@ -54,14 +56,27 @@ function heuristicLabel(texts) {
   return 'NORMAL';
 }
 
-async function classifySingleLog(aiRequest, fallbackTexts = []) {
+async function classifySingleLog(aiRequest, fallbackTexts = [], requestId = null, priority = 'interactive') {
   try {
+    // X-Request-ID: classifier의 Server-Timing / trace 로그와 rawlog를 연결하기 위한 id
+    // X-Request-Timeout-Ms: 이 시간이 지나면 classifier가 HF 호출 없이 작업을 버림
+    // X-Priority: interactive(새 로그) / backfill(밀린 로그) — 밀린 로그가 새 로그 분류를 막지 않도록
+    const headers = {
+      'X-Request-Timeout-Ms': String(CLASSIFIER_TIMEOUT_MS),
+      'X-Priority': priority,
+    };
+    if (requestId) headers['X-Request-ID'] = requestId;
     const { data } = await axios.post(
       CLASSIFIER_ENDPOINT,
       { session: [aiRequest] },
-      { timeout: CLASSIFIER_TIMEOUT_MS }
+      { timeout: CLASSIFIER_TIMEOUT_MS, headers }
     );
 
+    // HF 장애로 만든 대체 결과(fail_open)는 실제 판정이 아니므로 저장하지 않고 다음 루프에서 재시도
+    if (data?.source === 'fail_open') {
+      return { _retry: true, error: `fail_open: ${data?.degraded_reason ?? 'unknown'}` };
+    }
+
     return {
       classification: data?.classification ?? null,
       confidence: data?.confidence ?? null,
@@ -83,7 +98,7 @@ async function classifySingleLog(aiRequest, fallbackTexts = []) {
       (typeof status === 'number' && status >= 500) ||
       status == null;
 
-    if (DEBUG_CLASSIFIER) console.error('[clf:error]', msg);
+    if (DEBUG_CLASSIFIER) console.error('[clf:error]', { request_id: requestId, error: msg });
 
     if (isRetryable) {
       return { _retry: true, error: msg };
@@ -143,12 +158,15 @@ async function run() {
       if (Number.isNaN(t.getTime())) continue;
 
       const ua = r.user_agent || '';
+      const status = Number(r.full_log?.response?.status);
 
       const aiRequest = {
         request_http_method: (r.method || '').slice(0, 16),
         request_http_request: (r.uri || '/').slice(0, 2048),
         request_body: (r.request_body || '').slice(0, MAX_BODY_CHARS),
         user_agent: ua.slice(0, MAX_UA_CHARS),
+        // 응답 코드가 있으면 classifier fast-path(ConservativeFilter 규칙)에서 사용
+        status_code: Number.isInteger(status) ? status : null,
       };
 
       const fallbackTexts = [
@@ -156,7 +174,9 @@ async function run() {
         String(r.request_body || '').slice(0, 500),
       ];
 
-      const res0 = await classifySingleLog(aiRequest, fallbackTexts);
+      const priority =
+        Date.now() - t.getTime() > CLASSIFIER_BACKFILL_AGE_S * 1000 ? 'backfill' : 'interactive';
+      const res0 = await classifySingleLog(aiRequest, fallbackTexts, `rawlog-${r.id}`, priority);
 
       // ✅ HF/AI 일시 장애면 sessionId를 채우지 않고 다음 루프에서 재시도
       if (res0?._retry) {
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ai_classifier /api/classify 부하 벤치마크
+
+동시 클라이언트 N개(closed loop: 응답을 받으면 바로 다음 요청)로 요청을 보내고
+처리량(req/s), 지연 p50/p95/p99, 상태 코드/판정 출처(source) 분포, Server-Timing 단계별 평균을 출력.
+
+- --dataset: replay_dataset.py와 같은 CSV (request_http_method, request_http_request, request_body)
+  없으면 내장 샘플(정상/공격 섞음) 사용
+- --unique-ratio: 요청 중 이 비율만큼 쿼리에 고유값을 붙여 캐시 miss 유도 (0 = 같은 요청 반복, 1 = 모두 miss)
+- --concurrency 1,8,32: 여러 단계를 차례로 측정
+- --max-p99-ms / --min-rps: 기준 미달이면 exit 1 (CI용)
+
+예)
+  python tools/hf_standin.py --port 9000 --latency lognormal:250:0.4 &
+  HF_ENDPOINT_URL=http://127.0.0.1:9000 HF_API_KEY=dummy python ai_classifier/server.py &
+  python tools/bench_classify.py --concurrency 1,8,32 --requests 500 --unique-ratio 0.5
+"""
+import argparse
+import csv
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+BUILTIN_ITEMS = [
+    ("GET", "/", ""),
+    ("GET", "/index.html", ""),
+    ("GET", "/static/app.js", ""),
+    ("GET", "/board/view?id=12", ""),
+    ("POST", "/login", "username=alice&password=secret"),
+    ("GET", "/search?q=running+shoes", ""),
+    ("GET", "/item?id=1' UNION SELECT username,password FROM users--", ""),
+    ("POST", "/login", "username=admin' OR '1'='1&password=x"),
+    ("GET", "/download?file=../../../../etc/passwd", ""),
+    ("POST", "/api/run", "cmd=<?php system($_GET['c']); ?>"),
+]
+
+
+def load_items(path: str, limit: int):
+    if not path:
+        return list(BUILTIN_ITEMS)
+    items = []
+    with open(path, encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            if len(items) >= limit:
+                break
+            items.append(
+                (
+                    (row.get("request_http_method") or "GET").upper(),
+                    row.get("request_http_request") or "/",
+                    row.get("request_body") or "",
+                )
+            )
+    return items
+
+
+def percentile(sorted_values, q: float):
+    if not sorted_values:
+        return None
+    idx = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[idx]
+
+
+def parse_server_timing(header: str):
+    out = {}
+    for part in header.split(","):
+        name, _, rest = part.strip().partition(";")
+        if rest.startswith("dur="):
+            try:
+                out[name] = float(rest[4:])
+            except ValueError:
+                pass
+    return out
+
+
+def run_level(args, items, concurrency: int):
+    url = args.target.rstrip("/") + "/api/classify"
+    lock = threading.Lock()
+    latencies, statuses, sources = [], Counter(), Counter()
+    stage_sum, stage_n = defaultdict(float), defaultdict(int)
+    counter = {"next": 0}
+    local = threading.local()
+
+    def next_index():
+        with lock:
+            i = counter["next"]
+            counter["next"] += 1
+        return i if i < args.requests else None
+
+    def build(i: int):
+        method, path, body = items[i % len(items)]
+        if random.random() < args.unique_ratio:
+            path += ("&" if "?" in path else "?") + f"_bench={uuid.uuid4().hex[:12]}"
+        item = {"request_http_method": method, "request_http_request": path, "request_body": body, "user_agent": "bench"}
+        return {"session": [item]}
+
+    def client():
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        while True:
+            i = next_index()
+            if i is None:
+                return
+            payload = build(i)
+            headers = {"X-Request-ID": f"bench-{i}"}
+            if args.timeout_ms:
+                headers["X-Request-Timeout-Ms"] = str(args.timeout_ms)
+            t0 = time.perf_counter()
+            try:
+                resp = local.session.post(url, json=payload, headers=headers, timeout=args.http_timeout_s)
+                status = str(resp.status_code)
+                source = resp.json().get("source", "-") if resp.status_code == 200 else "-"
+                timing = parse_server_timing(resp.headers.get("Server-Timing", ""))
+            except requests.RequestException as e:
+                status, source, timing = type(e).__name__, "-", {}
+            ms = (time.perf_counter() - t0) * 1000.0
+            with lock:
+                latencies.append(ms)
+                statuses[status] += 1
+                sources[source] += 1
+                for k, v in timing.items():
+                    stage_sum[k] += v
+                    stage_n[k] += 1
+
+    # 워밍업 (연결 수립, 서버 lazy 초기화) — 결과에 포함하지 않음
+    for i in range(min(args.warmup, len(items))):
+        try:
+            requests.post(url, json=build(i), timeout=args.http_timeout_s)
+        except requests.RequestException:
+            pass
+
+    t_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(client)
+    elapsed = time.perf_counter() - t_start
+
+    lat = sorted(latencies)
+    return {
+        "concurrency": concurrency,
+        "requests": len(lat),
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(len(lat) / elapsed, 2) if elapsed > 0 else 0.0,
+        "p50_ms": round(percentile(lat, 0.50) or 0, 1),
+        "p95_ms": round(percentile(lat, 0.95) or 0, 1),
+        "p99_ms": round(percentile(lat, 0.99) or 0, 1),
+        "max_ms": round(lat[-1], 1) if lat else 0.0,
+        "status": dict(statuses),
+        "source": dict(sources),
+        "server_timing_avg_ms": {k: round(stage_sum[k] / stage_n[k], 1) for k in stage_sum},
+    }
+
+
+def print_table(results):
+    print(f"{'conc':>5} {'reqs':>6} {'rps':>9} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}  status / source")
+    for r in results:
+        print(
+            f"{r['concurrency']:>5} {r['requests']:>6} {r['rps']:>9.1f} {r['p50_ms']:>8.1f} "
+            f"{r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['max_ms']:>8.1f}  {r['status']} {r['source']}"
+        )
+        if r["server_timing_avg_ms"]:
+            stages = ", ".join(f"{k}={v}" for k, v in r["server_timing_avg_ms"].items())
+            print(f"{'':>5} server-timing avg ms: {stages}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="/api/classify load benchmark")
+    ap.add_argument("--target", default="http://localhost:3002")
+    ap.add_argument("--concurrency", default="8", help="콤마 구분 (예: 1,8,32)")
+    ap.add_argument("--requests", type=int, default=500, help="단계별 요청 수")
+    ap.add_argument("--dataset", default="")
+    ap.add_argument("--limit", type=int, default=1000, help="dataset에서 읽을 최대 행 수")
+    ap.add_argument("--unique-ratio", type=float, default=1.0)
+    ap.add_argument("--warmup", type=int, default=5)
+    ap.add_argument("--timeout-ms", type=int, default=0, help="X-Request-Timeout-Ms (0 = 보내지 않음)")
+    ap.add_argument("--http-timeout-s", type=float, default=60.0)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--json", default="", help="결과를 JSON 파일로 저장")
+    ap.add_argument("--max-p99-ms", type=float, default=0, help="마지막 단계 p99가 이보다 크면 exit 1")
+    ap.add_argument("--min-rps", type=float, default=0, help="마지막 단계 처리량이 이보다 작으면 exit 1")
+    args = ap.parse_args()
+
+    random.seed(args.seed)
+    items = load_items(args.dataset, args.limit)
+    if not items:
+        sys.exit("no items to send")
+
+    results = []
+    for c in (int(x) for x in args.concurrency.split(",") if x.strip()):
+        results.append(run_level(args, items, c))
+        print_table(results[-1:])
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"target": args.target, "unique_ratio": args.unique_ratio, "results": results}, f, indent=2)
+
+    last = results[-1]
+    failed = []
+    if args.max_p99_ms and last["p99_ms"] > args.max_p99_ms:
+        failed.append(f"p99 {last['p99_ms']}ms > {args.max_p99_ms}ms")
+    if args.min_rps and last["rps"] < args.min_rps:
+        failed.append(f"rps {last['rps']} < {args.min_rps}")
+    if failed:
+        print("FAIL: " + "; ".join(failed))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ConservativeFilter 매칭 벤치마크: 패턴별 반복 검사(이전 방식) vs 리터럴 prefilter + automaton
+
+기본 패턴에 합성 패턴(화이트리스트 정규식 / 공격 지표 리터럴)을 --sizes 만큼 늘려 가며
+404 요청 하나를 apply()하는 데 걸리는 시간(us)을 비교하고, 두 방식의 판정이 같은지 확인.
+
+- --dataset: bench_classify.py와 같은 CSV (없으면 내장 샘플 path)
+- --no-aho: pyahocorasick이 설치돼 있어도 trie 정규식 backend로 측정
+
+예)
+  python tools/bench_fp_filter.py --sizes 13,100,300,1000
+"""
+import argparse
+import json
+import os
+import random
+import re
+import string
+import sys
+import tempfile
+import time
+import urllib.parse
+
+from bench_classify import load_items
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ai_classifier"))
+import false_positive_filter as fpf  # noqa: E402
+
+
+class LoopFilter:
+    """이전 ConservativeFilter와 같은 방식 (정규식/지표를 하나씩 검사)"""
+
+    def __init__(self, safe_patterns, indicators):
+        self.compiled = [re.compile(p, re.IGNORECASE) for _, p in safe_patterns]
+        self.indicators = list(indicators)
+
+    def apply(self, ai_prediction, path, status_code=200):
+        if ai_prediction.lower() in ["normal", "normal (benign)"]:
+            return ai_prediction
+        decoded = urllib.parse.unquote(path)
+        if status_code == 404 and any(i in decoded for i in self.indicators):
+            return "Normal (benign)"
+        if any(p.search(path) for p in self.compiled) and status_code == 404:
+            return "Normal (benign)"
+        return ai_prediction
+
+
+def synth_patterns(n, rng):
+    """합성 화이트리스트 정규식 n개 + 공격 지표 n개"""
+    def word(lo, hi):
+        return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(lo, hi)))
+
+    templates = [
+        lambda w: rf"^/{w}/\d+",
+        lambda w: rf"{w}\.(php|asp)$",
+        lambda w: rf"/{w}[-_]?{w[:3]}",
+        lambda w: rf"\.{w[:4]}$",
+        lambda w: rf"{w}=[0-9a-f]{{8}}",
+    ]
+    safe = [{"name": f"synth_{i}", "pattern": rng.choice(templates)(word(4, 9))} for i in range(n)]
+    indicators = [word(5, 10) + rng.choice(["(", "+", "/", "<", "="]) for _ in range(n)]
+    return safe, indicators
+
+
+def measure(filt, paths, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for p in paths:
+            filt.apply("SQL Injection", p, 404)
+    return (time.perf_counter() - t0) / (repeat * len(paths)) * 1e6
+
+
+def main():
+    ap = argparse.ArgumentParser(description="ConservativeFilter matching benchmark")
+    ap.add_argument("--sizes", default="0,100,300,1000", help="기본 패턴에 더할 합성 패턴 수 (콤마 구분)")
+    ap.add_argument("--dataset", default="")
+    ap.add_argument("--limit", type=int, default=2000)
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--no-aho", action="store_true")
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    if args.no_aho:
+        fpf.ahocorasick = None
+
+    paths = [path for _, path, _ in load_items(args.dataset, args.limit)]
+    rng = random.Random(args.seed)
+
+    print(f"{'patterns':>9} {'loop_us':>9} {'filter_us':>10} {'speedup':>8} {'mismatch':>9}  backend")
+    for size in (int(s) for s in args.sizes.split(",") if s.strip()):
+        safe, indicators = synth_patterns(size, rng)
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+            json.dump({"extend": True, "safe_patterns": safe, "attack_indicators": indicators}, f)
+        try:
+            new = fpf.ConservativeFilter(config_path=f.name)
+        finally:
+            os.unlink(f.name)
+        old = LoopFilter(list(zip(new.safe_pattern_names, new.safe_patterns)), new.attack_indicators)
+
+        mismatch = sum(old.apply("SQL Injection", p, 404) != new.apply("SQL Injection", p, 404) for p in paths)
+        loop_us = measure(old, paths, args.repeat)
+        new_us = measure(new, paths, args.repeat)
+        print(
+            f"{len(new.safe_patterns):>9} {loop_us:>9.2f} {new_us:>10.2f} {loop_us / new_us:>7.1f}x "
+            f"{mismatch:>9}  {new.stats()['backend']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
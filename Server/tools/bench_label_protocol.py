@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+라벨 응답 방식(LABEL_PROTOCOL) 벤치마크: text(라벨 이름, max_new_tokens=16) vs code(한 글자 코드)
+
+같은 item들을 방식별로 MistralClassifier를 통해 HF Endpoint에 직접 보내고 (서버/캐시 없이)
+호출당 지연 mean/p50/p95, 생성 토큰 수(Endpoint가 details를 줄 때), 신뢰도 분포,
+첫 번째 방식과의 판정 일치율을 출력.
+
+- 대상은 HF_ENDPOINT_URL(S) / HF_API_KEY 환경변수 (실제 Endpoint 또는 hf_standin.py)
+- --dataset: bench_classify.py와 같은 CSV (없으면 내장 샘플)
+- hf_standin.py는 code 프롬프트에 항상 코드로 답하므로 거기서 나온 일치율/지연 차이는 합성 수치.
+  LABEL_PROTOCOL 기본값을 바꾸려면 실제 Endpoint로 돌린 결과(agree, off_protocol)를 근거로 할 것
+
+예)
+  python tools/hf_standin.py --port 9000 --latency fixed:150 --token-ms 25 &
+  HF_ENDPOINT_URL=http://127.0.0.1:9000 HF_API_KEY=dummy \\
+    python tools/bench_label_protocol.py --protocols text,code --requests 400 --concurrency 8
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+from bench_classify import load_items, percentile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ai_classifier"))
+from model_inference import MistralClassifier  # noqa: E402
+
+
+async def run_protocol(protocol: str, items, args):
+    os.environ["LABEL_PROTOCOL"] = protocol
+    clf = MistralClassifier()
+    sem = asyncio.Semaphore(args.concurrency)
+
+    async def one(i: int):
+        method, path, body = items[i % len(items)]
+        prompt = clf.build_prompt(method, path, body)
+        async with sem:
+            t0 = time.perf_counter()
+            raw = (await clf.acall_batch([prompt]))[0]
+            ms = (time.perf_counter() - t0) * 1000.0
+        return ms, clf.parse_response(raw), clf._extract_details(raw).get("generated_tokens")
+
+    try:
+        # 워밍업 (연결 수립) — 결과에 포함하지 않음
+        await asyncio.gather(*(one(i) for i in range(min(args.warmup, len(items)))))
+        t_start = time.perf_counter()
+        out = await asyncio.gather(*(one(i) for i in range(args.requests)))
+        elapsed = time.perf_counter() - t_start
+    finally:
+        await clf.aclose()
+
+    lat = sorted(ms for ms, _, _ in out)
+    tokens = [t for _, _, t in out if t is not None]
+    results = [r for _, r, _ in out]
+    return {
+        "protocol": protocol,
+        "requests": len(out),
+        "rps": round(len(out) / elapsed, 2) if elapsed > 0 else 0.0,
+        "mean_ms": round(sum(lat) / len(lat), 1),
+        "p50_ms": round(percentile(lat, 0.50), 1),
+        "p95_ms": round(percentile(lat, 0.95), 1),
+        "avg_generated_tokens": round(sum(tokens) / len(tokens), 2) if tokens else None,
+        "errors": sum(1 for r in results if "hf_error" in r),
+        "confidence": dict(Counter(r["confidence"] for r in results)),
+        "scored": sum(1 for r in results if "confidence_score" in r),
+        "label_stats": dict(clf.label_stats),
+        "labels": [r["classification"] for r in results],
+    }
+
+
+def print_table(reports):
+    base = reports[0]
+    print(f"{'protocol':>8} {'reqs':>6} {'rps':>8} {'mean':>8} {'p50':>8} {'p95':>8} {'tokens':>7} {'agree':>7}  confidence")
+    for r in reports:
+        agree = sum(a == b for a, b in zip(base["labels"], r["labels"])) / max(1, len(r["labels"]))
+        r["agreement_vs_" + base["protocol"]] = round(agree, 4)
+        tokens = "-" if r["avg_generated_tokens"] is None else f"{r['avg_generated_tokens']:.1f}"
+        print(
+            f"{r['protocol']:>8} {r['requests']:>6} {r['rps']:>8.1f} {r['mean_ms']:>8.1f} {r['p50_ms']:>8.1f} "
+            f"{r['p95_ms']:>8.1f} {tokens:>7} {agree:>7.1%}  {r['confidence']} scored={r['scored']} errors={r['errors']}"
+        )
+    for r in reports[1:]:
+        saved = base["mean_ms"] - r["mean_ms"]
+        print(f"{r['protocol']} vs {base['protocol']}: mean {saved:+.1f}ms saved per call ({saved / base['mean_ms']:.1%})")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="LABEL_PROTOCOL decode-time benchmark")
+    ap.add_argument("--protocols", default="text,code", help="콤마 구분, 첫 번째가 비교 기준")
+    ap.add_argument("--requests", type=int, default=400, help="방식별 요청 수")
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--dataset", default="")
+    ap.add_argument("--limit", type=int, default=1000, help="dataset에서 읽을 최대 행 수")
+    ap.add_argument("--warmup", type=int, default=5)
+    ap.add_argument("--json", default="", help="결과를 JSON 파일로 저장")
+    args = ap.parse_args()
+
+    items = load_items(args.dataset, args.limit)
+    if not items:
+        sys.exit("no items to send")
+
+    reports = [asyncio.run(run_protocol(p.strip(), items, args)) for p in args.protocols.split(",") if p.strip()]
+    print_table(reports)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump([{k: v for k, v in r.items() if k != "labels"} for r in reports], f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HF Inference Endpoint 대역(stand-in) 서버 — 실제 Endpoint 없이 ai_classifier를 돌리고 벤치마크하기 위한 용도
+
+모드
+- synth : 프롬프트의 세션 정보에서 간단한 키워드 규칙으로 라벨을 만들어 응답 (기본)
+- replay: 실제 실행에서 녹화한 cassette(JSONL)의 응답을 그대로 재생. 없는 프롬프트는 --miss 정책
+- record: --upstream(실제 Endpoint)으로 프록시하면서 응답을 cassette에 기록
+
+응답 모양(--shape)은 MistralClassifier._extract_output_text가 처리하는 형태 중 선택
+- list:     [{"generated_text": "..."}]   (TGI text-generation 기본)
+- dict:     {"generated_text": "..."}
+- str_list: ["..."]
+inputs가 리스트(배치 호출)면 프롬프트별 응답의 리스트로 돌려줌
+
+지연/오류 주입
+- --latency: fixed:200 / uniform:100:400 / lognormal:200:0.5 (중앙값 ms, sigma) / recorded (cassette 값)
+- --errors:  "503=0.02,429=0.01,hang=0.005,reset=0.005,bad_json=0.001" (종류=확률)
+  - hang: --hang-s 동안 응답하지 않음 (클라이언트 timeout 유도)
+  - reset: 응답 없이 연결 종료 (network 오류)
+- --cold-start-s: 기동 후 이 시간 동안 503 (scale-to-zero Endpoint의 기동 중 응답)
+- --scale-to-zero-s: 요청이 이 시간 동안 없으면 다시 cold (다음 요청부터 --cold-start-s 동안 503)
+
+디코딩 시간 (synth 모드, 라벨 응답 방식 비교용)
+- --token-ms: 생성 토큰 1개당 디코딩 시간 (--latency에 더해짐, 배치는 가장 긴 응답 기준)
+- --chatter-tokens: 라벨 뒤에 이어서 생성하는 토큰 수 (줄바꿈 stop sequence가 있으면 생성하지 않음)
+  -> 생성 토큰 수 = min(max_new_tokens, 라벨 토큰 수 + chatter). 응답 텍스트는 라벨만 돌려줌
+- LABEL_PROTOCOL=code 프롬프트에는 한 글자 코드로 답하고, parameters.details / top_n_tokens가 있으면
+  TGI 형식의 details(tokens, top_tokens의 logprob)를 함께 돌려줌 (--shape list / dict)
+
+예)
+  python tools/hf_standin.py --port 9000 --latency lognormal:250:0.4 --errors 503=0.02
+  HF_ENDPOINT_URL=http://127.0.0.1:9000 HF_API_KEY=dummy python ai_classifier/server.py
+
+  # 녹화 후 재생
+  HF_API_KEY=hf_xxx python tools/hf_standin.py --mode record --upstream https://xxx.endpoints.huggingface.cloud --cassette cassettes/run1.jsonl
+  python tools/hf_standin.py --mode replay --cassette cassettes/run1.jsonl --latency recorded
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+SHAPES = ("list", "dict", "str_list")
+
+# synth 모드 키워드 규칙 (프롬프트의 "세션 정보" 부분에만 적용)
+SYNTH_RULES = [
+    ("SQL Injection", re.compile(r"union\s+(all\s+)?select|'\s*or\s+'?1'?\s*=\s*'?1|drop\s+table|sleep\(\d+\)", re.I)),
+    ("Path Traversal", re.compile(r"\.\./|\.\.%2f|%2e%2e/|/etc/passwd", re.I)),
+    ("Code Injection", re.compile(r"<\?php|\beval\(|\bexec\(|\bsystem\(|\$\{jndi:", re.I)),
+]
+SESSION_RE = re.compile(r"세션 정보:\n(.*?)\n\n위 세션", re.S)
+# model_inference.LABEL_CODES와 같은 코드 (코드 프로토콜 프롬프트에 들어 있는 문구로 구분)
+LABEL_CODES = {"Normal": "N", "SQL Injection": "S", "Code Injection": "C", "Path Traversal": "P"}
+CODE_PROMPT_MARK = "코드 한 글자만"
+
+
+def prompt_key(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+def synth_label(prompt: str) -> str:
+    m = SESSION_RE.search(prompt)
+    text = m.group(1) if m else prompt
+    for label, rx in SYNTH_RULES:
+        if rx.search(text):
+            return label
+    return "Normal"
+
+
+def approx_tokens(text: str) -> int:
+    return max(1, round(len(text) / 4))
+
+
+def generated_tokens(text: str, parameters: dict, chatter: int) -> int:
+    """라벨 text를 생성하는 데 든 토큰 수 (stop sequence가 없으면 max_new_tokens까지 chatter를 더 생성)"""
+    n = approx_tokens(text)
+    if "\n" not in (parameters.get("stop") or []):
+        n += chatter
+    return min(n, int(parameters.get("max_new_tokens", 16)))
+
+
+def synth_details(text: str, parameters: dict, n_tokens: int) -> dict:
+    """TGI details 흉내: 첫 토큰 logprob + 라벨 코드 후보들의 top_tokens"""
+    p = random.uniform(0.75, 0.999)
+    details = {
+        "finish_reason": "stop_sequence" if n_tokens < int(parameters.get("max_new_tokens", 16)) else "length",
+        "generated_tokens": n_tokens,
+        "tokens": [{"id": 0, "text": text, "logprob": math.log(p), "special": False}],
+    }
+    top_n = int(parameters.get("top_n_tokens") or 0)
+    if top_n:
+        others = [c for c in LABEL_CODES.values() if c != text]
+        weights = [random.random() for _ in others]
+        rest = [(1.0 - p) * w / sum(weights) for w in weights]
+        top = [{"id": 0, "text": text, "logprob": math.log(p), "special": False}]
+        top += [{"id": 0, "text": c, "logprob": math.log(max(q, 1e-9)), "special": False} for c, q in zip(others, rest)]
+        details["top_tokens"] = [sorted(top, key=lambda t: -t["logprob"])[:top_n]]
+    return details
+
+
+def shape_output(text: str, shape: str, details: dict = None):
+    if shape == "str_list":
+        return [text]
+    out = {"generated_text": text}
+    if details is not None:
+        out["details"] = details
+    if shape == "dict":
+        return out
+    return [out]
+
+
+def parse_latency(spec: str):
+    """지연 분포 문자열 -> (prompt 응답의 녹화 지연 ms 또는 None) -> 초"""
+    kind, _, rest = spec.partition(":")
+    args = [float(x) for x in rest.split(":") if x]
+    if kind == "fixed":
+        return lambda recorded: args[0] / 1000.0
+    if kind == "uniform":
+        return lambda recorded: random.uniform(args[0], args[1]) / 1000.0
+    if kind == "lognormal":
+        mu, sigma = math.log(args[0]), args[1]
+        return lambda recorded: random.lognormvariate(mu, sigma) / 1000.0
+    if kind == "recorded":
+        fallback = args[0] if args else 0.0
+        return lambda recorded: (recorded if recorded is not None else fallback) / 1000.0
+    raise SystemExit(f"unknown latency spec: {spec!r}")
+
+
+def parse_errors(spec: str):
+    """'503=0.02,hang=0.01' -> [(kind, cumulative_prob), ...]"""
+    out, acc = [], 0.0
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        kind, _, p = part.partition("=")
+        acc += float(p)
+        out.append((kind.strip(), acc))
+    if acc > 1.0:
+        raise SystemExit(f"error probabilities sum to {acc} > 1")
+    return out
+
+
+class Cassette:
+    """prompt sha256 -> {"status", "response", "latency_ms"} (JSONL, 한 줄에 하나)"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.entries = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        e = json.loads(line)
+                        self.entries[e["key"]] = e
+
+    def get(self, key: str):
+        return self.entries.get(key)
+
+    def append(self, entry: dict) -> None:
+        with self._lock:
+            self.entries[entry["key"]] = entry
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+class StandIn:
+    def __init__(self, args) -> None:
+        self.args = args
+        self.latency = parse_latency(args.latency)
+        self.errors = parse_errors(args.errors)
+        self.cassette = Cassette(args.cassette)
+        self.session = requests.Session()
+        self.stats = {
+            "requests": 0, "prompts": 0, "replayed": 0, "missed": 0, "recorded": 0, "injected": {}, "cold_starts": 0,
+            "generated_tokens": 0,
+        }
+        self._lock = threading.Lock()
+        self.warm_at = time.monotonic() + args.cold_start_s
+        self.last_request = time.monotonic()
+        if args.cold_start_s > 0:
+            self.stats["cold_starts"] = 1
+
+    def scaling_up(self) -> bool:
+        """scale-to-zero 흉내: 기동 중(cold start)이면 True"""
+        with self._lock:
+            now = time.monotonic()
+            if self.args.scale_to_zero_s > 0 and now - self.last_request > self.args.scale_to_zero_s and now >= self.warm_at:
+                self.warm_at = now + self.args.cold_start_s
+                self.stats["cold_starts"] += 1
+            self.last_request = now
+            return now < self.warm_at
+
+    def count(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self.stats[key] += n
+
+    def pick_error(self):
+        if not self.errors:
+            return None
+        r = random.random()
+        for kind, acc in self.errors:
+            if r < acc:
+                with self._lock:
+                    self.stats["injected"][kind] = self.stats["injected"].get(kind, 0) + 1
+                return kind
+        return None
+
+    def answer(self, prompt: str, parameters: dict):
+        """프롬프트 하나 -> (status, 응답 JSON, 녹화 지연 ms 또는 None, 생성 토큰 수)"""
+        key = prompt_key(prompt)
+        mode = self.args.mode
+
+        if mode == "record":
+            t0 = time.perf_counter()
+            resp = self.session.post(
+                self.args.upstream,
+                headers={"Authorization": f"Bearer {os.getenv('HF_API_KEY', '')}", "Content-Type": "application/json"},
+                data=json.dumps({"inputs": prompt, "parameters": parameters}),
+                timeout=self.args.upstream_timeout_s,
+            )
+            latency_ms = (time.perf_counter() - t0) * 1000.0
+            try:
+                body = resp.json()
+            except ValueError:
+                body = resp.text
+            self.cassette.append(
+                {"key": key, "status": resp.status_code, "response": body, "latency_ms": round(latency_ms, 1)}
+            )
+            self.count("recorded")
+            return resp.status_code, body, None, 0  # 실제 지연은 이미 발생
+
+        if mode == "replay":
+            entry = self.cassette.get(key)
+            if entry is not None:
+                self.count("replayed")
+                return entry["status"], entry["response"], entry.get("latency_ms"), 0
+            self.count("missed")
+            if self.args.miss == "error":
+                return 404, {"error": "prompt not in cassette"}, None, 0
+
+        text = synth_label(prompt)
+        if CODE_PROMPT_MARK in prompt:
+            text = LABEL_CODES[text]
+        n_tokens = generated_tokens(text, parameters, self.args.chatter_tokens)
+        self.count("generated_tokens", n_tokens)
+        details = synth_details(text, parameters, n_tokens) if parameters.get("details") else None
+        return 200, shape_output(text, self.args.shape, details), None, n_tokens
+
+
+def make_handler(app: StandIn):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, status: int, payload) -> None:
+            body = payload if isinstance(payload, bytes) else json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path.rstrip("/") == "/stats":
+                self._send(200, app.stats)
+            else:
+                self._send(200, {"status": "ok"})
+
+        def do_POST(self):
+            n = int(self.headers.get("Content-Length") or 0)
+            try:
+                req = json.loads(self.rfile.read(n) or b"{}")
+                inputs = req["inputs"]
+            except (ValueError, KeyError):
+                self._send(400, {"error": "expected JSON body with 'inputs'"})
+                return
+            app.count("requests")
+
+            prompts = inputs if isinstance(inputs, list) else [inputs]
+            app.count("prompts", len(prompts))
+
+            if app.scaling_up():
+                self._send(503, {"error": "Service Unavailable: endpoint is scaling up"})
+                return
+
+            injected = app.pick_error()
+            if injected == "reset":
+                self.close_connection = True
+                self.connection.shutdown(socket.SHUT_RDWR)
+                return
+            if injected == "hang":
+                time.sleep(app.args.hang_s)
+                self._send(504, {"error": "stand-in hang"})
+                return
+
+            answers = [app.answer(p, req.get("parameters", {})) for p in prompts]
+            recorded = [a[2] for a in answers if a[2] is not None]
+            decode_s = max(a[3] for a in answers) * app.args.token_ms / 1000.0
+            time.sleep(app.latency(max(recorded) if recorded else None) + decode_s)
+
+            if injected and injected.isdigit():
+                self._send(int(injected), {"error": f"stand-in injected {injected}"})
+                return
+            if injected == "bad_json":
+                self._send(200, b"{not json")
+                return
+
+            status = max(a[0] for a in answers)
+            if status != 200:
+                self._send(status, next(a[1] for a in answers if a[0] == status))
+            elif isinstance(inputs, list):
+                self._send(200, [a[1] for a in answers])
+            else:
+                self._send(200, answers[0][1])
+
+        def log_message(self, fmt, *args):
+            if app.args.verbose:
+                super().log_message(fmt, *args)
+
+    return Handler
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Offline HF Inference Endpoint stand-in")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=9000)
+    ap.add_argument("--mode", choices=("synth", "replay", "record"), default="synth")
+    ap.add_argument("--cassette", default="", help="replay/record 용 JSONL 파일")
+    ap.add_argument("--miss", choices=("synth", "error"), default="synth", help="replay 시 cassette에 없는 프롬프트 처리")
+    ap.add_argument("--upstream", default="", help="record 모드에서 프록시할 실제 Endpoint URL (HF_API_KEY 환경변수 사용)")
+    ap.add_argument("--upstream-timeout-s", type=float, default=60.0)
+    ap.add_argument("--shape", choices=SHAPES, default="list")
+    ap.add_argument("--latency", default="fixed:0", help="fixed:MS / uniform:LO:HI / lognormal:MEDIAN:SIGMA / recorded[:FALLBACK]")
+    ap.add_argument("--errors", default="", help='예: "503=0.02,429=0.01,hang=0.005,reset=0.005,bad_json=0.001"')
+    ap.add_argument("--hang-s", type=float, default=60.0)
+    ap.add_argument("--cold-start-s", type=float, default=0.0, help="기동 후(또는 scale-to-zero 후 첫 요청부터) 503을 돌려줄 시간")
+    ap.add_argument("--scale-to-zero-s", type=float, default=0.0, help="요청이 없으면 cold로 돌아가는 유휴 시간 (0 = 안 함)")
+    ap.add_argument("--token-ms", type=float, default=0.0, help="생성 토큰 1개당 디코딩 시간(ms, synth 모드)")
+    ap.add_argument("--chatter-tokens", type=int, default=6, help="stop sequence가 없을 때 라벨 뒤에 더 생성하는 토큰 수")
+    ap.add_argument("--seed", type=int, default=None)
+    ap.add_argument("--verbose", action="store_true")
+    args = ap.parse_args()
+
+    if args.mode in ("replay", "record") and not args.cassette:
+        ap.error("--cassette is required for replay/record")
+    if args.mode == "record" and not args.upstream:
+        ap.error("--upstream is required for record")
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    app = StandIn(args)
+    ThreadingHTTPServer.request_queue_size = 256
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(app))
+    server.daemon_threads = True
+    print(
+        f"HF stand-in on http://{args.host}:{args.port} mode={args.mode} shape={args.shape} "
+        f"latency={args.latency} errors={args.errors or '-'} cassette={len(app.cassette.entries)} entries",
+        flush=True,
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()